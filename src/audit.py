@@ -0,0 +1,184 @@
+# src/audit.py
+"""
+Änderungsjournal (Audit) + Undo/Redo pro Sitzung.
+
+Schreib-APIs sammeln pro Request eine Gruppe von Änderungen
+(Tabelle, Schlüssel, vorher, nachher) und reichen sie nach dem Commit ein.
+Gespeichert werden nur die geänderten Felder als kompaktes JSON;
+Anlegen = vorher None, Löschen = nachher None (dann die volle Zeile,
+damit Undo sie wiederherstellen kann).
+
+Journal.submit() hängt nur an einen Puffer im Speicher an. Ein
+Hintergrund-Thread schreibt alle FLUSH_INTERVAL Sekunden (bzw. sobald
+MAX_BUFFER Einträge warten) per executemany in audit_log – der Schreibpfad
+der Planung bekommt dadurch keinen zusätzlichen INSERT.
+
+state in audit_log: 0 = aktiv, 1 = rückgängig gemacht (Redo möglich),
+2 = verworfen (nach einem Undo kam eine neue Änderung, Redo-Zweig ist weg).
+"""
+import json
+import secrets
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 1.0
+MAX_BUFFER = 500
+
+# Tabelle -> (Schlüsselspalten, Datenfelder)
+TABLES = {
+    "year_jobs": (("id",), ("title", "start_date", "duration_days", "height_rows",
+                            "section", "row_index", "color", "note")),
+    "week_cells": (("week_plan_id", "row_index", "day_index"), ("text",)),
+    "global_small_jobs": (("standort", "row_index"), ("text",)),
+    "year_holidays": (("day",), ("label",)),
+    "year_week_overrides": (("year", "kw"), ("show_friday",)),
+    "year_rows": (("id",), ("name",)),
+    "week_plans": (("id",), ("row_count", "four_day_week")),
+}
+
+YEAR_TABLES = {"year_jobs", "year_holidays", "year_week_overrides", "year_rows"}
+# Tabellen mit version-Spalte (Optimistic Locking) – Undo/Redo zählt sie mit hoch
+VERSIONED = {"year_jobs", "week_cells"}
+
+
+def _dumps(v) -> str | None:
+    return None if v is None else json.dumps(v, separators=(",", ":"), ensure_ascii=False)
+
+
+def merge(first: tuple[dict | None, dict | None],
+          second: tuple[dict | None, dict | None]) -> tuple[dict | None, dict | None] | None:
+    """
+    Zwei aufeinanderfolgende Änderungen derselben Zeile zu einer zusammenfassen
+    (vorher der ersten, nachher der zweiten). None = ergibt keine Änderung.
+    Mit first = (None, None) ist das die Reduktion einer einzelnen Änderung.
+    """
+    (b1, a1), (b2, a2) = first, second
+    if first == (None, None):
+        b1, a1 = b2, b2
+    before = None if b1 is None else {**(b2 or {}), **b1}
+    after = None if a2 is None else {**(a1 or {}), **a2}
+    if before is None or after is None:
+        return None if before is None and after is None else (before, after)
+    changed = [k for k in after if before.get(k) != after[k]]
+    if not changed:
+        return None
+    return {k: before.get(k) for k in changed}, {k: after[k] for k in changed}
+
+
+class Group:
+    """Änderungen eines Requests (eine Undo-Einheit)."""
+
+    def __init__(self, session: str, username: str | None):
+        self.session = session
+        self.username = username
+        self.id = secrets.token_hex(8)
+        self._changes: dict[tuple[str, tuple], tuple[dict | None, dict | None] | None] = {}
+
+    def add(self, tbl: str, key: tuple, before: dict | None, after: dict | None):
+        k = (tbl, tuple(key))
+        prev = self._changes.pop(k, (None, None)) or (None, None)
+        # erneut einfügen -> Reihenfolge = letzte Änderung
+        self._changes[k] = merge(prev, (before, after))
+
+    def rows(self) -> list[tuple]:
+        return [
+            (self.session, self.username, self.id, tbl, _dumps(list(key)), _dumps(c[0]), _dumps(c[1]))
+            for (tbl, key), c in self._changes.items() if c is not None
+        ]
+
+
+class Journal:
+    """
+    write(rows) -> schreibt [(session, username, grp, tbl, row_key, old_data, new_data)]
+    in einer Transaktion (executemany).
+    """
+
+    def __init__(self, write: Callable[[list[tuple]], None],
+                 interval: float = FLUSH_INTERVAL, max_buffer: int = MAX_BUFFER):
+        self._write = write
+        self.interval = interval
+        self.max_buffer = max_buffer
+        self._buf: list[tuple] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, group: Group):
+        rows = group.rows()
+        if not rows:
+            return
+        with self._lock:
+            self._buf.extend(rows)
+            full = len(self._buf) >= self.max_buffer
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Puffer schreiben (auch synchron, z.B. vor Undo)."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buf = self._buf, []
+            if not rows:
+                return
+            try:
+                self._write(rows)
+            except Exception:
+                logger.exception("Audit-Journal: %d Einträge nicht geschrieben, neuer Versuch beim nächsten Flush", len(rows))
+                with self._lock:
+                    self._buf[:0] = rows
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._loop, name="audit-journal", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+
+def compact(rows: list[dict]) -> tuple[list[tuple], list[int]]:
+    """
+    Aufeinanderfolgende Änderungen derselben Zeile durch dieselbe Sitzung zusammenfassen.
+    rows: [{seq, session, tbl, row_key, old_data, new_data}] sortiert nach (tbl, row_key, seq).
+    Rückgabe: (Updates [(old_data, new_data, seq)], zu löschende seqs).
+    """
+    updates, deletes = [], []
+    run: list[dict] = []
+
+    def close():
+        if len(run) < 2:
+            return
+        c = (None, None)
+        for r in run:
+            c = merge(c, (json.loads(r["old_data"] or "null"), json.loads(r["new_data"] or "null"))) or (None, None)
+        keep = run[-1]["seq"]
+        deletes.extend(r["seq"] for r in run[:-1])
+        if c == (None, None):
+            deletes.append(keep)
+        else:
+            updates.append((_dumps(c[0]), _dumps(c[1]), keep))
+
+    for r in rows:
+        if run and (r["tbl"], r["row_key"], r["session"]) != (run[-1]["tbl"], run[-1]["row_key"], run[-1]["session"]):
+            close()
+            run = []
+        run.append(r)
+    close()
+    return updates, deletes
@@ -0,0 +1,260 @@
+# src/cache.py
+"""
+In-Memory Caches (pro Prozess).
+
+Cache:         generischer LRU-Cache (z.B. Jahresmodelle für /year).
+SnapshotCache: fertig gerenderte Viewer-Seiten (/view/week) inkl. ETag.
+SingleFlight:  gleichzeitige identische Berechnungen zusammenfassen.
+ChangeFeed:    prozessübergreifende Invalidierung (mehrere uvicorn-Worker).
+TitleIndex:    Präfix-Autocomplete für Job-Titel (sortierte Liste + bisect).
+"""
+import bisect
+import hashlib
+import heapq
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, NamedTuple
+
+
+class Snapshot(NamedTuple):
+    html: str
+    etag: str
+    allow_next: bool
+
+
+def make_etag(body: str) -> str:
+    return '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+
+
+class Cache:
+    """
+    Kleiner LRU-Cache mit Generation pro Key.
+    Die Generation verhindert, dass eine Berechnung, die vor einem Schreibzugriff
+    begonnen hat, nach der Invalidierung noch alte Daten ablegt:
+        gen = cache.generation(key); value = build(); cache.put(key, value, gen)
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._gen: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def generation(self, key) -> int:
+        with self._lock:
+            # Key registrieren, damit clear() auch laufende Berechnungen erfasst
+            return self._gen.setdefault(key, 0)
+
+    def put(self, key, value, generation: int) -> bool:
+        with self._lock:
+            if self._gen.get(key, 0) != generation:
+                return False  # inzwischen invalidiert -> nicht ablegen
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def _drop(self, keys) -> list:
+        # Lock muss gehalten werden
+        dropped = []
+        for key in keys:
+            self._gen[key] = self._gen.get(key, 0) + 1
+            if self._entries.pop(key, None) is not None:
+                dropped.append(key)
+        return dropped
+
+    def invalidate(self, key) -> bool:
+        with self._lock:
+            return bool(self._drop([key]))
+
+    def clear(self) -> list:
+        with self._lock:
+            # auch Keys ohne Eintrag (laufende Berechnungen) ungültig machen
+            return self._drop(list(set(self._entries) | set(self._gen)))
+
+
+class SnapshotCache(Cache):
+    """Viewer-Seiten, Key = (standort, year, kw)."""
+
+    def invalidate_week(self, standort: str, year: int | None = None, kw: int | None = None) -> list[tuple]:
+        """
+        Entfernt eine Woche (year+kw) oder alle Wochen eines Standorts.
+        Rückgabe: die Keys, die gecacht waren (Kandidaten fürs Neu-Rendern).
+        """
+        with self._lock:
+            if year is not None and kw is not None:
+                keys = [(standort, int(year), int(kw))]
+            else:
+                keys = [k for k in set(self._entries) | set(self._gen) if k[0] == standort]
+            return self._drop(keys)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Request-Coalescing: laufen mehrere identische Berechnungen gleichzeitig
+    (z.B. 4x /year?year=2026 nach einem Speichern), rechnet nur die erste,
+    die anderen warten auf deren Ergebnis.
+
+    Der Key sollte die Cache-Generation enthalten: Requests nach einem
+    Schreibzugriff hängen sich dann nicht an eine Berechnung mit altem Stand.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class ChangeFeed:
+    """
+    Prozessübergreifende Invalidierung ohne externen Broker.
+
+    Trigger schreiben jede Änderung an Plandaten als Zeile mit fortlaufender
+    seq in die Tabelle cache_changes. Jeder Worker merkt sich die zuletzt
+    gesehene seq und holt vor einem Cache-Zugriff nur die neueren Zeilen
+    (Range-Scan auf dem Primary Key – ohne Änderungen ein leeres Ergebnis).
+
+    fetch(since, limit) -> Zeilen mit seq > since (aufsteigend)
+    apply(rows)         -> passende Cache-Einträge invalidieren
+    reset()             -> alles verwerfen (Lücke / zu viele Änderungen)
+    """
+
+    def __init__(self, fetch: Callable[[int, int], list], apply: Callable[[list], None],
+                 reset: Callable[[], None], batch: int = 500):
+        self._fetch = fetch
+        self._apply = apply
+        self._reset = reset
+        self.batch = batch
+        self.last_seq = 0
+        self._lock = threading.Lock()
+
+    def start(self, last_seq: int):
+        with self._lock:
+            self.last_seq = int(last_seq)
+
+    def check(self):
+        since = self.last_seq
+        rows = self._fetch(since, self.batch + 1)
+        if not rows:
+            return
+        with self._lock:
+            if rows[-1]["seq"] <= self.last_seq:
+                return  # anderer Thread war schneller
+            self.last_seq = rows[-1]["seq"]
+        # Lücke (alte Zeilen bereits aufgeräumt) oder sehr viele Änderungen -> alles verwerfen
+        if len(rows) > self.batch or rows[0]["seq"] != since + 1:
+            self._reset()
+            return
+        self._apply(rows)
+
+
+def _fold(text: str) -> str:
+    """Kleinschreibung, ohne Akzente/Umlaute-Punkte ("Müller" -> "muller"), Komma als Trenner."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.replace(",", " ").split())
+
+
+class TitleIndex:
+    """
+    Autocomplete für Job-Titel über alle Jahre.
+
+    load() -> [(title, score)], score = Häufigkeit gewichtet nach Aktualität.
+    Jeder Wortanfang eines Titels ist ein Schlüssel ("Müller, Zwettl" findet
+    man mit "mü" und mit "zw"); die Schlüssel liegen sortiert in einer Liste,
+    ein Präfix ist damit ein bisect + kurzer Scan.
+
+    invalidate() markiert den Index als veraltet, neu gebaut wird beim
+    nächsten Zugriff (Schreib-APIs der Jahresplanung / ChangeFeed).
+    """
+
+    def __init__(self, load: Callable[[], list[tuple[str, float]]]):
+        self._load = load
+        self._lock = threading.Lock()
+        self._version = 0
+        self._built = -1
+        self._titles: list[str] = []
+        self._scores: list[float] = []
+        self._keys: list[str] = []
+        self._refs: list[int] = []
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+
+    def _ensure(self):
+        with self._lock:
+            if self._built == self._version:
+                return
+            version = self._version
+        rows = self._load()
+
+        entries = []
+        for i, (title, _score) in enumerate(rows):
+            words = _fold(title).split()
+            for w in range(len(words)):
+                entries.append((" ".join(words[w:]), i))
+        entries.sort()
+
+        with self._lock:
+            if version != self._version:
+                return  # während des Ladens invalidiert -> nächster Aufruf baut neu
+            self._titles = [t for t, _ in rows]
+            self._scores = [float(sc) for _, sc in rows]
+            self._keys = [k for k, _ in entries]
+            self._refs = [i for _, i in entries]
+            self._built = version
+
+    def complete(self, prefix: str, limit: int = 10) -> list[str]:
+        self._ensure()
+        p = _fold(prefix)
+        if not p:
+            return []
+        with self._lock:
+            keys, refs, titles, scores = self._keys, self._refs, self._titles, self._scores
+        start = bisect.bisect_left(keys, p)
+        stop = bisect.bisect_left(keys, p + "\uffff", lo=start)
+        hits = {refs[k] for k in range(start, stop)}
+        best = heapq.nsmallest(limit, hits, key=lambda i: (-scores[i], titles[i].casefold()))
+        return [titles[i] for i in best]
@@ -1,164 +1,588 @@
 # src/db.py
 import sqlite3
+import threading
 from pathlib import Path
-from .auth import hash_password
 
 # --------------------------------------------------
-# Datenbank-Pfad
+# Datenbank-Pfad (eine DB für alle Module)
 # --------------------------------------------------
-BASE_DIR = Path(__file__).resolve().parent.parent
-DB_DIR = BASE_DIR / "data"
-DB_DIR.mkdir(exist_ok=True)
-DB_PATH = DB_DIR / "app.db"
+BASE_DIR = Path(__file__).resolve().parent  # src/
+DB_PATH = BASE_DIR / "zankl.db"
+
+# Verbindungen bleiben im Pool offen -> der Statement-Cache von sqlite3
+# (prepared statements pro Verbindung) wird über Requests hinweg genutzt.
+STATEMENT_CACHE_SIZE = 256
+POOL_SIZE = 8
+# Viewer-Traffic (/view/week, Lese-APIs) hat einen eigenen, kleinen Read-only-Pool
+READ_POOL_SIZE = 4
 
 
 # --------------------------------------------------
-# Connection Helper
+# Connection Pool
 # --------------------------------------------------
-def get_conn():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    return conn
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3-Verbindung, deren close() sie an den Pool zurückgibt.
+    Bestehender Code (conn = get_conn() ... finally: conn.close()) bleibt so gültig.
+    """
+
+    pool = None
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+            return
+        self.pool.release(self)
+
+    def dispose(self):
+        self.pool = None
+        super().close()
+
+
+class ConnectionPool:
+    def __init__(self, path: Path, size: int = POOL_SIZE, read_only: bool = False):
+        self.path = path
+        self.size = size
+        self.read_only = read_only
+        self._idle: list[PooledConnection] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> PooledConnection:
+        if self.read_only:
+            # mode=ro: SQLite verweigert jeden Schreibzugriff schon beim Öffnen
+            conn = sqlite3.connect(
+                f"{self.path.as_uri()}?mode=ro",
+                uri=True,
+                factory=PooledConnection,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE,
+            )
+            conn.execute("PRAGMA query_only=1")
+        else:
+            conn = sqlite3.connect(
+                self.path,
+                factory=PooledConnection,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE,
+            )
+            # mit WAL ausreichend sicher, spart fsync pro Commit
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        conn.pool = self
+        return conn
+
+    def acquire(self) -> PooledConnection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        # Pool leer -> neue Verbindung (kein Blockieren, auch bei verschachtelten get_conn())
+        return self._connect()
+
+    def release(self, conn: PooledConnection):
+        # nicht committete Änderungen verwerfen (wie beim echten close())
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.dispose()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.dispose()
+
+
+_pool = ConnectionPool(DB_PATH)
+_ro_pool = ConnectionPool(DB_PATH, READ_POOL_SIZE, read_only=True)
+
+
+def get_conn() -> PooledConnection:
+    return _pool.acquire()
+
+
+def get_ro_conn() -> PooledConnection:
+    """
+    Read-only Verbindung für reine Lesepfade.
+    Im WAL-Modus warten Leser nie auf den Schreib-Lock der Disponenten.
+    """
+    return _ro_pool.acquire()
+
+
+def close_pool():
+    _ro_pool.close_all()
+    _pool.close_all()
+
+
+def run_maintenance():
+    """Alte cache_changes/change_log aufräumen, Statistiken für den Query-Planer aktualisieren, WAL kürzen."""
+    conn = get_conn()
+    try:
+        # Worker prüfen pro Request -> ein Tag Historie reicht
+        conn.execute("DELETE FROM cache_changes WHERE created_at < datetime('now', '-1 day')")
+        # Delta-Sync: Clients, die länger offline waren, laden danach komplett neu
+        conn.execute("DELETE FROM change_log WHERE created_at < datetime('now', '-30 days')")
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+        conn.commit()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
 
 
 # --------------------------------------------------
-# Initialisierung
+# Schema / Migrationen
 # --------------------------------------------------
+def column_exists(cur, table: str, column: str) -> bool:
+    cur.execute(f"PRAGMA table_info({table})")
+    return any(r[1] == column for r in cur.fetchall())
+
+
+def create_cache_change_triggers(cur):
+    # Jahresplanung: jede Änderung invalidiert die Jahresmodelle
+    for table in ("year_jobs", "year_holidays", "year_week_overrides", "year_rows", "year_row_settings"):
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_cc_{table}_{op.lower()} AFTER {op} ON {table}
+                BEGIN
+                  INSERT INTO cache_changes(scope) VALUES('year');
+                END
+            """)
+
+    # Wochenplanung: genau die betroffene Woche
+    for op, ref in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_cc_week_cells_{op.lower()} AFTER {op} ON week_cells
+            BEGIN
+              INSERT INTO cache_changes(scope,standort,year,kw)
+              SELECT 'week', standort, year, kw FROM week_plans WHERE id={ref}.week_plan_id;
+            END
+        """)
+    # neu angelegte (leere) Pläne ändern die Anzeige nicht -> kein INSERT-Trigger
+    for op, ref in (("UPDATE", "NEW"), ("DELETE", "OLD")):
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_cc_week_plans_{op.lower()} AFTER {op} ON week_plans
+            BEGIN
+              INSERT INTO cache_changes(scope,standort,year,kw) VALUES('week', {ref}.standort, {ref}.year, {ref}.kw);
+            END
+        """)
+
+    # standortweit: Kleinbaustellen, Mitarbeiter
+    for table in ("global_small_jobs", "employees"):
+        for op, ref in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_cc_{table}_{op.lower()} AFTER {op} ON {table}
+                BEGIN
+                  INSERT INTO cache_changes(scope,standort) VALUES('standort', {ref}.standort);
+                END
+            """)
+
+
+# JSON-Ausdruck pro Tabelle (ref = NEW / OLD)
+CHANGE_LOG_TABLES = {
+    "year_jobs": """json_object('title', {ref}.title, 'start_date', {ref}.start_date,
+        'duration_days', {ref}.duration_days, 'height_rows', {ref}.height_rows,
+        'section', {ref}.section, 'row_index', {ref}.row_index, 'color', {ref}.color, 'note', {ref}.note,
+        'version', {ref}.version)""",
+    "year_holidays": "json_object('day', {ref}.day, 'label', {ref}.label)",
+    "year_week_overrides": "json_object('year', {ref}.year, 'kw', {ref}.kw, 'show_friday', {ref}.show_friday)",
+    "global_small_jobs": "json_object('standort', {ref}.standort, 'row_index', {ref}.row_index, 'text', {ref}.text)",
+}
+
+
+def create_change_log_triggers(cur):
+    for table, expr in CHANGE_LOG_TABLES.items():
+        for op, ref, kind in (("INSERT", "NEW", "upsert"), ("UPDATE", "NEW", "upsert"), ("DELETE", "OLD", "delete")):
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_cl_{table}_{op.lower()} AFTER {op} ON {table}
+                BEGIN
+                  INSERT INTO change_log(tbl,op,row_id,data)
+                  VALUES('{table}', '{kind}', {ref}.id, {expr.format(ref=ref)});
+                END
+            """)
+
+    # week_cells: Woche/Standort aus week_plans mitliefern, damit Clients ohne plan_id auskommen
+    for op, ref, kind in (("INSERT", "NEW", "upsert"), ("UPDATE", "NEW", "upsert"), ("DELETE", "OLD", "delete")):
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_cl_week_cells_{op.lower()} AFTER {op} ON week_cells
+            BEGIN
+              INSERT INTO change_log(tbl,op,row_id,data)
+              SELECT 'week_cells', '{kind}', {ref}.id,
+                     json_object('standort', p.standort, 'year', p.year, 'kw', p.kw,
+                                 'row_index', {ref}.row_index, 'day_index', {ref}.day_index, 'text', {ref}.text,
+                                 'version', {ref}.version)
+              FROM week_plans p WHERE p.id={ref}.week_plan_id;
+            END
+        """)
+
+
+def create_section_change_triggers(cur):
+    """
+    Letzte Änderung je Section der Jahresplanung (Last-Modified der ICS-Feeds).
+    Verschobene Jobs markieren alte und neue Section, Kalender-Änderungen alle ('*').
+    """
+    mark = "INSERT OR REPLACE INTO year_section_changes(section, changed_at) VALUES({}, CURRENT_TIMESTAMP);"
+    for op, refs in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",))):
+        body = "\n".join(mark.format(f"{ref}.section") for ref in refs)
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_sc_year_jobs_{op.lower()} AFTER {op} ON year_jobs
+            BEGIN
+              {body}
+            END
+        """)
+    for table in ("year_holidays", "year_week_overrides"):
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_sc_{table}_{op.lower()} AFTER {op} ON {table}
+                BEGIN
+                  {mark.format("'*'")}
+                END
+            """)
+
+
+# Volltextindex: rowid = id * 4 + Art -> Trigger löschen/aktualisieren per rowid (ohne Scan)
+SEARCH_KIND_YEAR_JOB = 1
+SEARCH_KIND_WEEK_CELL = 2
+SEARCH_KIND_SMALL_JOB = 3
+
+SEARCH_SOURCES = {
+    # table: (Art, Text-Ausdruck, Bedingung)
+    "year_jobs": (SEARCH_KIND_YEAR_JOB, "{ref}.title || ' ' || COALESCE({ref}.note, '')", "1"),
+    "week_cells": (SEARCH_KIND_WEEK_CELL, "{ref}.text", "TRIM(COALESCE({ref}.text, '')) != ''"),
+    "global_small_jobs": (SEARCH_KIND_SMALL_JOB, "{ref}.text", "TRIM(COALESCE({ref}.text, '')) != ''"),
+}
+
+FTS_AVAILABLE = True
+
+
+def create_search_index(cur):
+    global FTS_AVAILABLE
+    cur.execute("SELECT 1 FROM sqlite_master WHERE name='search_fts'")
+    exists = cur.fetchone() is not None
+    try:
+        cur.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+              body,
+              tokenize = 'unicode61 remove_diacritics 2',
+              prefix = '2 3'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # SQLite ohne FTS5 -> Suche deaktiviert
+        FTS_AVAILABLE = False
+        return
+
+    for table, (kind, body, cond) in SEARCH_SOURCES.items():
+        insert_new = f"""
+            INSERT INTO search_fts(rowid, body)
+            SELECT NEW.id * 4 + {kind}, {body.format(ref="NEW")} WHERE {cond.format(ref="NEW")};
+        """
+        delete_old = f"DELETE FROM search_fts WHERE rowid = OLD.id * 4 + {kind};"
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_fts_{table}_insert AFTER INSERT ON {table}
+            BEGIN {insert_new} END
+        """)
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_fts_{table}_update AFTER UPDATE ON {table}
+            BEGIN {delete_old} {insert_new} END
+        """)
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_fts_{table}_delete AFTER DELETE ON {table}
+            BEGIN {delete_old} END
+        """)
+
+        # bestehende Daten einmalig indexieren
+        if not exists:
+            cur.execute(f"""
+                INSERT INTO search_fts(rowid, body)
+                SELECT id * 4 + {kind}, {body.format(ref=table)} FROM {table} WHERE {cond.format(ref=table)}
+            """)
+
+
 def init_db():
     conn = get_conn()
-    c = conn.cursor()
-
-    # --------------------------------------------------
-    # Standorte
-    # --------------------------------------------------
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS standorte (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL UNIQUE
-    )
-    """)
-
-    # --------------------------------------------------
-    # Mitarbeiter (fixe Zeilen!)
-    # --------------------------------------------------
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS mitarbeiter (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        standort_id INTEGER NOT NULL,
-        name TEXT NOT NULL,
-        aktiv INTEGER NOT NULL DEFAULT 1,
-        sort_order INTEGER NOT NULL,
-        UNIQUE(standort_id, sort_order)
-    )
-    """)
-
-    # --------------------------------------------------
-    # Wochenplanung (Kopf)
-    # --------------------------------------------------
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS week_plans (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        year INTEGER NOT NULL,
-        kw INTEGER NOT NULL,
-        standort_id INTEGER NOT NULL,
-        UNIQUE(year, kw, standort_id)
-    )
-    """)
-
-    # --------------------------------------------------
-    # Wochenzellen (jede Eingabe!)
-    # --------------------------------------------------
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS week_cells (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        week_plan_id INTEGER NOT NULL,
-        mitarbeiter_id INTEGER NOT NULL,
-        day_index INTEGER NOT NULL,   -- 0=Mo … 4=Fr
-        text TEXT,
-        color TEXT,
-        UNIQUE(week_plan_id, mitarbeiter_id, day_index)
-    )
-    """)
-
-    # --------------------------------------------------
-    # Benutzer (für späteres Login)
-    # --------------------------------------------------
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE,
-        password_hash TEXT,
-        role TEXT CHECK(role IN ('admin','write','view')) NOT NULL DEFAULT 'view',
-        standort_id INTEGER
-    )
-    """)
+    cur = conn.cursor()
 
-    conn.commit()
+    # WAL: Leser und Schreiber blockieren sich nicht gegenseitig (persistent in der DB-Datei)
+    cur.execute("PRAGMA journal_mode=WAL")
 
-    # --------------------------------------------------
-    # SEED: Standorte
-    # --------------------------------------------------
-    c.execute("SELECT COUNT(*) AS n FROM standorte")
-    if c.fetchone()["n"] == 0:
-        c.executemany(
-            "INSERT INTO standorte (name) VALUES (?)",
-            [("Engelbrechts",), ("Groß Gerungs",)]
+    # --- YEAR row settings (Anzahl Zeilen pro Bereich) ---
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS year_row_settings(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          section TEXT NOT NULL UNIQUE,        -- 'eb' | 'res' | 'gg'
+          row_count INTEGER NOT NULL
         )
-        conn.commit()
+    """)
 
-    # --------------------------------------------------
-    # SEED: Mitarbeiter Engelbrechts (10 fixe Zeilen)
-    # --------------------------------------------------
-    c.execute("SELECT id FROM standorte WHERE name='Engelbrechts'")
-    engelbrechts_id = c.fetchone()["id"]
-
-    c.execute("SELECT COUNT(*) AS n FROM mitarbeiter WHERE standort_id=?", (engelbrechts_id,))
-    if c.fetchone()["n"] == 0:
-        for i in range(1, 11):
-            c.execute(
-                "INSERT INTO mitarbeiter (standort_id, name, sort_order) VALUES (?, ?, ?)",
-                (engelbrechts_id, f"Mitarbeiter {i}", i)
+    # Seed default row settings (nur wenn noch nix drin)
+    cur.execute("SELECT COUNT(*) AS n FROM year_row_settings")
+    if int(cur.fetchone()["n"] or 0) == 0:
+        for sec, cnt in [("eb", 12), ("res", 8), ("gg", 12)]:
+            cur.execute(
+                "INSERT OR IGNORE INTO year_row_settings(section,row_count) VALUES(?,?)",
+                (sec, cnt)
             )
-        conn.commit()
 
-    # --------------------------------------------------
-    # SEED: Mitarbeiter Groß Gerungs (10 fixe Zeilen)
-    # --------------------------------------------------
-    c.execute("SELECT id FROM standorte WHERE name='Groß Gerungs'")
-    gr_id = c.fetchone()["id"]
-
-    c.execute("SELECT COUNT(*) AS n FROM mitarbeiter WHERE standort_id=?", (gr_id,))
-    if c.fetchone()["n"] == 0:
-        for i in range(1, 11):
-            c.execute(
-                "INSERT INTO mitarbeiter (standort_id, name, sort_order) VALUES (?, ?, ?)",
-                (gr_id, f"Mitarbeiter {i}", i)
-            )
-        conn.commit()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS week_plans(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          year INTEGER,
+          kw INTEGER,
+          standort TEXT,
+          row_count INTEGER DEFAULT 5,
+          four_day_week INTEGER DEFAULT 1,
+          UNIQUE(year, kw, standort)
+        )
+    """)
 
-    conn.close()
+    if not column_exists(cur, "week_plans", "four_day_week"):
+        cur.execute("ALTER TABLE week_plans ADD COLUMN four_day_week INTEGER DEFAULT 1")
 
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS week_cells(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          week_plan_id INTEGER,
+          row_index INTEGER,
+          day_index INTEGER,
+          text TEXT,
+          UNIQUE(week_plan_id, row_index, day_index)
+        )
+    """)
 
-# --------------------------------------------------
-# SEED: Admin-User (einmalig)
-# --------------------------------------------------
-def seed_admin():
-    conn = get_conn()
-    c = conn.cursor()
+    # Optimistic Locking: jede Änderung erhöht version, Schreib-APIs prüfen die erwartete
+    if not column_exists(cur, "week_cells", "version"):
+        cur.execute("ALTER TABLE week_cells ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
 
-    c.execute("SELECT id FROM users WHERE username = ?", ("admin",))
-    if c.fetchone():
-        conn.close()
-        return
+    # ---- Wochenvorlagen (benannte Kopie eines Wochenrasters) ----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS week_templates(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          name TEXT NOT NULL UNIQUE,
+          standort TEXT,                       -- Herkunft (nur Info)
+          row_count INTEGER DEFAULT 5,
+          four_day_week INTEGER DEFAULT 1,
+          created_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS week_template_cells(
+          template_id INTEGER NOT NULL,
+          row_index INTEGER NOT NULL,
+          day_index INTEGER NOT NULL,
+          text TEXT,
+          PRIMARY KEY(template_id, row_index, day_index)
+        )
+    """)
 
-    c.execute(
-        "INSERT INTO users (username, password_hash, role, standort_id) VALUES (?, ?, ?, NULL)",
-        ("admin", hash_password("admin"), "admin")
-    )
-    conn.commit()
-    conn.close()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS employees(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          name TEXT,
+          standort TEXT
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS global_small_jobs(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          standort TEXT,
+          row_index INTEGER,
+          text TEXT,
+          UNIQUE(standort, row_index)
+        )
+    """)
+
+    # ---- Users / Login ----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS users(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          username TEXT UNIQUE,
+          password_hash TEXT,
+          is_write INTEGER NOT NULL DEFAULT 0,
+          can_view_eb INTEGER NOT NULL DEFAULT 0,
+          can_view_gg INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    # Migration
+    if not column_exists(cur, "users", "is_write"):
+        cur.execute("ALTER TABLE users ADD COLUMN is_write INTEGER NOT NULL DEFAULT 0")
+
+    if not column_exists(cur, "users", "can_view_eb"):
+        cur.execute("ALTER TABLE users ADD COLUMN can_view_eb INTEGER NOT NULL DEFAULT 0")
+
+    if not column_exists(cur, "users", "can_view_gg"):
+        cur.execute("ALTER TABLE users ADD COLUMN can_view_gg INTEGER NOT NULL DEFAULT 0")
+
+    # ---- YEAR PLAN (Jahresplanung) ----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS year_rows(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          section TEXT NOT NULL,               -- 'eb' | 'res' | 'gg'
+          row_index INTEGER NOT NULL,
+          name TEXT NOT NULL,
+          UNIQUE(section, row_index)
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS year_jobs(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          title TEXT NOT NULL,                 -- "Name, Ort"
+          start_date TEXT NOT NULL,            -- 'YYYY-MM-DD'
+          duration_days INTEGER NOT NULL,      -- Arbeitstage
+          height_rows INTEGER NOT NULL,        -- Mitarbeiter/Zeilen-Hoehe
+          section TEXT NOT NULL,               -- 'eb'|'res'|'gg'
+          row_index INTEGER NOT NULL,          -- Startzeile (0-basiert innerhalb section)
+          color TEXT NOT NULL,                 -- 'blue'|'yellow'|'red'|'green'
+          note TEXT
+        )
+    """)
 
+    def migrate_year_jobs_title_not_unique(cur):
+        cur.execute("CREATE TABLE IF NOT EXISTS _migrations (key TEXT PRIMARY KEY)")
+        cur.execute("SELECT 1 FROM _migrations WHERE key='year_jobs_title_not_unique'")
+        if cur.fetchone():
+            return
 
-# Beim Import der App ausführen
-init_db()
-seed_admin()
+        cur.execute("""
+          CREATE TABLE IF NOT EXISTS year_jobs_new(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            duration_days INTEGER NOT NULL,
+            height_rows INTEGER NOT NULL,
+            section TEXT NOT NULL,
+            row_index INTEGER NOT NULL,
+            color TEXT NOT NULL,
+            note TEXT
+          )
+        """)
+
+        cur.execute("""
+          INSERT INTO year_jobs_new(id,title,start_date,duration_days,height_rows,section,row_index,color,note)
+          SELECT id,title,start_date,duration_days,height_rows,section,row_index,color,note
+          FROM year_jobs
+        """)
+
+        cur.execute("DROP TABLE year_jobs")
+        cur.execute("ALTER TABLE year_jobs_new RENAME TO year_jobs")
+        cur.execute("INSERT INTO _migrations(key) VALUES('year_jobs_title_not_unique')")
+
+    migrate_year_jobs_title_not_unique(cur)
+
+    if not column_exists(cur, "year_jobs", "version"):
+        cur.execute("ALTER TABLE year_jobs ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS year_week_overrides(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          year INTEGER NOT NULL,
+          kw INTEGER NOT NULL,
+          show_friday INTEGER NOT NULL DEFAULT 0,
+          UNIQUE(year, kw)
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS year_holidays(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          day TEXT NOT NULL UNIQUE,            -- 'YYYY-MM-DD'
+          label TEXT
+        )
+    """)
+
+    # ---- Änderungs-Sequenz für prozessübergreifende Cache-Invalidierung ----
+    # (mehrere uvicorn-Worker: jeder Worker liest nur die Zeilen mit seq > zuletzt gesehen)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS cache_changes(
+          seq INTEGER PRIMARY KEY AUTOINCREMENT,
+          scope TEXT NOT NULL,                 -- 'year' | 'week' | 'standort'
+          standort TEXT,
+          year INTEGER,
+          kw INTEGER,
+          created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    create_cache_change_triggers(cur)
+
+    # ---- Change-Log (append-only) für Delta-Sync der Clients (/api/changes) ----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS change_log(
+          seq INTEGER PRIMARY KEY AUTOINCREMENT,
+          tbl TEXT NOT NULL,                   -- Tabellenname
+          op TEXT NOT NULL,                    -- 'upsert' | 'delete'
+          row_id INTEGER NOT NULL,
+          data TEXT NOT NULL,                  -- JSON: geänderte Zeile (bei delete nur Schlüssel)
+          created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # version in den Change-Log-Daten: bestehende Trigger einmalig ersetzen
+    cur.execute("SELECT 1 FROM _migrations WHERE key='change_log_version'")
+    if not cur.fetchone():
+        for table in ("year_jobs", "week_cells"):
+            for op in ("insert", "update", "delete"):
+                cur.execute(f"DROP TRIGGER IF EXISTS trg_cl_{table}_{op}")
+        cur.execute("INSERT INTO _migrations(key) VALUES('change_log_version')")
+    create_change_log_triggers(cur)
+
+    # ---- Letzte Änderung je Section (wird nicht aufgeräumt, anders als change_log) ----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS year_section_changes(
+          section TEXT PRIMARY KEY,            -- 'eb' | 'res' | 'gg' | '*' = Kalender
+          changed_at TEXT NOT NULL
+        )
+    """)
+    # '*' ab Anlage: fester Ausgangszeitpunkt für Sections ohne eigene Änderung
+    cur.execute("INSERT OR IGNORE INTO year_section_changes(section, changed_at) VALUES('*', CURRENT_TIMESTAMP)")
+    create_section_change_triggers(cur)
+
+    # ---- Audit-Journal (append-only, gepuffert geschrieben) für Verlauf + Undo/Redo ----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS audit_log(
+          seq INTEGER PRIMARY KEY AUTOINCREMENT,
+          session TEXT NOT NULL,               -- Sitzungs-ID (Cookie)
+          username TEXT,
+          grp TEXT NOT NULL,                   -- eine Undo-Einheit (= ein Request)
+          tbl TEXT NOT NULL,
+          row_key TEXT NOT NULL,               -- JSON-Array der Schlüsselwerte
+          old_data TEXT,                       -- JSON: geänderte Felder vorher, NULL = Zeile neu
+          new_data TEXT,                       -- JSON: geänderte Felder nachher, NULL = gelöscht
+          state INTEGER NOT NULL DEFAULT 0,    -- 0 aktiv | 1 rückgängig | 2 verworfen
+          created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_session ON audit_log(session, state, seq)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_grp ON audit_log(grp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_row ON audit_log(tbl, row_key, seq)")
+
+    # ---- Volltextsuche (FTS5) über Jahres-Jobs, Wochenzellen, Kleinbaustellen ----
+    create_search_index(cur)
+
+    # ---- Indizes für die heißen Lesepfade ----
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_year_jobs_start ON year_jobs(start_date)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_year_jobs_title ON year_jobs(title COLLATE NOCASE)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_year_jobs_section_start ON year_jobs(section, start_date)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_employees_standort ON employees(standort, id)")
+
+    # ---- SEED default row names (nur wenn leer) ----
+    def seed_rows(section: str, default_count: int, prefix: str):
+        cur.execute("SELECT COUNT(*) AS n FROM year_rows WHERE section=?", (section,))
+        if int(cur.fetchone()["n"] or 0) == 0:
+            for i in range(default_count):
+                name = f"{prefix} {i+1}"
+                cur.execute(
+                    "INSERT INTO year_rows(section,row_index,name) VALUES(?,?,?)",
+                    (section, i, name)
+                )
+
+    seed_rows("eb", 12, "Team EB")
+    seed_rows("gg", 12, "Team GG")
+    seed_rows("res", 8, "Ressource")
+
+    conn.commit()
+    conn.close()
@@ -0,0 +1,123 @@
+# src/export.py
+"""
+Streaming-Export (CSV / XLSX) für Jahres- und Wochenpläne.
+
+Alles sind Generatoren: Zeilen werden aus dem Cursor gelesen und in kleinen
+Blöcken ausgegeben -> konstanter Speicher, auch bei mehrjährigen Exporten.
+
+CSV:  Semikolon + UTF-8-BOM (öffnet in deutschsprachigem Excel direkt richtig).
+XLSX: minimaler Writer mit zipfile (ein Blatt, Inline-Strings, keine Styles);
+      ZipFile schreibt in einen nicht-seekbaren Puffer, der nach jedem Block geleert wird.
+"""
+import csv
+import io
+import zipfile
+from typing import Iterable, Iterator
+from xml.sax.saxutils import escape
+
+CHUNK_ROWS = 500
+
+
+def csv_stream(header: list[str], rows: Iterable[list]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    w = csv.writer(buf, delimiter=";", lineterminator="\r\n")
+    buf.write("\ufeff")
+    w.writerow(header)
+    for i, row in enumerate(rows, 1):
+        w.writerow(["" if v is None else v for v in row])
+        if i % CHUNK_ROWS == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0); buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+class _Drain(io.RawIOBase):
+    """Nicht-seekbares Ziel für ZipFile; take() liefert das bisher Geschriebene."""
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._parts.append(bytes(b))
+        return len(b)
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _workbook(sheet_name: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+
+
+def _cell(v) -> str:
+    if v is None or v == "":
+        return "<c/>"
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return f"<c><v>{v}</v></c>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(v))}</t></is></c>'
+
+
+def xlsx_stream(sheet_name: str, header: list[str], rows: Iterable[list]) -> Iterator[bytes]:
+    out = _Drain()
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _RELS)
+        zf.writestr("xl/workbook.xml", _workbook(sheet_name))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        yield out.take()
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            parts = ["<row>" + "".join(_cell(h) for h in header) + "</row>"]
+            for i, row in enumerate(rows, 1):
+                parts.append("<row>" + "".join(_cell(v) for v in row) + "</row>")
+                if i % CHUNK_ROWS == 0:
+                    sheet.write("".join(parts).encode("utf-8"))
+                    parts = []
+                    yield out.take()
+            parts.append("</sheetData></worksheet>")
+            sheet.write("".join(parts).encode("utf-8"))
+    yield out.take()
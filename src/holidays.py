@@ -0,0 +1,61 @@
+# src/holidays.py
+"""
+Gesetzliche Feiertage Österreich (+ Niederösterreich).
+
+Bewegliche Feiertage hängen an Ostersonntag (gregorianische Osterformel),
+dazu die festen Termine. Optional: Landespatron NÖ (Leopold, 15.11.) und
+die im Bau üblichen freien Tage 24.12. / 31.12.
+"""
+from datetime import date, timedelta
+
+FIXED = [
+    (1, 1, "Neujahr"),
+    (1, 6, "Heilige Drei Könige"),
+    (5, 1, "Staatsfeiertag"),
+    (8, 15, "Mariä Himmelfahrt"),
+    (10, 26, "Nationalfeiertag"),
+    (11, 1, "Allerheiligen"),
+    (12, 8, "Mariä Empfängnis"),
+    (12, 25, "Christtag"),
+    (12, 26, "Stefanitag"),
+]
+
+# Abstand zu Ostersonntag in Tagen
+MOVABLE = [
+    (1, "Ostermontag"),
+    (39, "Christi Himmelfahrt"),
+    (50, "Pfingstmontag"),
+    (60, "Fronleichnam"),
+]
+
+EXTRAS = {
+    "leopold": (11, 15, "Hl. Leopold (Landespatron NÖ)"),
+    "heiligabend": (12, 24, "Heiliger Abend"),
+    "silvester": (12, 31, "Silvester"),
+}
+
+
+def easter_sunday(year: int) -> date:
+    """Ostersonntag (gregorianisch, anonymer Algorithmus nach Meeus/Jones/Butcher)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def austrian_holidays(year: int, extras: list[str] | None = None) -> list[tuple[date, str]]:
+    """Sortiert nach Datum. extras: Schlüssel aus EXTRAS."""
+    easter = easter_sunday(year)
+    days = [(date(year, m, d), label) for m, d, label in FIXED]
+    days += [(easter + timedelta(days=off), label) for off, label in MOVABLE]
+    for key in extras or []:
+        m, d, label = EXTRAS[key]
+        days.append((date(year, m, d), label))
+    return sorted(days)
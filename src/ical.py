@@ -0,0 +1,61 @@
+# src/ical.py
+"""
+iCalendar-Feeds (RFC 5545) für Kalender-Apps.
+
+Jobs werden als ganztägige Termine vom Start bis zum letzten Arbeitstag
+ausgegeben. Der Inhalt ist deterministisch (DTSTAMP aus dem Startdatum),
+damit gleicher Datenstand in jedem Worker denselben ETag ergibt.
+"""
+from datetime import date, timedelta
+
+
+def _escape(text: str) -> str:
+    return (text or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+    """Zeilen > 75 Oktette umbrechen (Fortsetzung beginnt mit Leerzeichen)."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line
+    parts, cur = [], b""
+    for ch in line:
+        b = ch.encode("utf-8")
+        if len(cur) + len(b) > (75 if not parts else 74):
+            parts.append(cur.decode("utf-8"))
+            cur = b""
+        cur += b
+    parts.append(cur.decode("utf-8"))
+    return "\r\n ".join(parts)
+
+
+def _ymd(d: date) -> str:
+    return d.strftime("%Y%m%d")
+
+
+def build_calendar(name: str, events: list[dict]) -> str:
+    """events: [{"uid", "title", "start": date, "end": date (letzter Tag, inkl.), "description"}]"""
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Zankl-Plan//DE",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(name)}",
+        "X-WR-TIMEZONE:Europe/Vienna",
+    ]
+    for e in events:
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{e['uid']}",
+            f"DTSTAMP:{_ymd(e['start'])}T000000Z",
+            f"DTSTART;VALUE=DATE:{_ymd(e['start'])}",
+            f"DTEND;VALUE=DATE:{_ymd(e['end'] + timedelta(days=1))}",
+            f"SUMMARY:{_escape(e['title'])}",
+        ]
+        if e.get("description"):
+            lines.append(f"DESCRIPTION:{_escape(e['description'])}")
+        lines.append("TRANSP:TRANSPARENT")
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(_fold(l) for l in lines) + "\r\n"
@@ -0,0 +1,139 @@
+# src/importer.py
+"""
+CSV-Import für Jahres-Jobs, Feiertage und Mitarbeiter.
+
+Die Datei wird zeilenweise gelesen (csv-Reader über den Upload-Stream),
+jede Zeile geprüft und in ein Tupel für executemany umgewandelt.
+Fehler werden pro Zeile gesammelt (Zeilennummer wie im Tabellenprogramm).
+
+Spaltennamen: deutsch oder englisch, Groß-/Kleinschreibung egal. Der
+Export aus /api/export/year.csv kann unverändert wieder importiert werden
+(ID/Ende werden ignoriert).
+"""
+import csv
+import io
+from datetime import date
+from typing import IO, Callable
+
+from .planner import ALLOWED_COLORS
+from .occupancy import SECTIONS
+
+MAX_ROWS = 50000
+
+COLUMNS = {
+    "jobs": {
+        "title": ("title", "titel"),
+        "start_date": ("start_date", "start", "beginn"),
+        "duration_days": ("duration_days", "arbeitstage", "dauer"),
+        "height_rows": ("height_rows", "zeilen", "hoehe", "höhe"),
+        "section": ("section", "bereich"),
+        "row_index": ("row_index", "zeile"),
+        "color": ("color", "farbe"),
+        "note": ("note", "notiz"),
+    },
+    "holidays": {
+        "day": ("day", "datum", "tag"),
+        "label": ("label", "bezeichnung", "name"),
+    },
+    "employees": {
+        "name": ("name", "mitarbeiter"),
+        "standort": ("standort",),
+    },
+}
+
+REQUIRED = {
+    "jobs": ("title", "start_date"),
+    "holidays": ("day",),
+    "employees": ("name",),
+}
+
+
+def _job(r: dict, _ctx: dict) -> tuple:
+    title = r.get("title", "").strip()
+    if not title:
+        raise ValueError("Titel fehlt")
+    try:
+        start = date.fromisoformat(r.get("start_date", "").strip()).isoformat()
+    except ValueError:
+        raise ValueError("ungültiges Startdatum (YYYY-MM-DD)")
+    duration = int(r.get("duration_days") or 1)
+    height = int(r.get("height_rows") or 1)
+    if duration < 1 or height < 1:
+        raise ValueError("Arbeitstage/Zeilen müssen >= 1 sein")
+    section = (r.get("section") or "eb").strip().lower()
+    if section not in SECTIONS:
+        raise ValueError(f"Bereich muss {'/'.join(SECTIONS)} sein")
+    row_index = int(r.get("row_index") or 0)
+    if row_index < 0:
+        raise ValueError("Zeile < 0")
+    color = (r.get("color") or "yellow").strip().lower()
+    if color not in ALLOWED_COLORS:
+        raise ValueError("ungültige Farbe")
+    note = (r.get("note") or "").strip() or None
+    return (title, start, duration, height, section, row_index, color, note)
+
+
+def _holiday(r: dict, _ctx: dict) -> tuple:
+    raw = r.get("day", "").strip()
+    try:
+        # auch dd.mm.yyyy wie in Excel üblich
+        if "." in raw:
+            d, m, y = raw.split(".")
+            day = date(int(y), int(m), int(d))
+        else:
+            day = date.fromisoformat(raw)
+    except ValueError:
+        raise ValueError("ungültiges Datum (YYYY-MM-DD oder TT.MM.JJJJ)")
+    return (day.isoformat(), (r.get("label") or "").strip() or None)
+
+
+def _employee(r: dict, ctx: dict) -> tuple:
+    name = r.get("name", "").strip()
+    if not name:
+        raise ValueError("Name fehlt")
+    st = ctx["canon_standort"](r.get("standort") or ctx["standort"])
+    if st not in ctx["standorte"]:
+        raise ValueError("unbekannter Standort")
+    return (name, st)
+
+
+PARSERS: dict[str, Callable[[dict, dict], tuple]] = {
+    "jobs": _job,
+    "holidays": _holiday,
+    "employees": _employee,
+}
+
+
+def read_csv(kind: str, stream: IO[bytes], ctx: dict) -> tuple[list[tuple], list[dict], int]:
+    """
+    Rückgabe: (gültige Tupel, Fehler [{line, errors}], Anzahl Datenzeilen).
+    Trennzeichen ; oder , wird aus der Kopfzeile erkannt.
+    Kaputte CSV-Struktur -> csv.Error, falsche Kodierung -> UnicodeDecodeError (Aufrufer).
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    first = text.readline()
+    delimiter = ";" if first.count(";") >= first.count(",") else ","
+    header = next(csv.reader([first], delimiter=delimiter, strict=True), [])
+
+    aliases = {a: field for field, names in COLUMNS[kind].items() for a in names}
+    fields = [aliases.get(h.strip().lower()) for h in header]
+    missing = [f for f in REQUIRED[kind] if f not in fields]
+    if missing:
+        return [], [{"line": 1, "errors": [f"Spalte fehlt: {', '.join(missing)}"]}], 0
+
+    parse = PARSERS[kind]
+    rows, errors, n = [], [], 0
+    # strict: ein offenes Anführungszeichen schluckt sonst still den Rest der Datei
+    for line, values in enumerate(csv.reader(text, delimiter=delimiter, strict=True), 2):
+        if not any(v.strip() for v in values):
+            continue
+        n += 1
+        if n > MAX_ROWS:
+            errors.append({"line": line, "errors": [f"mehr als {MAX_ROWS} Zeilen"]})
+            break
+        record = {f: v for f, v in zip(fields, values) if f}
+        try:
+            rows.append(parse(record, ctx))
+        except (ValueError, TypeError) as e:
+            errors.append({"line": line, "errors": [str(e)]})
+    return rows, errors, n
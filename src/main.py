@@ -1,229 +1,81 @@
 
-from fastapi import FastAPI, Request, Body, Query
+from fastapi import FastAPI, Request, Body, Query, BackgroundTasks, UploadFile, File
 from starlette.middleware.sessions import SessionMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse, Response, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, RedirectResponse, FileResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 import sqlite3
 from pathlib import Path
-from datetime import date, timedelta, datetime
+from datetime import date, timedelta, datetime, timezone
 import traceback
+import logging
 from urllib.parse import urlparse, parse_qs
 import hashlib
 import hmac
-
+import csv
+import json
+import secrets
+from email.utils import format_datetime, parsedate_to_datetime
+
+from .db import get_conn, get_ro_conn, init_db, close_pool, run_maintenance
+from . import db
+from . import repo
+from .cache import Cache, SnapshotCache, SingleFlight, ChangeFeed, Snapshot, TitleIndex, make_etag
+from .scheduler import Scheduler
+from .workdays import default_show_friday, WorkdayCalendar
+from .occupancy import Occupancy, SECTIONS
+from . import planner
+from . import export
+from . import ical
+from . import importer
+from . import audit
+from .holidays import austrian_holidays, EXTRAS as HOLIDAY_EXTRAS
+
+logger = logging.getLogger(__name__)
+
+SECRET_KEY = "zankl-plan-secret-change-me"
 
 app = FastAPI(title="Zankl-Plan MVP")
 app.add_middleware(
     SessionMiddleware,
-    secret_key="zankl-plan-secret-change-me"
+    secret_key=SECRET_KEY
 )
 BASE_DIR = Path(__file__).resolve().parent  # src/
 
 ROOT_DIR = BASE_DIR.parent                  # project root
-DB_PATH = BASE_DIR / "zankl.db"
 
 templates = Jinja2Templates(directory=str(ROOT_DIR / "templates"))
 app.mount("/static", StaticFiles(directory=str(ROOT_DIR / "static")), name="static")
 
-# ---------------- DB ----------------
-def get_conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def column_exists(cur, table: str, column: str) -> bool:
-    cur.execute(f"PRAGMA table_info({table})")
-    return any(r[1] == column for r in cur.fetchall())
-
-def init_db():
-    conn = get_conn()
-    cur = conn.cursor()
-
-    # --- YEAR row settings (Anzahl Zeilen pro Bereich) ---
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS year_row_settings(
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          section TEXT NOT NULL UNIQUE,        -- 'eb' | 'res' | 'gg'
-          row_count INTEGER NOT NULL
-        )
-    """)
-
-    # Seed default row settings (nur wenn noch nix drin)
-    cur.execute("SELECT COUNT(*) AS n FROM year_row_settings")
-    if int(cur.fetchone()["n"] or 0) == 0:
-        for sec, cnt in [("eb", 12), ("res", 8), ("gg", 12)]:
-            cur.execute(
-                "INSERT OR IGNORE INTO year_row_settings(section,row_count) VALUES(?,?)",
-                (sec, cnt)
-            )
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS week_plans(
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          year INTEGER,
-          kw INTEGER,
-          standort TEXT,
-          row_count INTEGER DEFAULT 5,
-          four_day_week INTEGER DEFAULT 1,
-          UNIQUE(year, kw, standort)
-        )
-    """)
-
-    if not column_exists(cur, "week_plans", "four_day_week"):
-        cur.execute("ALTER TABLE week_plans ADD COLUMN four_day_week INTEGER DEFAULT 1")
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS week_cells(
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          week_plan_id INTEGER,
-          row_index INTEGER,
-          day_index INTEGER,
-          text TEXT,
-          UNIQUE(week_plan_id, row_index, day_index)
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS employees(
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          name TEXT,
-          standort TEXT
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS global_small_jobs(
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          standort TEXT,
-          row_index INTEGER,
-          text TEXT,
-          UNIQUE(standort, row_index)
-        )
-    """)
-
-    # ---- Users / Login ----
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS users(
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          username TEXT UNIQUE,
-          password_hash TEXT,
-          is_write INTEGER NOT NULL DEFAULT 0,
-          can_view_eb INTEGER NOT NULL DEFAULT 0,
-          can_view_gg INTEGER NOT NULL DEFAULT 0
-        )
-    """)
-
-    # Migration
-    if not column_exists(cur, "users", "is_write"):
-        cur.execute("ALTER TABLE users ADD COLUMN is_write INTEGER NOT NULL DEFAULT 0")
-
-    if not column_exists(cur, "users", "can_view_eb"):
-        cur.execute("ALTER TABLE users ADD COLUMN can_view_eb INTEGER NOT NULL DEFAULT 0")
-
-    if not column_exists(cur, "users", "can_view_gg"):
-        cur.execute("ALTER TABLE users ADD COLUMN can_view_gg INTEGER NOT NULL DEFAULT 0")
-
-    # ---- YEAR PLAN (Jahresplanung) ----
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS year_rows(
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          section TEXT NOT NULL,               -- 'eb' | 'res' | 'gg'
-          row_index INTEGER NOT NULL,
-          name TEXT NOT NULL,
-          UNIQUE(section, row_index)
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS year_jobs(
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          title TEXT NOT NULL,                 -- "Name, Ort"
-          start_date TEXT NOT NULL,            -- 'YYYY-MM-DD'
-          duration_days INTEGER NOT NULL,      -- Arbeitstage
-          height_rows INTEGER NOT NULL,        -- Mitarbeiter/Zeilen-Hoehe
-          section TEXT NOT NULL,               -- 'eb'|'res'|'gg'
-          row_index INTEGER NOT NULL,          -- Startzeile (0-basiert innerhalb section)
-          color TEXT NOT NULL,                 -- 'blue'|'yellow'|'red'|'green'
-          note TEXT
-        )
-    """)
-
-    def migrate_year_jobs_title_not_unique(cur):
-        cur.execute("CREATE TABLE IF NOT EXISTS _migrations (key TEXT PRIMARY KEY)")
-        cur.execute("SELECT 1 FROM _migrations WHERE key='year_jobs_title_not_unique'")
-        if cur.fetchone():
-            return
-
-        cur.execute("""
-          CREATE TABLE IF NOT EXISTS year_jobs_new(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            start_date TEXT NOT NULL,
-            duration_days INTEGER NOT NULL,
-            height_rows INTEGER NOT NULL,
-            section TEXT NOT NULL,
-            row_index INTEGER NOT NULL,
-            color TEXT NOT NULL,
-            note TEXT
-          )
-        """)
-
-        cur.execute("""
-          INSERT INTO year_jobs_new(id,title,start_date,duration_days,height_rows,section,row_index,color,note)
-          SELECT id,title,start_date,duration_days,height_rows,section,row_index,color,note
-          FROM year_jobs
-        """)
-
-        cur.execute("DROP TABLE year_jobs")
-        cur.execute("ALTER TABLE year_jobs_new RENAME TO year_jobs")
-        cur.execute("INSERT INTO _migrations(key) VALUES('year_jobs_title_not_unique')")
-
-    migrate_year_jobs_title_not_unique(cur)
-
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS year_week_overrides(
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          year INTEGER NOT NULL,
-          kw INTEGER NOT NULL,
-          show_friday INTEGER NOT NULL DEFAULT 0,
-          UNIQUE(year, kw)
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS year_holidays(
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          day TEXT NOT NULL UNIQUE,            -- 'YYYY-MM-DD'
-          label TEXT
-        )
-    """)
-
-    # ---- SEED default row names (nur wenn leer) ----
-    def seed_rows(section: str, default_count: int, prefix: str):
-        cur.execute("SELECT COUNT(*) AS n FROM year_rows WHERE section=?", (section,))
-        if int(cur.fetchone()["n"] or 0) == 0:
-            for i in range(default_count):
-                name = f"{prefix} {i+1}"
-                cur.execute(
-                    "INSERT INTO year_rows(section,row_index,name) VALUES(?,?,?)",
-                    (section, i, name)
-                )
-
-    seed_rows("eb", 12, "Team EB")
-    seed_rows("gg", 12, "Team GG")
-    seed_rows("res", 8, "Ressource")
 
-    conn.commit()
-    conn.close()
+STANDORTE = ["engelbrechts", "gross-gerungs"]
 
+scheduler = Scheduler()
 
 
 @app.on_event("startup")
-def _startup():
+async def _startup():
     init_db()
     ensure_admin_user()
+    ensure_year_rows_startup()
+    start_change_feed()
+    journal.start()
+
+    # Fr 11:45: nächste KW vorbereiten, bevor die Viewer um 12:00 umschalten
+    scheduler.weekly("prepare_next_week", 4, 11, 45, prepare_next_week)
+    # Mo–So 05:00: aktuelle Viewer-Woche + Jahresmodell vorwärmen (Montagmorgen-Spitze)
+    scheduler.daily("warm_caches", 5, 0, warm_caches)
+    scheduler.daily("compact_audit", 3, 20, compact_audit)
+    scheduler.daily("db_maintenance", 3, 30, run_maintenance)
+    scheduler.start()
+    scheduler.run_soon("warm_caches", warm_caches)
+
+
+@app.on_event("shutdown")
+async def _shutdown():
+    await scheduler.stop()
+    journal.stop()
+    close_pool()
 
 
 # ---------------- Helpers ----------------
@@ -296,18 +148,11 @@ def ensure_admin_user():
     conn = get_conn()
     cur = conn.cursor()
     try:
-        cur.execute("SELECT id FROM users WHERE username=?", ("admin",))
-        row = cur.fetchone()
+        row = repo.get_user_by_username(cur, "admin")
         if not row:
-            cur.execute(
-                "INSERT INTO users(username, password_hash, is_write, can_view_eb, can_view_gg) VALUES(?,?,?,?,?)",
-                ("admin", hash_password("admin"), 1, 1, 1)
-            )
+            repo.create_user(cur, "admin", hash_password("admin"), 1, 1, 1)
         else:
-            cur.execute(
-                "UPDATE users SET password_hash=?, is_write=1, can_view_eb=1, can_view_gg=1 WHERE username=?",
-                (hash_password("admin"), "admin")
-            )
+            repo.reset_admin(cur, hash_password("admin"))
         conn.commit()
     finally:
         conn.close()
@@ -325,15 +170,7 @@ def fmt_ymd(d: date) -> str:
     return d.strftime("%Y-%m-%d")
 
 def is_holiday(cur, d: date) -> bool:
-    cur.execute("SELECT 1 FROM year_holidays WHERE day=?", (fmt_ymd(d),))
-    return cur.fetchone() is not None
-
-def get_friday_override(cur, year: int, kw: int) -> int | None:
-    cur.execute("SELECT show_friday FROM year_week_overrides WHERE year=? AND kw=?", (year, kw))
-    r = cur.fetchone()
-    if not r:
-        return None
-    return int(r["show_friday"])
+    return repo.is_holiday(cur, fmt_ymd(d))
 
 def should_show_friday(cur, year: int, kw: int) -> bool:
     """
@@ -342,13 +179,11 @@ def should_show_friday(cur, year: int, kw: int) -> bool:
       - Winter (KW 43..13): Fr AN
     Override pro KW in year_week_overrides hat Vorrang.
     """
-    ov = get_friday_override(cur, year, kw)
+    ov = repo.get_friday_override(cur, year, kw)
     if ov is not None:
         return bool(ov)
 
-    if 14 <= int(kw) <= 42:
-        return False
-    return True
+    return default_show_friday(kw)
 
 def is_workday(cur, d: date) -> bool:
     # nur Mo–Fr, Fr evtl. ausgeblendet
@@ -452,6 +287,18 @@ def get_current_user(request: Request):
     return request.session.get("user")
 
 
+def readable_standorte(user: dict) -> set[str] | None:
+    """None = alle Standorte (Schreibrechte), sonst die freigegebenen Viewer-Standorte."""
+    if user.get("is_write"):
+        return None
+    allowed = set()
+    if user.get("can_view_eb"):
+        allowed.add("engelbrechts")
+    if user.get("can_view_gg"):
+        allowed.add("gross-gerungs")
+    return allowed
+
+
 def require_write(request: Request):
     u = request.session.get("user")
     if not u:
@@ -460,16 +307,115 @@ def require_write(request: Request):
         return RedirectResponse("/view/week", status_code=303)
     return None
 
+# ---------------- Optimistic Locking ----------------
+def expected_version(data: dict) -> int | None:
+    """Vom Client erwartete Version (None = nicht mitgeschickt, dann ohne Prüfung)."""
+    v = data.get("version")
+    return None if v is None or v == "" else int(v)
+
+def version_conflict(current: dict | None, **extra):
+    """409 mit aktuellem Stand (None = gelöscht), damit der Client zusammenführen kann."""
+    return JSONResponse({"ok": False, "error": "version conflict", "current": current, **extra}, status_code=409)
+
+def current_job(cur, job_id: int) -> dict | None:
+    r = repo.get_year_job(cur, job_id)
+    return dict(r) if r else None
+
+def current_cell(cur, plan_id: int, row: int, day: int) -> dict:
+    return repo.get_week_cell(cur, plan_id, row, day) or {"text": "", "version": 0}
+
 # ---------------- YEAR – Jahresplanung ----------------
-@app.get("/year", response_class=HTMLResponse)
-def year_page(request: Request, year: int | None = Query(None)):
-    guard = require_write(request)
-    if guard:
-        return guard
+# Fertige Jahresmodelle (Tage, Zeilen, Jobs mit Spalten, Konflikte) pro Jahr.
+# Jede Schreib-API der Jahresplanung ruft invalidate_year_models() auf.
+year_models = Cache(max_entries=4)
 
-    year_sel = int(year) if year else date.today().year
+# Gleichzeitige identische Builds (Jahresmodell, Wochen-Kontext, Viewer-Render)
+# werden nur einmal gerechnet.
+builds = SingleFlight()
+
+def load_title_scores():
+    conn = get_ro_conn(); cur = conn.cursor()
+    try:
+        return repo.list_title_scores(cur, date.today().isoformat())
+    finally:
+        conn.close()
+
+# Autocomplete für Job-Titel (alle Jahre), wird mit den Jahresmodellen invalidiert
+title_index = TitleIndex(load_title_scores)
+
+# Auslastung pro Jahr (/api/year/utilization)
+year_utilization = Cache(max_entries=4)
+
+# Jahresplanung -> Wochenraster, Key = (standort, year, kw)
+week_projections = Cache(max_entries=64)
+
+# iCalendar-Feeds, Key = ("row", row_id) / ("standort", standort)
+ics_feeds = Cache(max_entries=128)
+
+def clear_year_caches():
+    year_models.clear()
+    year_utilization.clear()
+    week_projections.clear()
+    ics_feeds.clear()
+    title_index.invalidate()
+    # Viewer-Seiten zeigen die Projektion aus der Jahresplanung mit
+    view_snapshots.clear()
+
+def invalidate_year_models():
+    clear_year_caches()
+    sync_caches()
+
+def get_year_model(year_sel: int) -> dict:
+    sync_caches()
+    model = year_models.get(year_sel)
+    if model is not None:
+        return model
+
+    gen = year_models.generation(year_sel)
+
+    def build():
+        model = build_year_model(year_sel)
+        year_models.put(year_sel, model, gen)
+        return model
+
+    return builds.do(("year", year_sel, gen), build)
+
+def load_row_counts(cur) -> dict[str, int]:
+    row_counts = repo.get_row_counts(cur)
+    for sec, default in [("eb", 12), ("res", 8), ("gg", 12)]:
+        row_counts.setdefault(sec, default)
+    return row_counts
+
+# Standardnamen der Zeilen pro Bereich (year_rows)
+YEAR_ROW_PREFIX = {"eb": "Team EB", "res": "Ressource", "gg": "Team GG"}
+
+def materialize_year_rows(cur, row_counts: dict[str, int]):
+    """year_rows bis row_count anlegen – nur beim Start und wenn set-row-counts die Anzahl ändert."""
+    for sec, prefix in YEAR_ROW_PREFIX.items():
+        repo.ensure_year_rows(cur, sec, row_counts[sec], prefix)
+
+def pad_year_rows(rows_all: list[dict], row_counts: dict[str, int]) -> dict[str, list[dict]]:
+    """Zeilen pro Bereich bis row_count; fehlende (noch nicht angelegte) nur im Speicher ergänzen."""
+    have = {(r["section"], int(r["row_index"])): r for r in rows_all}
+    return {
+        sec: [
+            have.get((sec, idx)) or {"id": None, "section": sec, "row_index": idx, "name": f"{prefix} {idx+1}"}
+            for idx in range(int(row_counts[sec]))
+        ]
+        for sec, prefix in YEAR_ROW_PREFIX.items()
+    }
 
+def ensure_year_rows_startup():
     conn = get_conn(); cur = conn.cursor()
+    try:
+        materialize_year_rows(cur, load_row_counts(cur))
+        conn.commit()
+    finally:
+        conn.close()
+
+def build_year_model(year_sel: int) -> dict:
+    # reiner Lesepfad: keine Schreibsperre, blockiert weder andere Leser noch Schreiber
+    conn = get_ro_conn(); cur = conn.cursor()
     try:
         days = build_year_days_for_year(cur, year_sel)
 
@@ -500,39 +446,13 @@ def year_page(request: Request, year: int | None = Query(None)):
             })
 
         # --- row_counts laden ---
-        cur.execute("SELECT section, row_count FROM year_row_settings")
-        row_counts = {r["section"]: int(r["row_count"]) for r in cur.fetchall()}
-        for sec, default in [("eb", 12), ("res", 8), ("gg", 12)]:
-            row_counts.setdefault(sec, default)
-
-        # --- ensure_rows: year_rows bis row_count auffüllen ---
-        def ensure_rows(section: str, want: int, prefix: str):
-            cur.execute("SELECT COUNT(*) AS n FROM year_rows WHERE section=?", (section,))
-            have = int(cur.fetchone()["n"] or 0)
-            for idx in range(have, int(want)):
-                cur.execute(
-                    "INSERT OR IGNORE INTO year_rows(section,row_index,name) VALUES(?,?,?)",
-                    (section, idx, f"{prefix} {idx+1}")
-                )
-
-        ensure_rows("eb", row_counts["eb"], "Team EB")
-        ensure_rows("res", row_counts["res"], "Ressource")
-        ensure_rows("gg", row_counts["gg"], "Team GG")
-        conn.commit()
+        row_counts = load_row_counts(cur)
 
-        # rows neu laden (wichtig!)
-        cur.execute("SELECT id, section, row_index, name FROM year_rows ORDER BY section, row_index")
-        rows_all = [dict(r) for r in cur.fetchall()]
-
-        rows = {"eb": [], "res": [], "gg": []}
-        for r in rows_all:
-            sec = r["section"]
-            if sec in rows and int(r["row_index"]) < int(row_counts[sec]):
-                rows[sec].append(r)
+        # year_rows werden bei set-row-counts angelegt; Lücken hier nur im Speicher auffüllen
+        rows = pad_year_rows(repo.list_year_rows(cur), row_counts)
 
         # jobs
-        cur.execute("SELECT * FROM year_jobs ORDER BY start_date")
-        jobs_db = [dict(r) for r in cur.fetchall()]
+        jobs_db = repo.list_year_jobs(cur)
 
         # map day -> col index
         day_to_col = {d["ymd"]: i for i, d in enumerate(days)}
@@ -604,24 +524,35 @@ def year_page(request: Request, year: int | None = Query(None)):
 
 
 
-        return templates.TemplateResponse(
-            "year.html",
-            {
-                "request": request,
-                "year": year_sel,
-                "days": days,
-                "week_groups": week_groups,
-                "rows": rows,
-                "jobs": jobs,
-                "conflict_cells": conflict_cells,
-                "row_counts": row_counts,
-            }
-        )
+        return {
+            "year": year_sel,
+            "days": days,
+            "week_groups": week_groups,
+            "rows": rows,
+            "jobs": jobs,
+            "conflict_cells": conflict_cells,
+            "row_counts": row_counts,
+        }
 
     finally:
         conn.close()
 
 
+@app.get("/year", response_class=HTMLResponse)
+def year_page(request: Request, year: int | None = Query(None)):
+    guard = require_write(request)
+    if guard:
+        return guard
+
+    year_sel = int(year) if year else date.today().year
+    model = get_year_model(year_sel)
+
+    return templates.TemplateResponse(
+        "year.html",
+        {"request": request, **model}
+    )
+
+
 
 @app.post("/api/year/toggle-holiday")
 async def api_year_toggle_holiday(request: Request, data: dict = Body(...)):
@@ -637,18 +568,60 @@ async def api_year_toggle_holiday(request: Request, data: dict = Body(...)):
 
     conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("SELECT id FROM year_holidays WHERE day=?", (day,))
-        r = cur.fetchone()
-        if r:
-            cur.execute("DELETE FROM year_holidays WHERE day=?", (day,))
-            conn.commit()
-            return {"ok": True, "holiday": False}
-        else:
-            cur.execute("INSERT INTO year_holidays(day,label) VALUES(?,?)", (day, label or None))
-            conn.commit()
-            return {"ok": True, "holiday": True}
+        before = audit_state(cur, "year_holidays", (day,))
+        holiday = repo.toggle_holiday(cur, day, label or None)
+        conn.commit()
+        group = audit_group(request)
+        group.add("year_holidays", (day,), before, {"label": label or None} if holiday else None)
+        journal.submit(group)
+        invalidate_year_models()
+        return {"ok": True, "holiday": holiday}
+    finally:
+        conn.close()
+
+
+@app.post("/api/year/seed-holidays")
+def api_year_seed_holidays(request: Request, data: dict = Body(...)):
+    """
+    Gesetzliche Feiertage (AT) eines Jahres in einem Rutsch eintragen.
+    extras: ["leopold", "heiligabend", "silvester"] (optional)
+    dry_run: nur berechnen, nichts speichern.
+    Vorhandene Feiertage bleiben, ihr Label wird übernommen.
+    """
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+
+    try:
+        year = int(data.get("year") or date.today().year)
+        extras = list(data.get("extras") or [])
+    except (TypeError, ValueError):
+        return JSONResponse({"ok": False, "error": "invalid year/extras"}, status_code=400)
+    if not 1900 <= year <= 2200:
+        return JSONResponse({"ok": False, "error": "year out of range"}, status_code=400)
+    unknown = [e for e in extras if e not in HOLIDAY_EXTRAS]
+    if unknown:
+        return JSONResponse({"ok": False, "error": f"unknown extras: {', '.join(map(str, unknown))}"}, status_code=400)
+
+    days = [(fmt_ymd(d), label) for d, label in austrian_holidays(year, extras)]
+    result = {"ok": True, "year": year, "dry_run": bool(data.get("dry_run")),
+              "holidays": [{"day": d, "label": label} for d, label in days], "added": 0}
+
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        existing = set(repo.list_holidays(cur, f"{year}-01-01", f"{year}-12-31"))
+        result["added"] = sum(1 for d, _ in days if d not in existing)
+        if result["dry_run"]:
+            return result
+        group = audit_group(request)
+        journal_write(cur, group, "year_holidays", [(d,) for d, _ in days],
+                      lambda: repo.upsert_holidays(cur, days))
+        conn.commit()
     finally:
         conn.close()
+    journal.submit(group)
+    invalidate_year_models()
+    return result
 
 
 @app.post("/api/year/set-friday")
@@ -663,15 +636,88 @@ async def api_year_set_friday(request: Request, data: dict = Body(...)):
 
     conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("""
-            INSERT INTO year_week_overrides(year,kw,show_friday)
-            VALUES(?,?,?)
-            ON CONFLICT(year,kw) DO UPDATE SET show_friday=excluded.show_friday
-        """, (year, kw, show))
+        before = audit_state(cur, "year_week_overrides", (year, kw))
+        repo.set_friday_override(cur, year, kw, show)
         conn.commit()
+        group = audit_group(request)
+        group.add("year_week_overrides", (year, kw), before, {"show_friday": show})
+        journal.submit(group)
+        invalidate_year_models()
         return {"ok": True}
     finally:
         conn.close()
+@app.post("/api/year/calendar-replan")
+async def api_year_calendar_replan(request: Request, data: dict = Body(...)):
+    """
+    Feiertag umschalten bzw. Freitag setzen – mit Vorschau der Folgen für Jobs.
+    Body: {"day": "YYYY-MM-DD"}                         -> Feiertag umschalten
+          {"year": 2026, "kw": 20, "show_friday": true} -> Freitag-Override
+          "shift_following": Folgejobs auf den betroffenen Zeilen mitverschieben
+          "commit": false = nur Vorschau, true = Änderung + Verschiebung in einer Transaktion
+    """
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+
+    commit = bool(data.get("commit"))
+    shift_following = bool(data.get("shift_following"))
+    try:
+        if data.get("day"):
+            day = parse_ymd(data["day"].strip())
+            friday = None
+        else:
+            year, kw = int(data.get("year")), int(data.get("kw"))
+            day = date.fromisocalendar(year, kw, 5)
+            friday = (year, kw, 1 if bool(data.get("show_friday")) else 0)
+    except (TypeError, ValueError):
+        return JSONResponse({"ok": False, "error": "missing/invalid day or year/kw"}, status_code=400)
+
+    conn = get_conn() if commit else get_ro_conn()
+    cur = conn.cursor()
+    try:
+        if commit:
+            cur.execute("BEGIN IMMEDIATE")
+        jobs = repo.list_year_jobs(cur)
+        holidays = set(repo.list_holidays(cur, "0000-01-01", "9999-12-31"))
+        overrides = repo.list_friday_overrides(cur, 0, 9999)
+
+        new_holidays, new_overrides = set(holidays), dict(overrides)
+        if friday is None:
+            new_holidays ^= {fmt_ymd(day)}
+        else:
+            new_overrides[(friday[0], friday[1])] = friday[2]
+
+        result = planner.calendar_replan(day, holidays, overrides, new_holidays, new_overrides,
+                                         jobs, shift_following)
+
+        if commit:
+            group = audit_group(request)
+            if friday is None:
+                key = (fmt_ymd(day),)
+                before = audit_state(cur, "year_holidays", key)
+                label = (data.get("label") or "").strip() or None
+                now_holiday = repo.toggle_holiday(cur, key[0], label)
+                group.add("year_holidays", key, before, {"label": label} if now_holiday else None)
+            else:
+                key = (friday[0], friday[1])
+                group.add("year_week_overrides", key, audit_state(cur, "year_week_overrides", key),
+                          {"show_friday": friday[2]})
+                repo.set_friday_override(cur, *friday)
+            repo.set_year_job_starts(cur, [(s["start_date_after"], s["id"]) for s in result["shifts"]])
+            for s in result["shifts"]:
+                group.add("year_jobs", (s["id"],), {"start_date": s["start_date_before"]},
+                          {"start_date": s["start_date_after"]})
+            conn.commit()
+            journal.submit(group)
+            invalidate_year_models()
+
+        return {"ok": True, "committed": commit, **result}
+    except Exception:
+        return JSONResponse({"ok": False, "error": traceback.format_exc()}, status_code=500)
+    finally:
+        conn.close()
+
+
 @app.post("/api/year/update-row-name")
 async def api_year_update_row_name(request: Request, data: dict = Body(...)):
     guard = require_write(request)
@@ -680,14 +726,20 @@ async def api_year_update_row_name(request: Request, data: dict = Body(...)):
 
     row_id = int(data.get("row_id") or 0)
     name = (data.get("name") or "").strip()
+    section = (data.get("section") or "").strip()
+    row_index = data.get("row_index")
 
-    if not row_id or not name:
+    if not name or not (row_id or (section in YEAR_ROW_PREFIX and row_index is not None)):
         return JSONResponse({"ok": False, "error": "missing row_id/name"}, status_code=400)
 
     conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("SELECT id, section FROM year_rows WHERE id=?", (row_id,))
-        r = cur.fetchone()
+        if row_id:
+            r = repo.get_year_row(cur, row_id)
+        else:
+            # nur im Speicher ergänzte Zeile (noch ohne id) -> jetzt anlegen
+            r = repo.get_or_create_year_row(cur, section, int(row_index), f"{YEAR_ROW_PREFIX[section]} {int(row_index)+1}")
+            row_id = r["id"]
         if not r:
             return JSONResponse({"ok": False, "error": "row not found"}, status_code=404)
 
@@ -695,8 +747,12 @@ async def api_year_update_row_name(request: Request, data: dict = Body(...)):
         if (r["section"] or "") != "res":
             return JSONResponse({"ok": False, "error": "only resources editable"}, status_code=400)
 
-        cur.execute("UPDATE year_rows SET name=? WHERE id=?", (name, row_id))
+        repo.rename_year_row(cur, row_id, name)
         conn.commit()
+        group = audit_group(request)
+        group.add("year_rows", (row_id,), {"name": r["name"]}, {"name": name})
+        journal.submit(group)
+        invalidate_year_models()
         return {"ok": True}
     finally:
         conn.close()
@@ -720,14 +776,18 @@ async def api_year_create_job(request: Request, data: dict = Body(...)):
     if not title or not start_date:
         return JSONResponse({"ok": False, "error": "missing title/start_date"}, status_code=400)
 
+    group = audit_group(request)
     conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("""
-            INSERT INTO year_jobs(title,start_date,duration_days,height_rows,section,row_index,color,note)
-            VALUES(?,?,?,?,?,?,?,?)
-        """, (title, start_date, duration_days, height_rows, section, row_index, color, note or None))
+        job_id = repo.insert_year_job(cur, title, start_date, duration_days, height_rows, section, row_index, color, note or None)
         conn.commit()
-        return {"ok": True}
+        group.add("year_jobs", (job_id,), None, {
+            "title": title, "start_date": start_date, "duration_days": duration_days, "height_rows": height_rows,
+            "section": section, "row_index": row_index, "color": color, "note": note or None,
+        })
+        journal.submit(group)
+        invalidate_year_models()
+        return {"ok": True, "id": job_id, "version": 1}
     except sqlite3.IntegrityError:
         return JSONResponse({"ok": False, "error": "insert failed (db constraint)"}, status_code=400)
     finally:
@@ -775,22 +835,20 @@ async def api_year_update_job(request: Request, data: dict = Body(...)):
         except Exception:
             return JSONResponse({"ok": False, "error": "invalid start_date"}, status_code=400)
 
+    try:
+        expected = expected_version(data)
+    except (TypeError, ValueError):
+        return JSONResponse({"ok": False, "error": "invalid version"}, status_code=400)
+
     conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("SELECT * FROM year_jobs WHERE id=?", (job_id,))
-        old = cur.fetchone()
+        old = repo.get_year_job(cur, job_id)
         if not old:
-            return JSONResponse({"ok": False, "error": "job not found"}, status_code=404)
-
-        # Falls nicht mitgesendet, alte Werte behalten
-        if not start_date:
-            start_date = old["start_date"]
-        if not section:
-            section = old["section"]
-        if row_index is None:
-            row_index = int(old["row_index"])
+            return version_conflict(None) if expected is not None else \
+                JSONResponse({"ok": False, "error": "job not found"}, status_code=404)
+        if expected is not None and expected != old["version"]:
+            return version_conflict(dict(old))
 
-       
         # Falls nicht mitgesendet, alte Werte behalten
         if not start_date:
             start_date = old["start_date"]
@@ -799,37 +857,22 @@ async def api_year_update_job(request: Request, data: dict = Body(...)):
         if row_index is None:
             row_index = int(old["row_index"])
 
-        sets = [
-            "title=?",
-            "start_date=?",
-            "duration_days=?",
-            "height_rows=?",
-            "section=?",
-            "row_index=?",
-            "color=?",
-            "note=?",
-        ]
-        vals = [
-            title,
-            start_date,
-            duration_days,
-            height_rows,
-            section,
-            int(row_index),
-            color,
-            note or None,
-        ]
-
-        vals.append(job_id)
-
-        cur.execute(
-            f"UPDATE year_jobs SET {', '.join(sets)} WHERE id=?",
-            tuple(vals)
-        )
-
-
+        # bedingt auf die gelesene Version: auch ohne Client-Version kein Überschreiben dazwischen
+        if not repo.update_year_job(
+            cur, job_id, title, start_date, duration_days, height_rows,
+            section, int(row_index), color, note or None, expected_version=old["version"]
+        ):
+            conn.rollback()
+            return version_conflict(current_job(cur, job_id))
         conn.commit()
-        return {"ok": True}
+        group = audit_group(request)
+        group.add("year_jobs", (job_id,), job_state(old), {
+            "title": title, "start_date": start_date, "duration_days": duration_days, "height_rows": height_rows,
+            "section": section, "row_index": int(row_index), "color": color, "note": note or None,
+        })
+        journal.submit(group)
+        invalidate_year_models()
+        return {"ok": True, "version": old["version"] + 1}
    
     except Exception:
         return JSONResponse({"ok": False, "error": traceback.format_exc()}, status_code=500)
@@ -848,10 +891,25 @@ async def api_year_delete_job(request: Request, data: dict = Body(...)):
     if not job_id:
         return JSONResponse({"ok": False, "error": "missing id"}, status_code=400)
 
+    try:
+        expected = expected_version(data)
+    except (TypeError, ValueError):
+        return JSONResponse({"ok": False, "error": "invalid version"}, status_code=400)
+
     conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("DELETE FROM year_jobs WHERE id=?", (job_id,))
+        old = repo.get_year_job(cur, job_id)
+        if expected is not None and (not old or expected != old["version"]):
+            return version_conflict(dict(old) if old else None)
+        if old and not repo.delete_year_job(cur, job_id, expected_version=old["version"]):
+            conn.rollback()
+            return version_conflict(current_job(cur, job_id))
         conn.commit()
+        if old:
+            group = audit_group(request)
+            group.add("year_jobs", (job_id,), job_state(old), None)
+            journal.submit(group)
+        invalidate_year_models()
         return {"ok": True}
     finally:
         conn.close()
@@ -868,15 +926,222 @@ async def api_year_update_job_color(request: Request, data: dict = Body(...)):
     if not job_id or color not in allowed:
         return JSONResponse({"ok": False, "error": "missing/invalid id/color"}, status_code=400)
 
+    try:
+        expected = expected_version(data)
+    except (TypeError, ValueError):
+        return JSONResponse({"ok": False, "error": "invalid version"}, status_code=400)
+
     conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("SELECT id FROM year_jobs WHERE id=?", (job_id,))
-        if not cur.fetchone():
-            return JSONResponse({"ok": False, "error": "job not found"}, status_code=404)
+        old = repo.get_year_job(cur, job_id)
+        if not old:
+            return version_conflict(None) if expected is not None else \
+                JSONResponse({"ok": False, "error": "job not found"}, status_code=404)
+        if expected is not None and expected != old["version"]:
+            return version_conflict(dict(old))
+
+        if not repo.set_year_job_color(cur, job_id, color, expected_version=old["version"]):
+            conn.rollback()
+            return version_conflict(current_job(cur, job_id))
+        conn.commit()
+        group = audit_group(request)
+        group.add("year_jobs", (job_id,), {"color": old["color"]}, {"color": color})
+        journal.submit(group)
+        invalidate_year_models()
+        return {"ok": True, "version": old["version"] + 1}
+    finally:
+        conn.close()
 
-        cur.execute("UPDATE year_jobs SET color=? WHERE id=?", (color, job_id))
+
+@app.post("/api/year/jobs/batch")
+async def api_year_jobs_batch(request: Request, data: dict = Body(...)):
+    """
+    Mehrere Job-Operationen atomar in einer Transaktion.
+    Body: {"ops": [
+        {"op": "move",    "id": 1, "start_date"|"shift_workdays", "section", "row_index"|"row_delta"},
+        {"op": "copy",    "id": 1, ... wie move ...},
+        {"op": "recolor", "id": 1, "color": "red"},
+        {"op": "delete",  "id": 1}
+    ]}
+    Optional pro Operation "version": erwartete Version des Jobs (sonst 409 mit aktuellem Stand).
+    Fehler in einer Operation -> nichts wird gespeichert (index der Operation im Fehler).
+    Rückgabe: neu berechnete Spannen + Konflikte der betroffenen Jobs.
+    """
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+
+    ops = data.get("ops") or []
+    if not isinstance(ops, list) or not ops or len(ops) > 1000:
+        return JSONResponse({"ok": False, "error": "ops must be a non-empty list (max 1000)"}, status_code=400)
+
+    allowed_colors = {"blue","yellow","red","green","white"}
+    group = audit_group(request)
+
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        jobs = {j["id"]: j for j in repo.list_year_jobs(cur)}
+        starts = [date.fromisoformat(j["start_date"]) for j in jobs.values()] or [date.today()]
+        cal = WorkdayCalendar.load(cur, min(starts) - timedelta(days=400), max(starts) + timedelta(days=800))
+        row_counts = load_row_counts(cur)
+
+        touched, deleted, results = set(), [], []
+        for i, op in enumerate(ops):
+            try:
+                if not isinstance(op, dict) or not isinstance(op.get("op"), str):
+                    raise ValueError("op must be an object with a string 'op'")
+                kind = op["op"].strip()
+                job_id = int(op.get("id") or 0)
+                job = jobs.get(job_id)
+                expected = expected_version(op)
+                if expected is not None and (job is None or expected != job["version"]):
+                    conn.rollback()
+                    return version_conflict(current_job(cur, job_id), index=i)
+                if job is None:
+                    raise ValueError("job not found")
+                if kind in ("move", "copy"):
+                    start_date, section, row_index = planner.batch_target(job, op, cal, row_counts)
+                    if kind == "move":
+                        repo.update_year_job(
+                            cur, job["id"], job["title"], start_date, job["duration_days"], job["height_rows"],
+                            section, row_index, job["color"], job["note"]
+                        )
+                        before = job_state(job)
+                        job.update(start_date=start_date, section=section, row_index=row_index,
+                                   version=job["version"] + 1)
+                        group.add("year_jobs", (job["id"],), before, job_state(job))
+                        touched.add(job["id"])
+                        results.append({"index": i, "op": kind, "id": job["id"]})
+                    else:
+                        new_id = repo.insert_year_job(
+                            cur, job["title"], start_date, job["duration_days"], job["height_rows"],
+                            section, row_index, job["color"], job["note"]
+                        )
+                        jobs[new_id] = {**job, "id": new_id, "start_date": start_date,
+                                        "section": section, "row_index": row_index, "version": 1}
+                        group.add("year_jobs", (new_id,), None, job_state(jobs[new_id]))
+                        touched.add(new_id)
+                        results.append({"index": i, "op": kind, "source_id": job["id"], "id": new_id})
+                elif kind == "recolor":
+                    color = op.get("color")
+                    if not isinstance(color, str) or color.strip() not in allowed_colors:
+                        raise ValueError("invalid color")
+                    color = color.strip()
+                    repo.set_year_job_color(cur, job["id"], color)
+                    group.add("year_jobs", (job["id"],), {"color": job["color"]}, {"color": color})
+                    job.update(color=color, version=job["version"] + 1)
+                    touched.add(job["id"])
+                    results.append({"index": i, "op": kind, "id": job["id"]})
+                elif kind == "delete":
+                    repo.delete_year_job(cur, job["id"])
+                    group.add("year_jobs", (job["id"],), job_state(job), None)
+                    del jobs[job["id"]]
+                    touched.discard(job["id"])
+                    deleted.append(job["id"])
+                    results.append({"index": i, "op": kind, "id": job["id"]})
+                else:
+                    raise ValueError("unknown op")
+            except (ValueError, TypeError) as e:
+                conn.rollback()
+                return JSONResponse({"ok": False, "index": i, "error": str(e)}, status_code=400)
+
+        # Kalender erweitern, falls Jobs aus dem geladenen Bereich verschoben wurden
+        starts = [date.fromisoformat(j["start_date"]) for j in jobs.values()]
+        if starts and (min(starts) < cal.start or max(starts) + timedelta(days=400) > cal.end):
+            cal = WorkdayCalendar.load(cur, min(starts), max(starts) + timedelta(days=800))
         conn.commit()
-        return {"ok": True}
+        journal.submit(group)
+        invalidate_year_models()
+
+        return {
+            "ok": True,
+            "results": results,
+            "jobs": planner.spans_and_conflicts(cal, list(jobs.values()), touched),
+            "deleted": deleted,
+        }
+    except Exception:
+        return JSONResponse({"ok": False, "error": traceback.format_exc()}, status_code=500)
+    finally:
+        conn.close()
+
+
+@app.post("/api/year/rollover")
+async def api_year_rollover(request: Request, data: dict = Body(...)):
+    """
+    Jahresplanung als Vorlage fürs Folgejahr übernehmen.
+    Body: {"from_year", "to_year", "job_ids": [...] (optional, sonst alle Jobs des Jahres),
+           "include_overrides": true, "overwrite_overrides": false, "commit": false}
+    Jahre sind ISO-Jahre: Jobs landen in derselben ISO-KW am selben Wochentag. Zeilen-Namen und
+    -Anzahl gelten jahresübergreifend und müssen nicht kopiert werden.
+    Schon vorhandene Kopien (gleicher Titel/Bereich/Zeile/Start) werden übersprungen -> wiederholbar.
+    Rückgabe: neue Jobs mit Konflikten (Vorschau bzw. nach dem Speichern), skipped = source_ids.
+    """
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+
+    try:
+        from_year, to_year = int(data.get("from_year")), int(data.get("to_year"))
+        job_ids = {int(i) for i in data["job_ids"]} if data.get("job_ids") is not None else None
+    except (TypeError, ValueError):
+        return JSONResponse({"ok": False, "error": "missing/invalid from_year/to_year/job_ids"}, status_code=400)
+    if from_year == to_year:
+        return JSONResponse({"ok": False, "error": "from_year == to_year"}, status_code=400)
+    include_overrides = bool(data.get("include_overrides", True))
+    overwrite_overrides = bool(data.get("overwrite_overrides"))
+    commit = bool(data.get("commit"))
+
+    conn = get_conn() if commit else get_ro_conn()
+    cur = conn.cursor()
+    try:
+        if commit:
+            cur.execute("BEGIN IMMEDIATE")
+        existing = repo.list_year_jobs(cur)
+        new_jobs, skipped = planner.rollover_jobs(existing, from_year, to_year, job_ids)
+
+        # Kalender des Zieljahres inkl. übernommener Freitag-Overrides
+        overrides = repo.list_friday_overrides(cur, 0, 9999)
+        if include_overrides:
+            max_kw = planner.iso_weeks_in_year(to_year)
+            for (y, kw), show in list(overrides.items()):
+                if y == from_year and kw <= max_kw and (overwrite_overrides or (to_year, kw) not in overrides):
+                    overrides[(to_year, kw)] = show
+        starts = [parse_ymd(j["start_date"]) for j in existing + new_jobs] or [date(to_year, 1, 1)]
+        cal_end = max(max(starts), date(to_year, 12, 31)) + timedelta(days=800)
+        holidays = set(repo.list_holidays(cur, fmt_ymd(min(starts)), fmt_ymd(cal_end)))
+        cal = WorkdayCalendar(min(starts), cal_end, holidays, overrides)
+
+        if commit:
+            group = audit_group(request)
+            if include_overrides:
+                max_kw = planner.iso_weeks_in_year(to_year)
+                keys = [(to_year, kw) for (y, kw) in overrides if y == from_year and kw <= max_kw]
+                journal_write(cur, group, "year_week_overrides", keys,
+                              lambda: repo.copy_friday_overrides(cur, from_year, to_year, max_kw, overwrite_overrides))
+            for j in new_jobs:
+                j["id"] = repo.insert_year_job(
+                    cur, j["title"], j["start_date"], j["duration_days"], j["height_rows"],
+                    j["section"], j["row_index"], j["color"], j["note"]
+                )
+                group.add("year_jobs", (j["id"],), None, job_state(j))
+            conn.commit()
+            journal.submit(group)
+            invalidate_year_models()
+
+        report = planner.spans_and_conflicts(cal, existing + new_jobs, {j["id"] for j in new_jobs})
+        source_ids = {j["id"]: j["source_id"] for j in new_jobs}
+        for r in report:
+            r["source_id"] = source_ids[r["id"]]
+        return {
+            "ok": True,
+            "committed": commit,
+            "jobs": report,
+            "conflicts": sum(1 for r in report if r["conflict"]),
+            "skipped": skipped,
+        }
+    except Exception:
+        return JSONResponse({"ok": False, "error": traceback.format_exc()}, status_code=500)
     finally:
         conn.close()
 
@@ -903,77 +1168,267 @@ async def api_year_set_row_counts(request: Request, data: dict = Body(...)):
     conn = get_conn(); cur = conn.cursor()
     try:
         for sec, val in [("eb", eb), ("res", res), ("gg", gg)]:
-            cur.execute("""
-                INSERT INTO year_row_settings(section,row_count)
-                VALUES(?,?)
-                ON CONFLICT(section) DO UPDATE SET row_count=excluded.row_count
-            """, (sec, val))
+            repo.set_row_count(cur, sec, val)
+        materialize_year_rows(cur, {"eb": eb, "res": res, "gg": gg})
         conn.commit()
+        invalidate_year_models()
         return {"ok": True}
     except Exception:
         return JSONResponse({"ok": False, "error": traceback.format_exc()}, status_code=500)
     finally:
         conn.close()
 @app.get("/api/year/titles")
-def api_year_titles(request: Request, year: int = Query(...)):
+def api_year_titles(request: Request, year: int | None = Query(None),
+                    q: str | None = Query(None), limit: int = Query(10)):
+    """
+    q gesetzt: Autocomplete über alle Jahre (Präfix auf Wortanfänge),
+               sortiert nach Häufigkeit/Aktualität, max. limit Titel.
+    sonst:     alle Titel eines Jahres (bisheriges Verhalten).
+    """
     guard = require_write(request)
     if guard:
         return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
 
+    if q is not None:
+        sync_caches()
+        limit = max(1, min(int(limit), 50))
+        return {"ok": True, "titles": title_index.complete(q, limit)}
+
+    if year is None:
+        return JSONResponse({"ok": False, "error": "missing year or q"}, status_code=400)
+
     y1 = f"{int(year)}-01-01"
     y2 = f"{int(year)}-12-31"
 
-    conn = get_conn(); cur = conn.cursor()
+    conn = get_ro_conn(); cur = conn.cursor()
     try:
-        cur.execute("""
-            SELECT DISTINCT title
-            FROM year_jobs
-            WHERE start_date BETWEEN ? AND ?
-            AND title IS NOT NULL
-            AND TRIM(title) != ''
-            ORDER BY title COLLATE NOCASE
-        """, (y1, y2))
-        titles = [r["title"] for r in cur.fetchall()]
+        titles = repo.list_year_titles(cur, y1, y2)
         return {"ok": True, "titles": titles}
     finally:
         conn.close()
 
 
+def job_lookback(cur) -> timedelta:
+    """
+    Wie weit vor einem Zeitraum ein Job starten kann, der noch hineinreicht:
+    max. Dauer in Arbeitstagen, großzügig in Kalendertage umgerechnet.
+    """
+    return timedelta(days=repo.max_year_job_duration(cur) * 7 // 3 + 28)
+
+def list_jobs_reaching(cur, first_day: date, last_day: date) -> list[dict]:
+    """Jobs aller Sections, die in first_day..last_day liegen können (Range-Scan je Section)."""
+    date_from = fmt_ymd(first_day - job_lookback(cur))
+    return [j for sec in SECTIONS
+            for j in repo.list_year_jobs_starting_between(cur, sec, date_from, fmt_ymd(last_day))]
+
+@app.get("/api/year/utilization")
+def api_year_utilization(request: Request, year: int = Query(...)):
+    """
+    Auslastung pro KW und Section (eb/res/gg):
+      booked = belegte Team-Tage, capacity = Zeilen x Arbeitstage,
+      crews = max. gleichzeitig belegte Teams, conflicts = doppelt belegte Zellen.
+    """
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+
+    sync_caches()
+    year = int(year)
+    data = year_utilization.get(year)
+    if data is None:
+        gen = year_utilization.generation(year)
+
+        def build():
+            conn = get_ro_conn(); cur = conn.cursor()
+            try:
+                row_counts = load_row_counts(cur)
+                jobs = list_jobs_reaching(cur, date(year, 1, 1), date(year, 12, 31))
+                occ = Occupancy.for_year(cur, year, row_counts, jobs)
+                result = {"year": year, "totals": occ.totals(), "weeks": occ.weekly()}
+            finally:
+                conn.close()
+            year_utilization.put(year, result, gen)
+            return result
+
+        data = builds.do(("utilization", year, gen), build)
+
+    return {"ok": True, **data}
+
+
+@app.get("/api/year/free-slots")
+def api_year_free_slots(
+    request: Request,
+    section: str = Query(...),
+    height_rows: int = Query(1),
+    duration_days: int = Query(1),
+    earliest: str | None = Query(None),
+    limit: int = Query(5),
+    exclude_job_id: int | None = Query(None),
+):
+    """
+    Früheste konfliktfreie Plätze (row_index, start_date) für einen Job,
+    gesucht ab earliest über ein Jahr (Feiertage/Freitag-Overrides berücksichtigt).
+    exclude_job_id: beim Bearbeiten den Job selbst ignorieren.
+    """
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+
+    if section not in ("eb", "res", "gg"):
+        return JSONResponse({"ok": False, "error": "invalid section"}, status_code=400)
+    try:
+        first_day = parse_ymd(earliest) if earliest else date.today()
+    except ValueError:
+        return JSONResponse({"ok": False, "error": "invalid earliest"}, status_code=400)
+    limit = max(1, min(int(limit), 50))
+    last_day = first_day + timedelta(days=366)
+
+    conn = get_ro_conn(); cur = conn.cursor()
+    try:
+        row_counts = load_row_counts(cur)
+        jobs = [j for j in list_jobs_reaching(cur, first_day, last_day) if j["id"] != exclude_job_id]
+        occ = Occupancy.for_range(cur, first_day, last_day, row_counts, jobs)
+    finally:
+        conn.close()
+
+    slots = occ.find_slots(section, int(height_rows), int(duration_days), limit)
+    return {
+        "ok": True,
+        "slots": [{"row_index": r, "start_date": fmt_ymd(occ.days[c])} for r, c in slots],
+    }
+
+
+@app.post("/api/year/auto-schedule")
+async def api_year_auto_schedule(request: Request, data: dict = Body(...)):
+    """
+    Offene Jobs automatisch einplanen.
+    Body: {"jobs": [{title, duration_days, height_rows, section|sections,
+                     earliest, priority, color, note}], "commit": false}
+    commit=false: nur Vorschau. commit=true: Einplanung auf aktuellem Stand
+    neu rechnen und alle Jobs in einer Transaktion anlegen.
+    """
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+
+    items = data.get("jobs") or []
+    if not isinstance(items, list) or len(items) > 2000:
+        return JSONResponse({"ok": False, "error": "jobs must be a list (max 2000)"}, status_code=400)
+    commit = bool(data.get("commit"))
+
+    today = date.today()
+    pending, errors = planner.parse_pending(items, today)
+    last_day = max([j["earliest"] for j in pending] + [today]) + timedelta(days=366)
+
+    conn = get_conn() if commit else get_ro_conn()
+    cur = conn.cursor()
+    try:
+        if commit:
+            # Schreibsperre vor dem Lesen: Vorschau und Einfügen sehen denselben Stand
+            cur.execute("BEGIN IMMEDIATE")
+        row_counts = load_row_counts(cur)
+        jobs = list_jobs_reaching(cur, today, last_day)
+        occ = Occupancy.for_range(cur, today, last_day, row_counts, jobs)
+        placed, unplaced = planner.schedule(occ, pending)
+
+        if commit:
+            group = audit_group(request)
+            for p in placed:
+                p["id"] = repo.insert_year_job(
+                    cur, p["title"], p["start_date"], p["duration_days"], p["height_rows"],
+                    p["section"], p["row_index"], p["color"], p["note"]
+                )
+                group.add("year_jobs", (p["id"],), None, job_state(p))
+            conn.commit()
+            journal.submit(group)
+            invalidate_year_models()
+
+        return {"ok": True, "committed": commit, "placed": placed, "unplaced": errors + unplaced}
+    except Exception:
+        return JSONResponse({"ok": False, "error": traceback.format_exc()}, status_code=500)
+    finally:
+        conn.close()
+
+
+# ---------------- Projektion Jahresplanung -> Woche ----------------
+# Team-Zeilen der Jahresplanung = Zeilen im Wochenplan des Standorts
+PROJECTION_SECTIONS = {"engelbrechts": "eb", "gross-gerungs": "gg"}
+
+def get_week_projection(cur, year: int, kw: int, st: str) -> dict[tuple[int, int], dict]:
+    section = PROJECTION_SECTIONS.get(st)
+    if section is None:
+        return {}
+    key = (st, year, kw)
+    proj = week_projections.get(key)
+    if proj is not None:
+        return proj
+
+    gen = week_projections.generation(key)
+    monday = iso_monday(year, kw)
+    friday = monday + timedelta(days=4)
+    # Jobs, die in die Woche hineinreichen können
+    jobs = repo.list_year_jobs_starting_between(
+        cur, section, fmt_ymd(monday - job_lookback(cur)), fmt_ymd(friday)
+    )
+    cal_start = min([monday] + [parse_ymd(j["start_date"]) for j in jobs])
+    cal = WorkdayCalendar.load(cur, cal_start, friday)
+    proj = planner.project_week(cal, jobs, monday)
+    week_projections.put(key, proj, gen)
+    return proj
+
+
 # ---------------- zentrale Week-Logik ----------------
-def build_week_context(year: int, kw: int, standort: str):
+def build_week_context(year: int, kw: int, standort: str, read_only: bool = False):
+    """
+    read_only=True (Viewer): eigene Read-only Verbindung, fehlender Plan wird
+    nicht angelegt sondern mit Defaults (5 Zeilen, 4-Tage-Woche) angezeigt.
+    Gleichzeitige identische Aufrufe teilen sich ein Ergebnis (Single-Flight);
+    die Generation der Woche im Key trennt Aufrufe vor/nach einem Schreibzugriff.
+    """
     st = canon_standort(standort)
-    conn = get_conn(); cur = conn.cursor()
+    gen = view_snapshots.generation((st, year, kw))
+    return builds.do(
+        ("week", st, year, kw, read_only, gen),
+        lambda: _build_week_context(year, kw, st, read_only)
+    )
+
+def _build_week_context(year: int, kw: int, st: str, read_only: bool):
+    conn = get_ro_conn() if read_only else get_conn()
+    cur = conn.cursor()
     try:
         # Plan holen/erzeugen
-        cur.execute("SELECT id,row_count,four_day_week FROM week_plans WHERE year=? AND kw=? AND standort=?", (year, kw, st))
-        plan = cur.fetchone()
-        if not plan:
-            cur.execute(
-                "INSERT INTO week_plans(year,kw,standort,row_count,four_day_week) VALUES(?,?,?,?,1)",
-                (year, kw, st, 5)
-            )
+        plan = repo.get_week_plan(cur, year, kw, st)
+        if not plan and read_only:
+            plan_id, rows, four = None, 5, 1
+        elif not plan:
+            plan_id = repo.create_week_plan(cur, year, kw, st)
             conn.commit()
-            plan_id, rows, four = cur.lastrowid, 5, 1
+            rows, four = 5, 1
         else:
             plan_id, rows, four = plan["id"], plan["row_count"], plan["four_day_week"]
 
         # Mitarbeiter
-        cur.execute("SELECT id,name FROM employees WHERE standort=? ORDER BY id", (st,))
-        employees = [{"id": e["id"], "name": e["name"]} for e in cur.fetchall()]
+        employees = repo.list_employees(cur, st)
         if employees:
             rows = max(rows, len(employees))
 
         # Grid
-        grid = [[{"text": ""} for _ in range(5)] for _ in range(rows)]
-        cur.execute("SELECT row_index,day_index,text FROM week_cells WHERE week_plan_id=?", (plan_id,))
-        for r in cur.fetchall():
+        grid = [[{"text": "", "version": 0} for _ in range(5)] for _ in range(rows)]
+        for r in (repo.list_week_cells(cur, plan_id) if plan_id else []):
             ri, di = int(r["row_index"]), int(r["day_index"])
             if 0 <= ri < rows and 0 <= di < 5:
                 grid[ri][di]["text"] = r["text"] or ""
+                grid[ri][di]["version"] = r["version"]
+
+        # Vorbelegung aus der Jahresplanung (nur leere Zellen), nur in der Ansicht: im Editor
+        # würde die Projektion beim Speichern zu echten Zellen.
+        if read_only:
+            for (ri, di), job in get_week_projection(cur, year, kw, st).items():
+                if 0 <= ri < rows and not grid[ri][di]["text"].strip():
+                    grid[ri][di].update(text=job["title"], from_year=True)
 
         # Kleinbaustellen (standortweit)
-        cur.execute("SELECT row_index,text FROM global_small_jobs WHERE standort=? ORDER BY row_index", (st,))
-        small_jobs = [{"row_index": s["row_index"], "text": s["text"] or ""} for s in cur.fetchall()]
+        small_jobs = [{"row_index": s["row_index"], "text": s["text"] or ""} for s in repo.list_small_jobs(cur, st)]
         max_idx = max([x["row_index"] for x in small_jobs], default=-1)
         while len(small_jobs) < 10:
             max_idx += 1
@@ -991,10 +1446,208 @@ def build_week_context(year: int, kw: int, standort: str):
         }
     finally:
         conn.close()
-# ---------------- Login ----------------
-@app.get("/login", response_class=HTMLResponse)
-def login_page(request: Request):
-    return templates.TemplateResponse(
+
+
+# ---------------- Viewer-Snapshots (/view/week) ----------------
+# Die Viewer-Seite ist für alle Mitarbeiter eines Standorts gleich -> einmal rendern,
+# danach direkt aus dem Speicher (mit ETag) ausliefern.
+view_snapshots = SnapshotCache()
+
+def view_allow_next(year: int, kw: int, now: datetime | None = None) -> bool:
+    # --- Navigation: nur aktuelle + 1 Woche erlauben ---
+    cur_year, cur_kw = auto_view_target(now or datetime.now())
+
+    # ISO-Wochen sauber vergleichen
+    max_year, max_kw = cur_year, cur_kw + 1
+    if max_kw > 53:
+        max_kw = 1
+        max_year += 1
+
+    return (
+        year < max_year
+        or (year == max_year and kw <= max_kw)
+    )
+
+def render_view_snapshot(standort: str, year: int, kw: int, allow_next: bool) -> Snapshot:
+    st = canon_standort(standort)
+    key = (st, year, kw)
+    gen = view_snapshots.generation(key)
+    return builds.do(
+        ("view", st, year, kw, allow_next, gen),
+        lambda: _render_view_snapshot(key, gen, allow_next)
+    )
+
+def _render_view_snapshot(key: tuple, gen: int, allow_next: bool) -> Snapshot:
+    st, year, kw = key
+    ctx = build_week_context(year, kw, st, read_only=True)
+    next_year, next_kw = next_iso_week(year, kw)
+    html = templates.get_template("week_view.html").render({
+        "year": year,
+        "kw": kw,
+        "next_year": next_year,
+        "next_kw": next_kw,
+        "allow_next": allow_next,
+        "standort": ctx["standort"],
+        "grid": ctx["grid"],
+        "employees": ctx["employees"],
+        "four_day_week": ctx["four_day_week"],
+        "days": ctx["days"],
+    })
+    snap = Snapshot(html, make_etag(html), allow_next)
+    view_snapshots.put(key, snap, gen)
+    return snap
+
+def refresh_view_snapshots(keys: list[tuple]):
+    """Background-Task: invalidierte (vorher gecachte) Wochen neu rendern."""
+    for st, y, w in keys:
+        try:
+            render_view_snapshot(st, y, w, view_allow_next(y, w))
+        except Exception:
+            logger.exception("Viewer-Snapshot %s %s/KW%s neu rendern fehlgeschlagen", st, y, w)
+
+def warm_view_week(year: int, kw: int, now: datetime | None = None):
+    for st in STANDORTE:
+        render_view_snapshot(st, year, kw, view_allow_next(year, kw, now))
+
+def warm_caches():
+    """Scheduler: aktuelle Viewer-Woche und Jahresmodell vorrendern."""
+    year, kw = auto_view_target()
+    warm_view_week(year, kw)
+    get_year_model(date.today().year)
+
+def prepare_next_week():
+    """
+    Scheduler (Fr vor 12:00): Pläne der nächsten KW für alle Standorte anlegen
+    und Viewer-Snapshots + Jahresmodell vorwärmen, damit der Umschalt-Moment
+    nicht auf kalte Caches (und INSERTs unter Last) trifft.
+    """
+    today = date.today()
+    ny, nkw = next_iso_week(*today.isocalendar()[:2])
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        for st in STANDORTE:
+            repo.create_week_plan_if_missing(cur, ny, nkw, st)
+        conn.commit()
+    finally:
+        conn.close()
+
+    # so rendern, wie es nach dem Umschalten (Fr 12:00) gilt
+    rollover = datetime.combine(today, datetime.min.time()).replace(hour=12)
+    warm_view_week(ny, nkw, rollover)
+    get_year_model(today.year)
+    if ny != today.year:
+        get_year_model(ny)
+
+def invalidate_week_view(background_tasks: BackgroundTasks, standort: str,
+                         year: int | None = None, kw: int | None = None):
+    """Nach Schreibzugriffen: Woche (oder ganzen Standort) verwerfen und im Hintergrund neu rendern."""
+    keys = view_snapshots.invalidate_week(canon_standort(standort), year, kw)
+    # eigene cache_changes-Zeilen gleich übernehmen, bevor der Background-Render startet
+    sync_caches()
+    if keys:
+        background_tasks.add_task(refresh_view_snapshots, keys)
+
+
+# ---------------- Cache-Sync zwischen Workern (uvicorn --workers N) ----------------
+def fetch_cache_changes(since: int, limit: int) -> list[dict]:
+    conn = get_ro_conn(); cur = conn.cursor()
+    try:
+        return repo.list_cache_changes(cur, since, limit)
+    finally:
+        conn.close()
+
+def apply_cache_changes(rows: list[dict]):
+    weeks = set()
+    year_changed = False
+    for r in rows:
+        if r["scope"] == "year":
+            year_changed = True
+        elif r["scope"] == "week":
+            weeks.add((r["standort"], r["year"], r["kw"]))
+        elif r["scope"] == "standort":
+            weeks.add((r["standort"], None, None))
+    if year_changed:
+        clear_year_caches()
+    for st, y, w in weeks:
+        view_snapshots.invalidate_week(st, y, w)
+
+def reset_caches():
+    clear_year_caches()
+    view_snapshots.clear()
+
+change_feed = ChangeFeed(fetch_cache_changes, apply_cache_changes, reset_caches)
+
+def start_change_feed():
+    conn = get_ro_conn(); cur = conn.cursor()
+    try:
+        change_feed.start(repo.max_cache_change_seq(cur))
+    finally:
+        conn.close()
+
+def sync_caches():
+    """Vor jedem Cache-Zugriff: Änderungen (auch anderer Worker) übernehmen."""
+    change_feed.check()
+
+
+# ---------------- Audit-Journal / Undo ----------------
+AUDIT_UNDO_DAYS = 7      # so lange sind Undo/Redo und die Einzelschritte verfügbar
+AUDIT_KEEP_DAYS = 365    # danach fällt der Verlauf weg
+
+def write_audit(rows: list[tuple]):
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        repo.insert_audit_entries(cur, rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+journal = audit.Journal(write_audit)
+
+def audit_session(request: Request) -> str:
+    sid = request.session.get("sid")
+    if not sid:
+        sid = request.session["sid"] = secrets.token_hex(8)
+    return sid
+
+def audit_group(request: Request) -> audit.Group:
+    """Änderungen eines Requests sammeln; nach dem Commit mit journal.submit() einreichen."""
+    user = request.session.get("user") or {}
+    return audit.Group(audit_session(request), user.get("username"))
+
+def audit_state(cur, tbl: str, key: tuple) -> dict | None:
+    key_cols, fields = audit.TABLES[tbl]
+    return repo.get_row_state(cur, tbl, key_cols, key, fields)
+
+def job_state(job) -> dict:
+    return {f: job[f] for f in audit.TABLES["year_jobs"][1]}
+
+def journal_write(cur, group: audit.Group, tbl: str, keys: list[tuple], write):
+    """write() ausführen und die Zeilen keys mit Vorher/Nachher in group eintragen."""
+    before = [audit_state(cur, tbl, k) for k in keys]
+    write()
+    for k, b in zip(keys, before):
+        group.add(tbl, k, b, audit_state(cur, tbl, k))
+
+def compact_audit():
+    """
+    Scheduler: Verlauf außerhalb des Undo-Fensters verdichten (mehrere Änderungen
+    derselben Zeile durch dieselbe Sitzung -> ein Eintrag), Altes löschen.
+    """
+    journal.flush()
+    undo_before = fmt_ymd(date.today() - timedelta(days=AUDIT_UNDO_DAYS))
+    keep_before = fmt_ymd(date.today() - timedelta(days=AUDIT_KEEP_DAYS))
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        repo.purge_audit(cur, undo_before, keep_before)
+        updates, deletes = audit.compact(repo.list_audit_for_compaction(cur, undo_before))
+        repo.apply_audit_compaction(cur, updates, deletes)
+        conn.commit()
+    finally:
+        conn.close()
+# ---------------- Login ----------------
+@app.get("/login", response_class=HTMLResponse)
+def login_page(request: Request):
+    return templates.TemplateResponse(
         "login.html",
         {
             "request": request,
@@ -1009,8 +1662,7 @@ async def login(request: Request):
     password = form.get("password") or ""
 
     conn = get_conn(); cur = conn.cursor()
-    cur.execute("SELECT * FROM users WHERE username=?", (username,))
-    user = cur.fetchone()
+    user = repo.get_user_by_username(cur, username)
     conn.close()
 
     if not user or not verify_password(password, user["password_hash"]):
@@ -1070,6 +1722,15 @@ def health():
 def favicon():
     return Response(status_code=204)
 
+@app.get("/sw.js")
+def service_worker():
+    # Service Worker muss von "/" kommen, damit sein Scope /view/week abdeckt
+    return FileResponse(
+        ROOT_DIR / "static" / "sw.js",
+        media_type="application/javascript",
+        headers={"Cache-Control": "no-cache"}
+    )
+
 
 @app.get("/admin/routes")
 def admin_routes(request: Request):
@@ -1086,10 +1747,9 @@ def admin_users(request: Request):
     if guard:
         return guard
 
-    conn = get_conn(); cur = conn.cursor()
+    conn = get_ro_conn(); cur = conn.cursor()
     try:
-        cur.execute("SELECT id, username, is_write, can_view_eb, can_view_gg FROM users ORDER BY id")
-        return {"users": [dict(r) for r in cur.fetchall()]}
+        return {"users": repo.list_users(cur)}
     finally:
         conn.close()
 
@@ -1102,14 +1762,10 @@ def seed_admin(request: Request):
     conn = get_conn(); cur = conn.cursor()
     try:
         # Admin-User: admin / admin (nur initial)
-        cur.execute("SELECT id FROM users WHERE username=?", ("admin",))
-        if cur.fetchone():
+        if repo.get_user_by_username(cur, "admin"):
             return {"ok": True, "note": "admin exists"}
 
-        cur.execute(
-            "INSERT INTO users(username, password_hash, is_write, can_view_eb, can_view_gg) VALUES(?,?,?,?,?)",
-            ("admin", hash_password("admin"), 1, 1, 1)
-        )
+        repo.create_user(cur, "admin", hash_password("admin"), 1, 1, 1)
 
         conn.commit()
         return {"ok": True, "note": "admin created"}
@@ -1122,14 +1778,10 @@ def seed_viewer_eb(request: Request):
         return guard
     conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("SELECT id FROM users WHERE username=?", ("viewer_eb",))
-        if cur.fetchone():
+        if repo.get_user_by_username(cur, "viewer_eb"):
             return {"ok": True, "note": "viewer_eb exists"}
 
-        cur.execute(
-            "INSERT INTO users(username, password_hash, is_write, can_view_eb, can_view_gg) VALUES(?,?,?,?,?)",
-            ("viewer_eb", hash_password("viewer_eb!1"), 0, 1, 0)
-        )
+        repo.create_user(cur, "viewer_eb", hash_password("viewer_eb!1"), 0, 1, 0)
         conn.commit()
         return {"ok": True, "note": "viewer_eb created (viewer_eb / viewer_eb!1)"}
     finally:
@@ -1144,14 +1796,10 @@ def seed_viewer_gg(request: Request):
 
     conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("SELECT id FROM users WHERE username=?", ("viewer_gg",))
-        if cur.fetchone():
+        if repo.get_user_by_username(cur, "viewer_gg"):
             return {"ok": True, "note": "viewer_gg exists"}
 
-        cur.execute(
-            "INSERT INTO users(username, password_hash, is_write, can_view_eb, can_view_gg) VALUES(?,?,?,?,?)",
-            ("viewer_gg", hash_password("viewer_gg!1"), 0, 0, 1)
-        )
+        repo.create_user(cur, "viewer_gg", hash_password("viewer_gg!1"), 0, 0, 1)
         conn.commit()
         return {"ok": True, "note": "viewer_gg created (viewer_gg / viewer_gg!1)"}
     finally:
@@ -1166,14 +1814,10 @@ def seed_viewer_both(request: Request):
 
     conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("SELECT id FROM users WHERE username=?", ("viewer_both",))
-        if cur.fetchone():
+        if repo.get_user_by_username(cur, "viewer_both"):
             return {"ok": True, "note": "viewer_both exists"}
 
-        cur.execute(
-            "INSERT INTO users(username, password_hash, is_write, can_view_eb, can_view_gg) VALUES(?,?,?,?,?)",
-            ("viewer_both", hash_password("viewer_both!1"), 0, 1, 1)
-        )
+        repo.create_user(cur, "viewer_both", hash_password("viewer_both!1"), 0, 1, 1)
         conn.commit()
         return {"ok": True, "note": "viewer_both created (viewer_both / viewer_both!1)"}
     finally:
@@ -1183,20 +1827,17 @@ def seed_viewer_both(request: Request):
 @app.get("/admin/peek-week")
 def admin_peek_week(standort: str, year: int, kw: int):
     st = canon_standort(standort)
-    conn = get_conn(); cur = conn.cursor()
+    conn = get_ro_conn(); cur = conn.cursor()
     try:
         out = {"standort": st, "year": year, "kw": kw}
-        cur.execute("SELECT id,row_count,four_day_week FROM week_plans WHERE year=? AND kw=? AND standort=?", (year, kw, st))
-        p = cur.fetchone()
+        p = repo.get_week_plan(cur, year, kw, st)
         if not p:
             out["plan"] = None
             out["cells"] = []
         else:
             out["plan"] = {"id": p["id"], "row_count": p["row_count"], "four_day_week": p["four_day_week"]}
-            cur.execute("SELECT row_index,day_index,text FROM week_cells WHERE week_plan_id=? ORDER BY row_index,day_index", (p["id"],))
-            out["cells"] = [dict(r) for r in cur.fetchall()]
-        cur.execute("SELECT id,name FROM employees WHERE standort=? ORDER BY id", (st,))
-        out["employees"] = [dict(r) for r in cur.fetchall()]
+            out["cells"] = repo.list_week_cells(cur, p["id"])
+        out["employees"] = repo.list_employees(cur, st)
         return out
     finally:
         conn.close()
@@ -1204,10 +1845,9 @@ def admin_peek_week(standort: str, year: int, kw: int):
 @app.get("/admin/peek-klein")
 def admin_peek_klein(standort: str = "engelbrechts"):
     st = canon_standort(standort)
-    conn = get_conn(); cur = conn.cursor()
+    conn = get_ro_conn(); cur = conn.cursor()
     try:
-        cur.execute("SELECT row_index,text FROM global_small_jobs WHERE standort=? ORDER BY row_index", (st,))
-        return {"standort": st, "items": [dict(r) for r in cur.fetchall()]}
+        return {"standort": st, "items": repo.list_small_jobs(cur, st)}
     finally:
         conn.close()
 @app.get("/admin/debug-login")
@@ -1224,8 +1864,7 @@ def bedienung(request: Request):
 
     conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("SELECT id, username, password_hash, is_write, can_view_eb, can_view_gg FROM users WHERE username=?", ("admin",))
-        row = cur.fetchone()
+        row = repo.get_user_by_username(cur, "admin")
         if not row:
             return {"found": False}
         return {
@@ -1252,8 +1891,7 @@ def settings_users_page(request: Request):
 
     conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("SELECT id, username, is_write, can_view_eb, can_view_gg FROM users ORDER BY username")
-        users = [dict(r) for r in cur.fetchall()]
+        users = repo.list_users(cur, order_by_username=True)
         return templates.TemplateResponse(
             "settings_users.html",
             {"request": request, "users": users}
@@ -1286,14 +1924,10 @@ async def settings_users_create(request: Request):
 
     conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("SELECT id FROM users WHERE username=?", (username,))
-        if cur.fetchone():
+        if repo.get_user_by_username(cur, username):
             return RedirectResponse("/settings/users?exists=1", status_code=303)
 
-        cur.execute(
-            "INSERT INTO users(username, password_hash, is_write, can_view_eb, can_view_gg) VALUES(?,?,?,?,?)",
-            (username, hash_password(password), is_write, can_view_eb, can_view_gg)
-        )
+        repo.create_user(cur, username, hash_password(password), is_write, can_view_eb, can_view_gg)
         conn.commit()
         return RedirectResponse("/settings/users?created=1", status_code=303)
     finally:
@@ -1334,20 +1968,13 @@ async def settings_users_update(request: Request):
     conn = get_conn(); cur = conn.cursor()
     try:
         # existiert der User?
-        cur.execute("SELECT id FROM users WHERE id=?", (user_id,))
-        if not cur.fetchone():
+        if not repo.user_exists(cur, user_id):
             return RedirectResponse("/settings/users?missing=1", status_code=303)
 
-        if new_pw:
-            cur.execute(
-                "UPDATE users SET is_write=?, can_view_eb=?, can_view_gg=?, password_hash=? WHERE id=?",
-                (is_write, can_view_eb, can_view_gg, hash_password(new_pw), user_id)
-            )
-        else:
-            cur.execute(
-                "UPDATE users SET is_write=?, can_view_eb=?, can_view_gg=? WHERE id=?",
-                (is_write, can_view_eb, can_view_gg, user_id)
-            )
+        repo.update_user(
+            cur, user_id, is_write, can_view_eb, can_view_gg,
+            password_hash=hash_password(new_pw) if new_pw else None
+        )
 
         conn.commit()
     finally:
@@ -1380,7 +2007,7 @@ async def settings_users_delete(request: Request):
     conn = get_conn(); cur = conn.cursor()
     try:
         if user_id:
-            cur.execute("DELETE FROM users WHERE id=?", (user_id,))
+            repo.delete_user(cur, user_id)
             conn.commit()
         return RedirectResponse("/settings/users?deleted=1", status_code=303)
     finally:
@@ -1395,8 +2022,7 @@ def settings_employees_page(request: Request, standort: str = "engelbrechts"):
     st = canon_standort(standort)
     conn = get_conn(); cur = conn.cursor()
     try:
-        cur.execute("SELECT id,name FROM employees WHERE standort=? ORDER BY id", (st,))
-        employees = [{"id": r["id"], "name": r["name"]} for r in cur.fetchall()]
+        employees = repo.list_employees(cur, st)
         return templates.TemplateResponse(
             "settings_employees.html",
             {"request": request, "standort": st, "employees": employees}
@@ -1406,7 +2032,7 @@ def settings_employees_page(request: Request, standort: str = "engelbrechts"):
     finally:
         conn.close()
 @app.post("/settings/employees", response_class=HTMLResponse)
-async def settings_employees_save(request: Request):
+async def settings_employees_save(request: Request, background_tasks: BackgroundTasks):
     guard = require_write(request)
     if guard:
         return guard
@@ -1437,12 +2063,9 @@ async def settings_employees_save(request: Request):
 
     conn = get_conn(); cur = conn.cursor()
     try:
-        for n in new_list:
-            cur.execute(
-                "INSERT INTO employees(name, standort) VALUES(?, ?)",
-                (n, st)
-            )
+        repo.insert_employees(cur, st, new_list)
         conn.commit()
+        invalidate_week_view(background_tasks, st)
         return RedirectResponse(
             f"/settings/employees?standort={st}&saved=1",
             status_code=303
@@ -1452,7 +2075,7 @@ async def settings_employees_save(request: Request):
 
                  
 @app.post("/settings/employees/delete")
-async def settings_employees_delete(request: Request):
+async def settings_employees_delete(request: Request, background_tasks: BackgroundTasks):
     guard = require_write(request)
     if guard:
         return guard
@@ -1462,8 +2085,9 @@ async def settings_employees_delete(request: Request):
     conn = get_conn(); cur = conn.cursor()
     try:
         if emp_id:
-            cur.execute("DELETE FROM employees WHERE id=?", (emp_id,))
+            repo.delete_employee(cur, emp_id)
             conn.commit()
+            invalidate_week_view(background_tasks, st)
         return RedirectResponse(url=f"/settings/employees?standort={canon_standort(st)}", status_code=303)
     finally:
         conn.close()
@@ -1514,7 +2138,7 @@ def week(
                 "standort": standort,
                 "four_day_week": ctx["four_day_week"],
                 "small_jobs": ctx["small_jobs"],
-                "standorte": ["engelbrechts", "gross-gerungs"],
+                "standorte": STANDORTE,
 
                 # NEU: nächste Woche
                 "next_year": ny,
@@ -1529,75 +2153,114 @@ def week(
 
 
 # ---------------- WEEK API (unverändert) ----------------
+# Kopfzeile einer noch nicht angelegten Woche (wie repo.create_week_plan_if_missing) – Vorher-Stand im Journal
+WEEK_PLAN_DEFAULT = {"row_count": 5, "four_day_week": 1}
+
 @app.post("/api/week/set-cell")
-async def set_cell(request: Request, data: dict = Body(...), standort_q: str | None = Query(None, alias="standort")):
+async def set_cell(request: Request, background_tasks: BackgroundTasks, data: dict = Body(...),
+                   standort_q: str | None = Query(None, alias="standort")):
     conn = get_conn(); cur = conn.cursor()
     try:
         year = int(data.get("year")); kw = int(data.get("kw"))
         standort = resolve_standort(request, data.get("standort"), standort_q)
         row = int(data.get("row")); day = int(data.get("day")); val = data.get("value") or ""
-        cur.execute("SELECT id,four_day_week FROM week_plans WHERE year=? AND kw=? AND standort=?", (year, kw, standort))
-        plan = cur.fetchone()
+        plan = repo.get_week_plan(cur, year, kw, standort)
         if not plan:
             return {"ok": False, "error": "Plan not found"}
         if plan["four_day_week"] and day == 4:
             return {"ok": True, "skipped": True}
-        cur.execute("""
-            INSERT INTO week_cells(week_plan_id,row_index,day_index,text)
-            VALUES(?,?,?,?)
-            ON CONFLICT(week_plan_id,row_index,day_index) DO UPDATE SET text=excluded.text
-        """, (plan["id"], row, day, val))
+        # version: erwartete Zellversion (0 = Zelle war leer/neu), ohne Angabe keine Prüfung
+        try:
+            expected = expected_version(data)
+        except (TypeError, ValueError):
+            return JSONResponse({"ok": False, "error": "invalid version"}, status_code=400)
+        old = repo.get_week_cell(cur, plan["id"], row, day)
+        version = old["version"] if old else 0
+        if expected is not None and expected != version:
+            return version_conflict(current_cell(cur, plan["id"], row, day))
+        if not repo.set_week_cell(cur, plan["id"], row, day, val, version):
+            conn.rollback()
+            return version_conflict(current_cell(cur, plan["id"], row, day))
         conn.commit()
-        return {"ok": True, "standort": standort}
+        group = audit_group(request)
+        group.add("week_cells", (plan["id"], row, day), {"text": old["text"]} if old else None, {"text": val})
+        journal.submit(group)
+        invalidate_week_view(background_tasks, standort, year, kw)
+        return {"ok": True, "standort": standort, "version": version + 1}
     except Exception:
         return JSONResponse({"ok": False, "error": traceback.format_exc()}, status_code=500)
     finally:
         conn.close()
 
 @app.post("/api/week/batch")
-async def save_batch(data: dict = Body(...)):
+async def save_batch(request: Request, background_tasks: BackgroundTasks, data: dict = Body(...)):
     conn = get_conn(); cur = conn.cursor()
     try:
         year = int(data.get("year")); kw = int(data.get("kw"))
         standort = canon_standort(data.get("standort") or "engelbrechts")
         updates = data.get("updates") or []
-        cur.execute("SELECT id,four_day_week FROM week_plans WHERE year=? AND kw=? AND standort=?", (year, kw, standort))
-        plan = cur.fetchone()
+        # Schreibsperre vor dem Lesen: Versionsprüfung und Schreiben sehen denselben Stand
+        cur.execute("BEGIN IMMEDIATE")
+        plan = repo.get_week_plan(cur, year, kw, standort)
         if not plan:
+            conn.rollback()
             return {"ok": False, "error": "Plan not found"}
+        old = repo.get_week_cell_states(cur, plan["id"])
+        cells, conflicts = [], []
         for u in updates:
             row = int(u.get("row")); day = int(u.get("day"))
             if plan["four_day_week"] and day == 4:
                 continue
-            val = u.get("value") or ""
-            cur.execute("""
-                INSERT INTO week_cells(week_plan_id,row_index,day_index,text)
-                VALUES(?,?,?,?)
-                ON CONFLICT(week_plan_id,row_index,day_index) DO UPDATE SET text=excluded.text
-            """, (plan["id"], row, day, val))
+            try:
+                expected = expected_version(u)
+            except (TypeError, ValueError):
+                conn.rollback()
+                return JSONResponse({"ok": False, "error": "invalid version"}, status_code=400)
+            current = old.get((row, day)) or {"text": "", "version": 0}
+            if expected is not None and expected != current["version"]:
+                conflicts.append({"row": row, "day": day, "current": current})
+                continue
+            cells.append((row, day, u.get("value") or ""))
+        if conflicts:
+            conn.rollback()
+            return JSONResponse({"ok": False, "error": "version conflict", "conflicts": conflicts}, status_code=409)
+        repo.upsert_week_cells(cur, plan["id"], cells)
         conn.commit()
-        return {"ok": True, "count": len(updates)}
+        group = audit_group(request)
+        for row, day, text in cells:
+            before = {"text": old[(row, day)]["text"]} if (row, day) in old else None
+            group.add("week_cells", (plan["id"], row, day), before, {"text": text})
+        journal.submit(group)
+        invalidate_week_view(background_tasks, standort, year, kw)
+        versions = {}
+        for row, day, _ in cells:
+            versions[(row, day)] = versions.get((row, day), (old.get((row, day)) or {"version": 0})["version"]) + 1
+        return {"ok": True, "count": len(updates),
+                "cells": [{"row": r, "day": d, "version": v} for (r, d), v in versions.items()]}
     except Exception:
         return JSONResponse({"ok": False, "error": traceback.format_exc()}, status_code=500)
     finally:
         conn.close()
 
 @app.post("/api/week/set-four-day")
-async def set_four_day(data: dict = Body(...)):
+async def set_four_day(request: Request, background_tasks: BackgroundTasks, data: dict = Body(...)):
     conn = get_conn(); cur = conn.cursor()
     try:
         year = int(data.get("year")); kw = int(data.get("kw"))
         standort = canon_standort(data.get("standort") or "engelbrechts")
         value = 1 if bool(data.get("four_day_week") or data.get("value")) else 0
-        cur.execute("SELECT id FROM week_plans WHERE year=? AND kw=? AND standort=?", (year, kw, standort))
-        row = cur.fetchone()
-        if not row:
-            cur.execute("INSERT INTO week_plans(year,kw,standort,row_count,four_day_week) VALUES(?,?,?,?,?)",
-                        (year, kw, standort, 5, value))
+        plan = repo.get_week_plan(cur, year, kw, standort)
+        if not plan:
+            plan_id = repo.create_week_plan(cur, year, kw, standort, 5, value)
+            before = WEEK_PLAN_DEFAULT["four_day_week"]
         else:
-            cur.execute("UPDATE week_plans SET four_day_week=? WHERE year=? AND kw=? AND standort=?",
-                        (value, year, kw, standort))
+            plan_id, before = plan["id"], plan["four_day_week"]
+            repo.set_four_day_week(cur, year, kw, standort, value)
         conn.commit()
+        group = audit_group(request)
+        group.add("week_plans", (plan_id,), {"four_day_week": before}, {"four_day_week": value})
+        journal.submit(group)
+        invalidate_week_view(background_tasks, standort, year, kw)
         return {"ok": True, "four_day_week": bool(value)}
     except Exception:
         return JSONResponse({"ok": False, "error": traceback.format_exc()}, status_code=500)
@@ -1605,8 +2268,184 @@ async def set_four_day(data: dict = Body(...)):
         conn.close()
 
 @app.post("/api/week/options")
-async def options_alias(data: dict = Body(...)):
-    return await set_four_day(data)
+async def options_alias(request: Request, background_tasks: BackgroundTasks, data: dict = Body(...)):
+    return await set_four_day(request, background_tasks, data)
+
+# ---------------- Woche kopieren / Wochenvorlagen ----------------
+COPY_MODES = ("skip", "fill", "overwrite")
+
+def parse_week_targets(data: dict) -> list[tuple[int, int]]:
+    """
+    Zielwochen: {"targets": [{"year", "kw"}, ...]}
+            oder {"to_year", "to_kw", "weeks": n} (n aufeinanderfolgende KWs).
+    """
+    if data.get("targets"):
+        targets = [(int(t["year"]), int(t["kw"])) for t in data["targets"]]
+    else:
+        y, w = int(data.get("to_year")), int(data.get("to_kw"))
+        date.fromisocalendar(y, w, 1)  # validiert KW
+        targets = [(y, w)]
+        for _ in range(max(1, min(int(data.get("weeks") or 1), 53)) - 1):
+            y, w = next_iso_week(y, w)
+            targets.append((y, w))
+    for y, w in targets:
+        date.fromisocalendar(y, w, 1)
+    if len(targets) > 53:
+        raise ValueError("max 53 target weeks")
+    return targets
+
+def copy_into_weeks(cur, group: audit.Group, source: str, source_id: int, row_count: int, four_day_week: int,
+                    standort: str, targets: list[tuple[int, int]], mode: str):
+    """
+    Woche/Vorlage in die Zielwochen kopieren (Aufrufer committet und reicht group ein):
+      skip:      Wochen mit Inhalt auslassen
+      fill:      nur leere Zellen füllen
+      overwrite: Zielwoche (Zellen + row_count/4-Tage-Woche) ersetzen
+    """
+    done, skipped = [], []
+    for y, w in targets:
+        plan = repo.get_week_plan(cur, y, w, standort)
+        if plan and mode == "skip" and repo.week_has_cells(cur, plan["id"]):
+            skipped.append({"year": y, "kw": w})
+            continue
+        plan_before = {f: plan[f] for f in audit.TABLES["week_plans"][1]} if plan else WEEK_PLAN_DEFAULT
+        cells_before = repo.get_week_cell_states(cur, plan["id"]) if plan else {}
+        plan_id = repo.put_week_plan(cur, y, w, standort, row_count, four_day_week, overwrite=(mode == "overwrite"))
+        repo.copy_week_cells(cur, source, source_id, plan_id, overwrite=(mode == "overwrite"))
+        group.add("week_plans", (plan_id,), plan_before, audit_state(cur, "week_plans", (plan_id,)))
+        cells_after = repo.get_week_cell_states(cur, plan_id)
+        for key in cells_before.keys() | cells_after.keys():
+            before, after = cells_before.get(key), cells_after.get(key)
+            group.add("week_cells", (plan_id, *key),
+                      {"text": before["text"]} if before else None, {"text": after["text"]} if after else None)
+        done.append({"year": y, "kw": w})
+    return done, skipped
+
+@app.post("/api/week/copy")
+async def copy_week(request: Request, background_tasks: BackgroundTasks, data: dict = Body(...)):
+    """
+    Body: {"standort", "year", "kw", "to_year", "to_kw", "weeks": 1, "mode": "skip|fill|overwrite"}
+    Alle Zielwochen in einer Transaktion (INSERT ... SELECT je Woche).
+    """
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+
+    try:
+        st = canon_standort(data.get("standort"))
+        year, kw = int(data.get("year")), int(data.get("kw"))
+        targets = [t for t in parse_week_targets(data) if t != (year, kw)]
+    except (TypeError, ValueError, KeyError):
+        return JSONResponse({"ok": False, "error": "missing/invalid year/kw/targets"}, status_code=400)
+    mode = (data.get("mode") or "skip").strip()
+    if mode not in COPY_MODES:
+        return JSONResponse({"ok": False, "error": "invalid mode"}, status_code=400)
+
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        src = repo.get_week_plan(cur, year, kw, st)
+        if not src:
+            return JSONResponse({"ok": False, "error": "source week not found"}, status_code=404)
+        group = audit_group(request)
+        done, skipped = copy_into_weeks(cur, group, "week", src["id"], src["row_count"], src["four_day_week"],
+                                        st, targets, mode)
+        conn.commit()
+        journal.submit(group)
+        for t in done:
+            invalidate_week_view(background_tasks, st, t["year"], t["kw"])
+        return {"ok": True, "standort": st, "copied": done, "skipped": skipped}
+    except Exception:
+        return JSONResponse({"ok": False, "error": traceback.format_exc()}, status_code=500)
+    finally:
+        conn.close()
+
+@app.get("/api/week/templates")
+def week_templates(request: Request):
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+
+    conn = get_ro_conn(); cur = conn.cursor()
+    try:
+        return {"ok": True, "templates": repo.list_week_templates(cur)}
+    finally:
+        conn.close()
+
+@app.post("/api/week/templates/save")
+async def week_template_save(request: Request, data: dict = Body(...)):
+    """Body: {"name", "standort", "year", "kw"} – gleichnamige Vorlage wird ersetzt."""
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+
+    name = (data.get("name") or "").strip()
+    if not name:
+        return JSONResponse({"ok": False, "error": "missing name"}, status_code=400)
+    try:
+        st = canon_standort(data.get("standort"))
+        year, kw = int(data.get("year")), int(data.get("kw"))
+    except (TypeError, ValueError):
+        return JSONResponse({"ok": False, "error": "missing/invalid year/kw"}, status_code=400)
+
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        plan = repo.get_week_plan(cur, year, kw, st)
+        if not plan:
+            return JSONResponse({"ok": False, "error": "source week not found"}, status_code=404)
+        template_id = repo.save_week_template(cur, name, st, plan["id"], plan["row_count"], plan["four_day_week"])
+        conn.commit()
+        return {"ok": True, "id": template_id, "name": name}
+    finally:
+        conn.close()
+
+@app.post("/api/week/templates/apply")
+async def week_template_apply(request: Request, background_tasks: BackgroundTasks, data: dict = Body(...)):
+    """Body: {"name", "standort", "to_year", "to_kw", "weeks": 1, "mode": "skip|fill|overwrite"}"""
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+
+    name = (data.get("name") or "").strip()
+    try:
+        st = canon_standort(data.get("standort"))
+        targets = parse_week_targets(data)
+    except (TypeError, ValueError, KeyError):
+        return JSONResponse({"ok": False, "error": "missing/invalid targets"}, status_code=400)
+    mode = (data.get("mode") or "skip").strip()
+    if mode not in COPY_MODES:
+        return JSONResponse({"ok": False, "error": "invalid mode"}, status_code=400)
+
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        tpl = repo.get_week_template(cur, name)
+        if not tpl:
+            return JSONResponse({"ok": False, "error": "template not found"}, status_code=404)
+        group = audit_group(request)
+        done, skipped = copy_into_weeks(cur, group, "template", tpl["id"], tpl["row_count"], tpl["four_day_week"],
+                                        st, targets, mode)
+        conn.commit()
+        journal.submit(group)
+        for t in done:
+            invalidate_week_view(background_tasks, st, t["year"], t["kw"])
+        return {"ok": True, "standort": st, "copied": done, "skipped": skipped}
+    except Exception:
+        return JSONResponse({"ok": False, "error": traceback.format_exc()}, status_code=500)
+    finally:
+        conn.close()
+
+@app.post("/api/week/templates/delete")
+async def week_template_delete(request: Request, data: dict = Body(...)):
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        deleted = repo.delete_week_template(cur, (data.get("name") or "").strip())
+        conn.commit()
+        return {"ok": True, "deleted": deleted}
+    finally:
+        conn.close()
 
 # ---------------- VIEW (Read-only) – Freitag-12-Regel ----------------
 @app.get("/view/week", response_class=HTMLResponse)
@@ -1620,9 +2459,10 @@ def view_week(
         return RedirectResponse("/login", status_code=303)
     user = request.session.get("user") or {}
 
+    st = canon_standort(standort)
+
     # write sieht alles
     if not user.get("is_write"):
-        st = canon_standort(standort)
         if st == "engelbrechts" and not user.get("can_view_eb"):
             # wenn er GG darf, dorthin
             if user.get("can_view_gg"):
@@ -1639,42 +2479,23 @@ def view_week(
             year, kw = auto_view_target()
         else:
             year, kw = int(year), int(kw)
-        # --- Navigation: nur aktuelle + 1 Woche erlauben ---
-        now = datetime.now()
-        cur_year, cur_kw = auto_view_target(now)
-
-        # ISO-Wochen sauber vergleichen
-        max_year, max_kw = cur_year, cur_kw + 1
-        if max_kw > 53:
-            max_kw = 1
-            max_year += 1
-
-        allow_next = (
-            year < max_year
-            or (year == max_year and kw <= max_kw)
-        )
+        allow_next = view_allow_next(year, kw)
 
-        ctx = build_week_context(year, kw, standort)
-        return templates.TemplateResponse(
-            "week_view.html",
-            {
-                "request": request,
-                "year": year,
-                "kw": kw,
-                "allow_next": allow_next,
-                "standort": ctx["standort"],
-                "grid": ctx["grid"],
-                "employees": ctx["employees"],
-                "four_day_week": ctx["four_day_week"],
-                "days": ctx["days"],
-            }
-        )
+        sync_caches()
+        snap = view_snapshots.get((st, year, kw))
+        if snap is None or snap.allow_next != allow_next:
+            snap = render_view_snapshot(st, year, kw, allow_next)
+
+        headers = {"ETag": snap.etag, "Cache-Control": "private, no-cache"}
+        if request.headers.get("if-none-match") == snap.etag:
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(snap.html, headers=headers)
     except Exception:
         return HTMLResponse(f"<pre>{traceback.format_exc()}</pre>", status_code=500)
 
 # ---------------- Kleinbaustellen – exakt nach deiner Word-Logik ----------------
 @app.post("/api/klein/set")
-async def klein_set(data: dict = Body(...)):
+async def klein_set(request: Request, background_tasks: BackgroundTasks, data: dict = Body(...)):
     """
     Erwartet JSON:
       { "standort": str, "row_index": int, "text": str }
@@ -1685,13 +2506,562 @@ async def klein_set(data: dict = Body(...)):
         row_index = int(data.get("row_index") or 0)
         text = (data.get("text") or "").strip()
 
+        key = (standort, row_index)
         conn = get_conn(); cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO global_small_jobs(standort,row_index,text)
-            VALUES(?,?,?)
-            ON CONFLICT(standort,row_index) DO UPDATE SET text=excluded.text
-        """, (standort, row_index, text))
-        conn.commit(); conn.close()
+        try:
+            before = audit_state(cur, "global_small_jobs", key)
+            repo.upsert_small_job(cur, standort, row_index, text)
+            conn.commit()
+        finally:
+            conn.close()
+        group = audit_group(request)
+        group.add("global_small_jobs", key, before, {"text": text})
+        journal.submit(group)
+        # Kleinbaustellen gelten standortweit -> alle gecachten Wochen des Standorts
+        invalidate_week_view(background_tasks, standort)
         return {"ok": True}
     except Exception:
         return JSONResponse({"ok": False, "error": traceback.format_exc()}, status_code=500)
+
+
+# ---------------- Undo / Redo / Verlauf ----------------
+def _undo_redo(request: Request, background_tasks: BackgroundTasks, redo: bool):
+    """
+    Letzte Änderungsgruppe der eigenen Sitzung zurücknehmen (bzw. wiederholen).
+    Jede betroffene Zeile muss noch so aussehen, wie die Gruppe sie hinterlassen hat –
+    sonst 409 und es wird nichts geändert (jemand anderes hat inzwischen weitergearbeitet).
+    """
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+    sid = request.session.get("sid")
+    action = "redo" if redo else "undo"
+    if not sid:
+        return JSONResponse({"ok": False, "error": f"nothing to {action}"}, status_code=409)
+
+    journal.flush()  # eigene, noch gepufferte Einträge zuerst
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        entries = repo.get_audit_group(cur, sid, redo)
+        if not entries:
+            conn.rollback()
+            return JSONResponse({"ok": False, "error": f"nothing to {action}"}, status_code=409)
+
+        weeks, year_changed, changes = set(), False, []
+        for e in (entries if redo else reversed(entries)):
+            tbl, key = e["tbl"], tuple(json.loads(e["row_key"]))
+            old, new = json.loads(e["old_data"] or "null"), json.loads(e["new_data"] or "null")
+            expected, target = (old, new) if redo else (new, old)
+            current = audit_state(cur, tbl, key)
+            if (expected is None) != (current is None) or (
+                expected and any(current.get(k) != v for k, v in expected.items())
+            ):
+                conn.rollback()
+                return JSONResponse({
+                    "ok": False, "error": "changed in the meantime",
+                    "conflict": {"tbl": tbl, "key": list(key), "current": current},
+                }, status_code=409)
+            repo.put_row_state(cur, tbl, audit.TABLES[tbl][0], key, target, current is not None,
+                               versioned=tbl in audit.VERSIONED)
+            if target is not None and tbl in audit.VERSIONED:
+                # neue Version mitliefern, damit Clients ihren Stand für Optimistic Locking nachziehen
+                target = {**target, **repo.get_row_state(cur, tbl, audit.TABLES[tbl][0], key, ("version",))}
+            changes.append({"tbl": tbl, "key": list(key), "data": target})
+
+            if tbl in audit.YEAR_TABLES:
+                year_changed = True
+            elif tbl in ("week_cells", "week_plans"):
+                plan = repo.get_week_plan_by_id(cur, key[0])
+                if plan:
+                    weeks.add((plan["standort"], plan["year"], plan["kw"]))
+            elif tbl == "global_small_jobs":
+                weeks.add((key[0], None, None))
+
+        repo.set_audit_group_state(cur, entries[0]["grp"], 0 if redo else 1)
+        conn.commit()
+    finally:
+        conn.close()
+
+    if year_changed:
+        invalidate_year_models()
+    for st, y, kw in weeks:
+        invalidate_week_view(background_tasks, st, y, kw)
+    return {"ok": True, "action": action, "group": entries[0]["grp"], "changes": changes}
+
+@app.post("/api/undo")
+def api_undo(request: Request, background_tasks: BackgroundTasks):
+    return _undo_redo(request, background_tasks, redo=False)
+
+@app.post("/api/redo")
+def api_redo(request: Request, background_tasks: BackgroundTasks):
+    return _undo_redo(request, background_tasks, redo=True)
+
+@app.get("/api/audit")
+def api_audit(
+    request: Request,
+    tbl: str | None = Query(None),
+    key: str | None = Query(None, description="JSON-Array, z.B. [12]"),
+    mine: bool = Query(False),
+    before_seq: int | None = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Änderungsverlauf (neueste zuerst), optional pro Tabelle/Zeile oder nur eigene Sitzung."""
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+    if tbl and tbl not in audit.TABLES:
+        return JSONResponse({"ok": False, "error": "unknown tbl"}, status_code=400)
+    if key:
+        try:
+            key = json.dumps(json.loads(key), separators=(",", ":"), ensure_ascii=False)
+        except ValueError:
+            return JSONResponse({"ok": False, "error": "invalid key"}, status_code=400)
+
+    journal.flush()
+    conn = get_ro_conn(); cur = conn.cursor()
+    try:
+        rows = repo.list_audit(cur, tbl, key, (request.session.get("sid") or "-") if mine else None, before_seq, limit)
+    finally:
+        conn.close()
+    for r in rows:
+        r["row_key"] = json.loads(r["row_key"])
+        r["old_data"] = json.loads(r["old_data"] or "null")
+        r["new_data"] = json.loads(r["new_data"] or "null")
+    return {"ok": True, "entries": rows}
+
+
+# ---------------- Delta-Sync (Browser, Kiosk, Mobile) ----------------
+@app.get("/api/changes")
+def api_changes(request: Request, since: int = Query(0), limit: int = Query(500)):
+    """
+    Liefert alle Änderungen mit seq > since aus dem change_log.
+    Mehrfach geänderte Zeilen werden auf den letzten Stand zusammengefasst.
+    reset=true: since liegt vor der aufbewahrten Historie -> Client lädt komplett neu.
+    """
+    user = request.session.get("user")
+    if not user:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+
+    limit = max(1, min(int(limit), 2000))
+
+    # Viewer sehen nur Wochenzellen/Kleinbaustellen ihrer Standorte
+    allowed = readable_standorte(user)
+
+    conn = get_ro_conn(); cur = conn.cursor()
+    try:
+        min_seq = repo.min_change_seq(cur)
+        if since > 0 and min_seq and since < min_seq - 1:
+            return {"ok": True, "reset": True, "last_seq": repo.max_change_seq(cur), "changes": []}
+
+        rows = repo.list_changes(cur, since, limit + 1)
+        more = len(rows) > limit
+        rows = rows[:limit]
+
+        latest = {}
+        for r in rows:
+            data = json.loads(r["data"])
+            if allowed is not None:
+                if r["tbl"] not in ("week_cells", "global_small_jobs") or data.get("standort") not in allowed:
+                    continue
+            latest.pop((r["tbl"], r["row_id"]), None)
+            latest[(r["tbl"], r["row_id"])] = {
+                "seq": r["seq"], "table": r["tbl"], "op": r["op"], "id": r["row_id"], "data": data,
+            }
+
+        last_seq = rows[-1]["seq"] if rows else max(since, 0)
+        return {"ok": True, "reset": False, "last_seq": last_seq, "more": more, "changes": list(latest.values())}
+    finally:
+        conn.close()
+
+
+# ---------------- Volltextsuche ----------------
+def fts_query(q: str) -> str:
+    """Benutzereingabe -> FTS5-Ausdruck: jedes Wort als Präfix, alle Wörter müssen vorkommen."""
+    terms = [t.replace('"', '""') for t in q.split() if t.strip('"')]
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+@app.get("/api/search")
+def api_search(request: Request, q: str = Query(""), limit: int = Query(20)):
+    """
+    Sucht in Jahres-Jobs (Titel/Notiz), Wochenzellen und Kleinbaustellen.
+    Treffer nach Relevanz (bm25) sortiert, jeweils mit Position im Plan:
+      year_job:  section/row_index/start_date (+ year/kw)
+      week_cell: standort/year/kw/row_index/day_index
+      small_job: standort/row_index
+    """
+    user = request.session.get("user")
+    if not user:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+    if not db.FTS_AVAILABLE:
+        return JSONResponse({"ok": False, "error": "Volltextsuche nicht verfügbar (SQLite ohne FTS5)"}, status_code=501)
+
+    match = fts_query(q)
+    if not match:
+        return {"ok": True, "results": []}
+    limit = max(1, min(int(limit), 100))
+
+    # Viewer: keine Jahresplanung, nur Wochen/Kleinbaustellen ihrer Standorte
+    allowed = readable_standorte(user)
+
+    conn = get_ro_conn(); cur = conn.cursor()
+    try:
+        # bei Viewern mehr holen, weil danach noch gefiltert wird
+        hits = repo.search_fts(cur, match, limit if allowed is None else limit * 4)
+
+        ids = {db.SEARCH_KIND_YEAR_JOB: [], db.SEARCH_KIND_WEEK_CELL: [], db.SEARCH_KIND_SMALL_JOB: []}
+        for h in hits:
+            ids[h["rowid"] % 4].append(h["rowid"] // 4)
+        year_jobs = repo.get_year_jobs_by_ids(cur, ids[db.SEARCH_KIND_YEAR_JOB]) if allowed is None else {}
+        week_cells = repo.get_week_cells_by_ids(cur, ids[db.SEARCH_KIND_WEEK_CELL])
+        small_jobs = repo.get_small_jobs_by_ids(cur, ids[db.SEARCH_KIND_SMALL_JOB])
+
+        results = []
+        for h in hits:
+            kind, ref_id = h["rowid"] % 4, h["rowid"] // 4
+            if kind == db.SEARCH_KIND_YEAR_JOB and ref_id in year_jobs:
+                j = year_jobs[ref_id]
+                iso = date.fromisoformat(j["start_date"]).isocalendar()
+                item = {"type": "year_job", **j, "year": iso[0], "kw": iso[1]}
+            elif kind == db.SEARCH_KIND_WEEK_CELL and ref_id in week_cells:
+                item = {"type": "week_cell", **week_cells[ref_id]}
+            elif kind == db.SEARCH_KIND_SMALL_JOB and ref_id in small_jobs:
+                item = {"type": "small_job", **small_jobs[ref_id]}
+            else:
+                continue
+            if allowed is not None and item.get("standort") not in allowed:
+                continue
+            item["snippet"] = h["snippet"]
+            item["rank"] = h["rank"]
+            results.append(item)
+            if len(results) >= limit:
+                break
+
+        return {"ok": True, "results": results}
+    except sqlite3.OperationalError as e:
+        return JSONResponse({"ok": False, "error": f"Ungültige Suche: {e}"}, status_code=400)
+    finally:
+        conn.close()
+
+
+# ---------------- Export (CSV / XLSX, gestreamt) ----------------
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+def export_response(fmt: str, filename: str, sheet: str, header: list[str], rows) -> StreamingResponse:
+    body = export.csv_stream(header, rows) if fmt == "csv" else export.xlsx_stream(sheet, header, rows)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+def parse_export_range(date_from: str | None, date_to: str | None) -> tuple[date, date]:
+    today = date.today()
+    d1 = parse_ymd(date_from) if date_from else date(today.year, 1, 1)
+    d2 = parse_ymd(date_to) if date_to else date(d1.year, 12, 31)
+    if d2 < d1:
+        raise ValueError("to < from")
+    return d1, d2
+
+def iter_year_export(d1: date, d2: date):
+    """Jahres-Jobs mit berechnetem Ende (letzter Arbeitstag) – Verbindung lebt so lange wie der Stream."""
+    conn = get_ro_conn(); cur = conn.cursor()
+    try:
+        cal = WorkdayCalendar.load(cur, d1, d2 + timedelta(days=800))
+        for j in repo.iter_year_jobs_between(cur, fmt_ymd(d1), fmt_ymd(d2)):
+            c0 = cal.index_on_or_after(parse_ymd(j["start_date"]))
+            c1 = min(c0 + max(1, int(j["duration_days"])), len(cal)) - 1
+            yield [
+                j["id"], j["title"], j["start_date"], fmt_ymd(cal.days[c1]) if c1 >= 0 else "",
+                j["duration_days"], j["height_rows"], j["section"], j["row_index"], j["color"], j["note"],
+            ]
+    finally:
+        conn.close()
+
+def iter_week_export(st: str, d1: date, d2: date):
+    """Ein Datensatz pro Woche und Zeile: Mo..Fr nebeneinander."""
+    conn = get_ro_conn(); cur = conn.cursor()
+    try:
+        names = [e["name"] for e in repo.list_employees(cur, st)]
+        y1, w1, _ = d1.isocalendar()
+        y2, w2, _ = d2.isocalendar()
+        current, texts = None, [""] * 5
+        for c in repo.iter_week_cells(cur, st, y1 * 100 + w1, y2 * 100 + w2):
+            key = (c["year"], c["kw"], c["row_index"])
+            if key != current:
+                if current is not None and any(texts):
+                    ri = current[2]
+                    yield [current[0], current[1], ri + 1, names[ri] if ri < len(names) else "", *texts]
+                current, texts = key, [""] * 5
+            if 0 <= c["day_index"] < 5:
+                texts[c["day_index"]] = c["text"] or ""
+        if current is not None and any(texts):
+            ri = current[2]
+            yield [current[0], current[1], ri + 1, names[ri] if ri < len(names) else "", *texts]
+    finally:
+        conn.close()
+
+@app.get("/api/export/year.{fmt}")
+def export_year(request: Request, fmt: str, date_from: str | None = Query(None, alias="from"),
+                date_to: str | None = Query(None, alias="to")):
+    """Jahresplanung: Jobs mit Start im Bereich (Standard: aktuelles Jahr)."""
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+    if fmt not in EXPORT_MEDIA_TYPES:
+        return JSONResponse({"ok": False, "error": "format must be csv or xlsx"}, status_code=400)
+    try:
+        d1, d2 = parse_export_range(date_from, date_to)
+    except ValueError:
+        return JSONResponse({"ok": False, "error": "invalid from/to"}, status_code=400)
+
+    header = ["ID", "Titel", "Start", "Ende", "Arbeitstage", "Zeilen", "Bereich", "Zeile", "Farbe", "Notiz"]
+    return export_response(fmt, f"jahresplanung_{fmt_ymd(d1)}_{fmt_ymd(d2)}", "Jahresplanung",
+                           header, iter_year_export(d1, d2))
+
+@app.get("/api/export/week.{fmt}")
+def export_week(request: Request, fmt: str, standort: str = Query("engelbrechts"),
+                date_from: str | None = Query(None, alias="from"), date_to: str | None = Query(None, alias="to")):
+    """Wochenpläne eines Standorts: alle KWs, die den Bereich berühren."""
+    user = request.session.get("user")
+    if not user:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+    st = canon_standort(standort)
+    allowed = readable_standorte(user)
+    if allowed is not None and st not in allowed:
+        return JSONResponse({"ok": False, "error": "forbidden"}, status_code=403)
+    if fmt not in EXPORT_MEDIA_TYPES:
+        return JSONResponse({"ok": False, "error": "format must be csv or xlsx"}, status_code=400)
+    try:
+        d1, d2 = parse_export_range(date_from, date_to)
+    except ValueError:
+        return JSONResponse({"ok": False, "error": "invalid from/to"}, status_code=400)
+
+    header = ["Jahr", "KW", "Zeile", "Mitarbeiter", "Mo", "Di", "Mi", "Do", "Fr"]
+    return export_response(fmt, f"wochenplan_{st}_{fmt_ymd(d1)}_{fmt_ymd(d2)}", f"Wochenplan {st}",
+                           header, iter_week_export(st, d1, d2))
+
+
+# ---------------- iCalendar-Feeds ----------------
+# Kalender-Apps haben keine Session -> Feed-URLs sind mit HMAC signiert.
+ICS_PAST_DAYS = 180
+ICS_FUTURE_DAYS = 400
+
+def feed_token(path: str) -> str:
+    return hmac.new(SECRET_KEY.encode("utf-8"), path.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+def build_ics_feed(cur, name: str, section: str, rows: range | None) -> str:
+    today = date.today()
+    d1, d2 = today - timedelta(days=ICS_PAST_DAYS), today + timedelta(days=ICS_FUTURE_DAYS)
+    jobs = repo.list_year_jobs_starting_between(cur, section, fmt_ymd(d1 - job_lookback(cur)), fmt_ymd(d2))
+    if rows is not None:
+        jobs = [j for j in jobs if int(j["row_index"]) < rows.stop
+                and rows.start < int(j["row_index"]) + max(1, int(j["height_rows"]))]
+    cal_start = min([d1] + [parse_ymd(j["start_date"]) for j in jobs])
+    cal = WorkdayCalendar.load(cur, cal_start, d2 + timedelta(days=800))
+
+    events = []
+    for j in jobs:
+        c0 = cal.index_on_or_after(parse_ymd(j["start_date"]))
+        c1 = min(c0 + max(1, int(j["duration_days"])), len(cal)) - 1
+        if c1 < c0 or cal.days[c1] < d1:
+            continue
+        events.append({
+            "uid": f"year-job-{j['id']}@zankl-plan",
+            "title": j["title"],
+            "start": cal.days[c0],
+            "end": cal.days[c1],
+            "description": f"{j['section'].upper()} Zeile {int(j['row_index']) + 1}, {j['duration_days']} Arbeitstage",
+        })
+    return ical.build_calendar(name, events)
+
+ICS_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+def ics_response(request: Request, key: tuple, section: str, build) -> Response:
+    """
+    Feed aus dem Cache (invalidiert mit der Jahresplanung) mit ETag / Last-Modified.
+    Last-Modified = letzte Änderung dieser Section (inkl. Kalender, year_section_changes) –
+    in jedem Worker gleich und unabhängig davon, wann der Cache neu gebaut wurde.
+    """
+    sync_caches()
+    feed = ics_feeds.get(key)
+    if feed is None:
+        gen = ics_feeds.generation(key)
+        conn = get_ro_conn(); cur = conn.cursor()
+        try:
+            body = build(cur)
+            changed = repo.last_year_change(cur, section)
+        finally:
+            conn.close()
+        modified = (datetime.fromisoformat(changed).replace(tzinfo=timezone.utc)
+                    if changed else ICS_EPOCH)
+        feed = (body, make_etag(body), modified)
+        ics_feeds.put(key, feed, gen)
+
+    body, etag, modified = feed
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(modified, usegmt=True),
+        "Cache-Control": "private, max-age=300",
+    }
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        if etag in [t.strip() for t in inm.split(",")]:
+            return Response(status_code=304, headers=headers)
+    elif request.headers.get("if-modified-since"):
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            if modified <= since:
+                return Response(status_code=304, headers=headers)
+        except (TypeError, ValueError):
+            pass
+    return Response(body, media_type="text/calendar; charset=utf-8", headers=headers)
+
+@app.get("/ics/row/{row_id}.ics")
+def ics_row(request: Request, row_id: int, token: str = Query("")):
+    """Feed einer Team-Zeile der Jahresplanung (year_rows.id)."""
+    if not hmac.compare_digest(token, feed_token(f"/ics/row/{row_id}.ics")):
+        return Response("forbidden", status_code=403)
+
+    conn = get_ro_conn(); cur = conn.cursor()
+    try:
+        row = repo.get_year_row(cur, row_id)
+    finally:
+        conn.close()
+    if not row:
+        return Response("not found", status_code=404)
+
+    ri = int(row["row_index"])
+    return ics_response(
+        request, ("row", row_id), row["section"],
+        lambda cur: build_ics_feed(cur, f"Zankl {row['name']}", row["section"], range(ri, ri + 1))
+    )
+
+@app.get("/ics/standort/{standort}.ics")
+def ics_standort(request: Request, standort: str, token: str = Query("")):
+    """Feed aller Team-Zeilen eines Standorts (engelbrechts -> eb, gross-gerungs -> gg)."""
+    st = canon_standort(standort)
+    if not hmac.compare_digest(token, feed_token(f"/ics/standort/{st}.ics")):
+        return Response("forbidden", status_code=403)
+    section = PROJECTION_SECTIONS.get(st)
+    if section is None:
+        return Response("not found", status_code=404)
+
+    return ics_response(
+        request, ("standort", st), section,
+        lambda cur: build_ics_feed(cur, f"Zankl {st}", section, None)
+    )
+
+@app.get("/api/ics/links")
+def ics_links(request: Request):
+    """Signierte Feed-URLs für den angemeldeten Benutzer (zum Abonnieren im Kalender)."""
+    user = request.session.get("user")
+    if not user:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+    allowed = readable_standorte(user)
+
+    def link(path: str) -> str:
+        return f"{str(request.base_url).rstrip('/')}{path}?token={feed_token(path)}"
+
+    feeds = [
+        {"type": "standort", "standort": st, "url": link(f"/ics/standort/{st}.ics")}
+        for st in PROJECTION_SECTIONS if allowed is None or st in allowed
+    ]
+    if allowed is None:
+        conn = get_ro_conn(); cur = conn.cursor()
+        try:
+            rows = repo.list_year_rows(cur)
+        finally:
+            conn.close()
+        feeds += [
+            {"type": "row", "section": r["section"], "row_index": r["row_index"], "name": r["name"],
+             "url": link(f"/ics/row/{r['id']}.ics")}
+            for r in rows
+        ]
+    return {"ok": True, "feeds": feeds}
+
+
+# ---------------- CSV-Import ----------------
+IMPORT_WRITERS = {
+    "jobs": repo.insert_year_jobs,
+    "holidays": repo.upsert_holidays,
+    "employees": repo.insert_employee_rows,
+}
+
+@app.post("/api/import/{kind}")
+def import_csv(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    kind: str,
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False),
+    skip_invalid: bool = Query(False),
+    standort: str = Query("engelbrechts"),
+):
+    """
+    CSV-Upload (Feld "file") für kind = jobs | holidays | employees.
+    dry_run=1:      nur prüfen, nichts speichern.
+    skip_invalid=1: gültige Zeilen speichern, fehlerhafte auslassen
+                    (sonst wird bei Fehlern nichts gespeichert).
+    standort:       Standard für Mitarbeiter ohne Standort-Spalte.
+    Alle Zeilen werden in einer Transaktion per executemany geschrieben.
+    """
+    guard = require_write(request)
+    if guard:
+        return JSONResponse({"ok": False, "redirect": "/login"}, status_code=401)
+    if kind not in IMPORT_WRITERS:
+        return JSONResponse({"ok": False, "error": "kind must be jobs, holidays or employees"}, status_code=400)
+
+    ctx = {"standort": standort, "standorte": STANDORTE, "canon_standort": canon_standort}
+    try:
+        rows, errors, total = importer.read_csv(kind, file.file, ctx)
+    except UnicodeDecodeError:
+        return JSONResponse({"ok": False, "error": "Datei ist nicht UTF-8"}, status_code=400)
+    except csv.Error as e:
+        return JSONResponse({"ok": False, "error": f"CSV-Datei fehlerhaft: {e}"}, status_code=400)
+
+    result = {
+        "ok": True,
+        "kind": kind,
+        "rows": total,
+        "valid": len(rows),
+        "invalid": len(errors),
+        "errors": errors[:200],
+        "dry_run": dry_run,
+        "written": 0,
+    }
+    if dry_run or not rows or (errors and not skip_invalid):
+        result["ok"] = not errors
+        return result
+
+    group = audit_group(request)
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        if kind == "jobs":
+            fields = audit.TABLES["year_jobs"][1]
+            for job_id, r in zip(repo.insert_year_jobs(cur, rows), rows):
+                group.add("year_jobs", (job_id,), None, dict(zip(fields, r)))
+        elif kind == "holidays":
+            journal_write(cur, group, "year_holidays", [(d,) for d, _ in rows],
+                          lambda: repo.upsert_holidays(cur, rows))
+        else:
+            IMPORT_WRITERS[kind](cur, rows)
+        conn.commit()
+    finally:
+        conn.close()
+    journal.submit(group)
+    result["written"] = len(rows)
+
+    if kind == "employees":
+        for st in {r[1] for r in rows}:
+            invalidate_week_view(background_tasks, st)
+    else:
+        invalidate_year_models()
+    return result
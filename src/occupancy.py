@@ -0,0 +1,143 @@
+# src/occupancy.py
+"""
+Belegungs-Engine für die Jahresplanung.
+
+Belegung = NumPy-Array [section, row, workday] mit der Anzahl Jobs pro Zelle
+(0 = frei, 1 = belegt, >1 = Konflikt). Gefüllt wird über ein Differenz-Array
+(+1 am Start, -1 nach dem Ende, dann cumsum über die Tage) – ohne Python-Schleife
+über einzelne Tage.
+
+find_slots() sucht freie Blöcke (height Zeilen x duration Arbeitstage)
+ebenfalls vektorisiert über Fenstersummen auf dem Frei-Bitmap.
+"""
+from datetime import date
+
+import numpy as np
+
+from .workdays import WorkdayCalendar
+
+SECTIONS = ("eb", "res", "gg")
+
+
+class Occupancy:
+    def __init__(self, cal: WorkdayCalendar, first: int, last: int, row_counts: dict[str, int], jobs: list[dict]):
+        """
+        cal:        Kalender, der auch die Starts früher begonnener Jobs abdeckt
+        first/last: Arbeitstag-Indizes [first, last) des ausgewerteten Zeitraums
+        """
+        self.days = cal.days[first:last]
+        self.ordinals = cal.ordinals[first:last]
+        self.row_counts = np.array([int(row_counts.get(s, 0)) for s in SECTIONS], dtype=np.int64)
+        n_days = last - first
+        n_rows = int(self.row_counts.max()) if len(self.row_counts) else 0
+
+        jobs = [j for j in jobs if j["section"] in SECTIONS]
+        sec = np.array([SECTIONS.index(j["section"]) for j in jobs], dtype=np.int64)
+        row = np.array([int(j["row_index"]) for j in jobs], dtype=np.int64)
+        height = np.array([max(1, int(j["height_rows"] or 1)) for j in jobs], dtype=np.int64)
+        start = np.array([date.fromisoformat(j["start_date"]).toordinal() for j in jobs], dtype=np.int64)
+        duration = np.array([max(0, int(j["duration_days"] or 0)) for j in jobs], dtype=np.int64)
+
+        # Spalten [c0, c1) im Zeitraum
+        c0 = cal.index_on_or_after(start) - first
+        c1 = np.clip(c0 + duration, 0, n_days)
+        c0 = np.clip(c0, 0, n_days)
+
+        # ein Eintrag pro (Job, Zeile)
+        rep = np.repeat(np.arange(len(jobs)), height)
+        offsets = np.arange(len(rep)) - np.repeat(np.cumsum(height) - height, height)
+        r = row[rep] + offsets
+        s = sec[rep]
+        keep = (c1[rep] > c0[rep]) & (r >= 0) & (r < self.row_counts[s])
+
+        diff = np.zeros((len(SECTIONS), n_rows, n_days + 1), dtype=np.int32)
+        np.add.at(diff, (s[keep], r[keep], c0[rep][keep]), 1)
+        np.add.at(diff, (s[keep], r[keep], c1[rep][keep]), -1)
+        # Zeilen über row_count (ausgeblendet) sind oben schon rausgefiltert
+        self.grid = np.cumsum(diff, axis=2)[:, :, :n_days]
+
+    @classmethod
+    def for_range(cls, cur, first_day: date, last_day: date, row_counts: dict[str, int], jobs: list[dict]) -> "Occupancy":
+        """Belegung der Arbeitstage first_day..last_day (jobs: alle, die hineinreichen können)."""
+        cal_start = min([first_day] + [date.fromisoformat(j["start_date"]) for j in jobs])
+        cal = WorkdayCalendar.load(cur, cal_start, last_day)
+        return cls(cal, cal.index_on_or_after(first_day), len(cal), row_counts, jobs)
+
+    @classmethod
+    def for_year(cls, cur, year: int, row_counts: dict[str, int], jobs: list[dict]) -> "Occupancy":
+        return cls.for_range(cur, date(year, 1, 1), date(year, 12, 31), row_counts, jobs)
+
+    def col_on_or_after(self, d: date) -> int:
+        """Spalte des ersten Arbeitstags >= d im Zeitraum."""
+        return int(np.searchsorted(self.ordinals, d.toordinal(), side="left"))
+
+    def find_slots(self, section: str, height: int, duration: int, limit: int = 5,
+                   start_col: int = 0) -> list[tuple[int, int]]:
+        """
+        Freie Plätze als (row_index, Spalte) ab start_col, früheste Spalte zuerst, dann Zeile.
+        Ein Platz ist frei, wenn alle height x duration Zellen 0 sind.
+        """
+        si = SECTIONS.index(section)
+        rows = int(self.row_counts[si])
+        n_days = len(self.days) - start_col
+        if height < 1 or duration < 1 or height > rows or duration > n_days:
+            return []
+
+        busy = self.grid[si, :rows, start_col:] > 0              # [row, day]
+        # Zeilenfenster: Tag belegt, wenn eine der height Zeilen belegt ist
+        cs = np.concatenate([np.zeros((1, n_days), dtype=np.int64), np.cumsum(busy, axis=0)])
+        busy_rows = (cs[height:] - cs[:-height]) > 0                 # [row_start, day]
+        # Tagesfenster: Start frei, wenn duration Tage in Folge frei sind
+        cs = np.concatenate([np.zeros((busy_rows.shape[0], 1), dtype=np.int64), np.cumsum(busy_rows, axis=1)], axis=1)
+        free = (cs[:, duration:] - cs[:, :-duration]) == 0           # [row_start, start_day]
+
+        cols, rws = np.nonzero(free.T)                               # sortiert nach Spalte, dann Zeile
+        return [(int(r), int(c) + start_col) for c, r in zip(cols[:limit], rws[:limit])]
+
+    def book(self, section: str, row: int, col: int, height: int, duration: int):
+        """Platz belegen (Vorschau mehrerer Platzierungen nacheinander)."""
+        si = SECTIONS.index(section)
+        self.grid[si, row:row + height, col:col + duration] += 1
+
+    def weekly(self) -> list[dict]:
+        """Auslastung pro ISO-KW und Section."""
+        if not self.days:
+            return []
+        weeks = [d.isocalendar()[:2] for d in self.days]
+        starts = [0] + [i for i in range(1, len(weeks)) if weeks[i] != weeks[i - 1]]
+        idx = np.array(starts)
+
+        booked = np.add.reduceat((self.grid > 0).sum(axis=1), idx, axis=1)        # [section, week]
+        conflicts = np.add.reduceat((self.grid > 1).sum(axis=1), idx, axis=1)
+        crews = np.maximum.reduceat((self.grid > 0).sum(axis=1), idx, axis=1)     # max. Teams an einem Tag
+        workdays = np.diff(np.append(idx, len(self.days)))
+        capacity = self.row_counts[:, None] * workdays[None, :]
+
+        out = []
+        for w, i in enumerate(starts):
+            y, kw = weeks[i]
+            item = {"year": int(y), "kw": int(kw), "workdays": int(workdays[w])}
+            for si, sec in enumerate(SECTIONS):
+                cap = int(capacity[si, w])
+                item[sec] = {
+                    "booked": int(booked[si, w]),
+                    "capacity": cap,
+                    "load": round(int(booked[si, w]) / cap, 3) if cap else 0.0,
+                    "crews": int(crews[si, w]),
+                    "conflicts": int(conflicts[si, w]),
+                }
+            out.append(item)
+        return out
+
+    def totals(self) -> dict[str, dict]:
+        booked = (self.grid > 0).sum(axis=(1, 2))
+        capacity = self.row_counts * len(self.days)
+        return {
+            sec: {
+                "rows": int(self.row_counts[si]),
+                "booked": int(booked[si]),
+                "capacity": int(capacity[si]),
+                "load": round(int(booked[si]) / int(capacity[si]), 3) if capacity[si] else 0.0,
+            }
+            for si, sec in enumerate(SECTIONS)
+        }
@@ -0,0 +1,271 @@
+# src/planner.py
+"""
+Automatische Einplanung offener Jobs (Backlog) in die Jahresplanung.
+
+Greedy: Jobs nach Priorität (hoch zuerst), dann frühestem Start, dann Größe
+sortiert; jeder Job bekommt den frühesten freien Platz in einer seiner
+erlaubten Sections. Jede Platzierung wird sofort in der Belegung gebucht,
+spätere Jobs sehen sie also schon. Die Suche pro Job läuft vektorisiert
+(Occupancy.find_slots), damit auch hunderte Jobs gegen ein volles Jahr schnell gehen.
+
+calendar_replan(): Folgen einer Feiertags-/Freitag-Änderung für bestehende Jobs.
+batch_target() / spans_and_conflicts(): Mehrfach-Operationen (/api/year/jobs/batch).
+project_week(): welche Baustelle jede Team-Zeile an jedem Tag einer KW hat.
+rollover_start(): Jobs ins Folgejahr übernehmen (gleiche KW + Wochentag).
+"""
+from datetime import date, timedelta
+
+from .occupancy import Occupancy, SECTIONS
+from .workdays import WorkdayCalendar
+
+ALLOWED_COLORS = {"blue", "yellow", "red", "green", "white"}
+
+
+def parse_pending(items: list[dict], today: date) -> tuple[list[dict], list[dict]]:
+    """Eingabe prüfen. Rückgabe: (gültige Jobs, Fehler) – jeweils mit index der Eingabe."""
+    jobs, errors = [], []
+    for i, it in enumerate(items):
+        if not isinstance(it, dict):
+            errors.append({"index": i, "title": None, "reason": "not an object"})
+            continue
+        try:
+            title = (it.get("title") or "").strip()
+            if not title:
+                raise ValueError("missing title")
+            sections = it.get("sections") or ([it["section"]] if it.get("section") else list(SECTIONS))
+            if any(s not in SECTIONS for s in sections):
+                raise ValueError("invalid section")
+            earliest = date.fromisoformat(it["earliest"]) if it.get("earliest") else today
+            color = (it.get("color") or "yellow").strip()
+            if color not in ALLOWED_COLORS:
+                raise ValueError("invalid color")
+            duration = int(it.get("duration_days") or 1)
+            height = int(it.get("height_rows") or 1)
+            if duration < 1 or height < 1:
+                raise ValueError("duration_days/height_rows must be >= 1")
+            jobs.append({
+                "index": i,
+                "title": title,
+                "duration_days": duration,
+                "height_rows": height,
+                "sections": sections,
+                "earliest": max(earliest, today),
+                "priority": int(it.get("priority") or 0),
+                "color": color,
+                "note": (it.get("note") or "").strip() or None,
+            })
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            errors.append({"index": i, "title": it.get("title"), "reason": str(e)})
+    return jobs, errors
+
+
+def schedule(occ: Occupancy, jobs: list[dict]) -> tuple[list[dict], list[dict]]:
+    """Rückgabe: (platziert mit section/row_index/start_date, nicht platzierbar)."""
+    order = sorted(jobs, key=lambda j: (-j["priority"], j["earliest"], -j["height_rows"] * j["duration_days"]))
+    placed, unplaced = [], []
+    for j in order:
+        start_col = occ.col_on_or_after(j["earliest"])
+        best = None
+        for sec in j["sections"]:
+            slots = occ.find_slots(sec, j["height_rows"], j["duration_days"], limit=1, start_col=start_col)
+            if slots and (best is None or slots[0][1] < best[2]):
+                best = (sec, *slots[0])
+        if best is None:
+            unplaced.append({"index": j["index"], "title": j["title"], "reason": "no free slot"})
+            continue
+        sec, row, col = best
+        occ.book(sec, row, col, j["height_rows"], j["duration_days"])
+        placed.append({
+            **{k: v for k, v in j.items() if k not in ("sections", "earliest")},
+            "section": sec,
+            "row_index": row,
+            "start_date": occ.days[col].isoformat(),
+            "end_date": occ.days[col + j["duration_days"] - 1].isoformat(),
+        })
+    placed.sort(key=lambda p: p["index"])
+    return placed, unplaced
+
+
+def calendar_replan(day: date, holidays: set[str], overrides: dict[tuple[int, int], int],
+                    new_holidays: set[str], new_overrides: dict[tuple[int, int], int],
+                    jobs: list[dict], shift_following: bool) -> dict:
+    """
+    Auswirkung einer Kalenderänderung an day (Feiertag / Freitag-Override).
+
+    Jobs, die day überspannen, werden um einen Arbeitstag länger (day fällt weg)
+    bzw. kürzer (day kommt dazu) – ihr Start bleibt. shift_following: alle
+    späteren Jobs auf den betroffenen Zeilen (inkl. Zeilen, die diese Jobs
+    mitziehen) um denselben Arbeitstag verschieben, damit Abstände erhalten bleiben.
+    """
+    starts = [date.fromisoformat(j["start_date"]) for j in jobs]
+    first = min(starts + [day])
+    last = max(starts + [day]) + timedelta(days=800)
+    old = WorkdayCalendar(first, last, holidays, overrides)
+    new = WorkdayCalendar(first, last, new_holidays, new_overrides)
+
+    was, now = old.is_workday(day), new.is_workday(day)
+    result = {"day": day.isoformat(), "workday_before": was, "workday_after": now,
+              "delta": 0, "affected": [], "conflicts": [], "shifts": []}
+    if was == now:
+        return result
+    delta = 1 if was else -1  # verlorener Arbeitstag -> Folgejobs später
+    result["delta"] = delta
+
+    def end_date(cal, start: date, duration: int) -> date:
+        return cal.days[cal.index_on_or_after(start) + max(1, duration) - 1]
+
+    affected = []
+    for j, s in zip(jobs, starts):
+        if s <= day and end_date(old, s, int(j["duration_days"])) >= day:
+            affected.append(j)
+            result["affected"].append({
+                "id": j["id"], "title": j["title"], "section": j["section"],
+                "row_index": j["row_index"], "height_rows": j["height_rows"],
+                "start_date": j["start_date"],
+                "end_date_before": end_date(old, s, int(j["duration_days"])).isoformat(),
+                "end_date_after": end_date(new, s, int(j["duration_days"])).isoformat(),
+            })
+
+    def rows(j) -> set[int]:
+        return set(range(int(j["row_index"]), int(j["row_index"]) + max(1, int(j["height_rows"]))))
+
+    affected_ids = {j["id"] for j in affected}
+    later = [(j, s) for j, s in zip(jobs, starts) if s > day and j["id"] not in affected_ids]
+
+    # neue Überlappungen, falls nicht verschoben wird (nur wenn Jobs länger werden)
+    for a in affected if delta > 0 else []:
+        a_start = date.fromisoformat(a["start_date"])
+        old_end = end_date(old, a_start, int(a["duration_days"]))
+        new_end = end_date(new, a_start, int(a["duration_days"]))
+        for b, s in later:
+            if b["section"] == a["section"] and rows(a) & rows(b) and old_end < s <= new_end:
+                result["conflicts"].append({"id": a["id"], "with_id": b["id"]})
+
+    if not shift_following:
+        return result
+
+    # Folgejobs: Zeilen der betroffenen Jobs, transitiv über mehrzeilige Jobs
+    touched = {}
+    for a in affected:
+        touched.setdefault(a["section"], set()).update(rows(a))
+    shifted = {}
+    changed = True
+    while changed:
+        changed = False
+        for b, s in later:
+            if b["id"] not in shifted and rows(b) & touched.get(b["section"], set()):
+                new_start = new.days[new.index_on_or_after(s) + delta]
+                shifted[b["id"]] = (b, new_start)
+                touched.setdefault(b["section"], set()).update(rows(b))
+                changed = True
+
+    result["shifts"] = [
+        {"id": b["id"], "title": b["title"], "start_date_before": b["start_date"], "start_date_after": ns.isoformat()}
+        for b, ns in sorted(shifted.values(), key=lambda x: (x[0]["start_date"], x[0]["id"]))
+    ]
+    return result
+
+
+def batch_target(job: dict, op: dict, cal: WorkdayCalendar, row_counts: dict[str, int]) -> tuple[str, str, int]:
+    """
+    Ziel für move/copy: (start_date, section, row_index).
+    start_date absolut oder shift_workdays relativ (in Arbeitstagen),
+    section/row_index absolut oder row_delta relativ. Nicht angegeben = wie bisher.
+    Der Job muss mit seiner Höhe in die Zeilen der Ziel-Section passen.
+    """
+    start = date.fromisoformat(op["start_date"]) if op.get("start_date") else date.fromisoformat(job["start_date"])
+    if op.get("shift_workdays"):
+        i = cal.index_on_or_after(start) + int(op["shift_workdays"])
+        if not 0 <= i < len(cal):
+            raise ValueError("shift_workdays out of range")
+        start = cal.days[i]
+
+    section = op.get("section") or job["section"]
+    if not isinstance(section, str) or section.strip() not in SECTIONS:
+        raise ValueError("invalid section")
+    section = section.strip()
+    row = int(op["row_index"]) if op.get("row_index") is not None else int(job["row_index"])
+    row += int(op.get("row_delta") or 0)
+    if row < 0:
+        raise ValueError("row_index < 0")
+    if row + max(1, int(job["height_rows"])) > int(row_counts.get(section, 0)):
+        raise ValueError("row_index out of range")
+    return start.isoformat(), section, row
+
+
+def spans_and_conflicts(cal: WorkdayCalendar, jobs: list[dict], ids: set[int]) -> list[dict]:
+    """Start/Ende (letzter Arbeitstag) der Jobs ids und mit welchen Jobs sie sich überschneiden."""
+    span = {}
+    for j in jobs:
+        c0 = cal.index_on_or_after(date.fromisoformat(j["start_date"]))
+        c1 = min(c0 + max(1, int(j["duration_days"])), len(cal)) - 1
+        r0 = int(j["row_index"])
+        span[j["id"]] = (j["section"], r0, r0 + max(1, int(j["height_rows"])), c0, c1)
+
+    out = []
+    for j in jobs:
+        if j["id"] not in ids:
+            continue
+        sec, r0, r1, c0, c1 = span[j["id"]]
+        conflicts = [
+            oid for oid, (osec, or0, or1, oc0, oc1) in span.items()
+            if oid != j["id"] and osec == sec and or0 < r1 and r0 < or1 and oc0 <= c1 and c0 <= oc1
+        ]
+        out.append({
+            "id": j["id"], "section": sec, "row_index": r0, "height_rows": r1 - r0,
+            "start_date": j["start_date"], "end_date": cal.days[c1].isoformat() if c1 >= 0 else j["start_date"],
+            "color": j["color"], "version": j.get("version"),
+            "conflict": bool(conflicts), "conflicts_with": conflicts,
+        })
+    return out
+
+
+def project_week(cal: WorkdayCalendar, jobs: list[dict], monday: date) -> dict[tuple[int, int], dict]:
+    """
+    Jahresplanung -> Wochenraster: {(row_index, day_index 0..4): job}.
+    Nur echte Arbeitstage (Feiertage / ausgeblendeter Freitag bleiben leer).
+    """
+    out = {}
+    for j in jobs:
+        c0 = cal.index_on_or_after(date.fromisoformat(j["start_date"]))
+        for d in cal.days[c0:c0 + max(1, int(j["duration_days"]))]:
+            di = (d - monday).days
+            if 0 <= di < 5:
+                r0 = int(j["row_index"])
+                for r in range(r0, r0 + max(1, int(j["height_rows"]))):
+                    out.setdefault((r, di), j)
+    return out
+
+
+def iso_weeks_in_year(year: int) -> int:
+    return date(year, 12, 28).isocalendar()[1]
+
+
+def rollover_start(start: date, to_year: int) -> date:
+    """Gleiche ISO-KW und gleicher Wochentag im Zieljahr (KW 53 -> KW 52, falls es sie nicht gibt)."""
+    _, kw, wd = start.isocalendar()
+    return date.fromisocalendar(to_year, min(kw, iso_weeks_in_year(to_year)), wd)
+
+
+def rollover_jobs(jobs: list[dict], from_year: int, to_year: int,
+                  job_ids: set[int] | None = None) -> tuple[list[dict], list[int]]:
+    """
+    Jobs des ISO-Jahres from_year (wie KW und Freitag-Overrides) ins ISO-Jahr to_year übertragen.
+    Neue Jobs bekommen negative Platzhalter-ids und source_id. Gibt es im Ziel schon einen Job
+    mit gleichem Titel, Bereich, Zeile und Start (z.B. zweiter Lauf), wird er übersprungen.
+    Rückgabe: (neue Jobs, übersprungene source_ids).
+    """
+    taken = {(j["title"], j["section"], int(j["row_index"]), j["start_date"]) for j in jobs}
+    new_jobs, skipped = [], []
+    for j in jobs:
+        start = date.fromisoformat(j["start_date"])
+        if start.isocalendar()[0] != from_year or (job_ids is not None and j["id"] not in job_ids):
+            continue
+        start_date = rollover_start(start, to_year).isoformat()
+        key = (j["title"], j["section"], int(j["row_index"]), start_date)
+        if key in taken:
+            skipped.append(j["id"])
+            continue
+        taken.add(key)
+        new_jobs.append({**j, "id": -(len(new_jobs) + 1), "source_id": j["id"], "start_date": start_date})
+    return new_jobs, skipped
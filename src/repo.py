@@ -0,0 +1,758 @@
+# src/repo.py
+"""
+Repository-Schicht: alle SQL-Abfragen der App an einer Stelle.
+
+Jede Funktion bekommt einen Cursor (aus db.get_conn()) und gibt einfache
+Python-Werte (dict / list / int) zurück. Commit bleibt Sache des Aufrufers,
+damit mehrere Aufrufe in einer Transaktion laufen können.
+Die SQL-Texte sind konstant -> sie landen im Statement-Cache der Pool-Verbindung.
+"""
+import sqlite3
+
+
+# ---------------- Kalender: Feiertage / Freitag-Overrides ----------------
+def is_holiday(cur, day: str) -> bool:
+    cur.execute("SELECT 1 FROM year_holidays WHERE day=?", (day,))
+    return cur.fetchone() is not None
+
+
+def toggle_holiday(cur, day: str, label: str | None) -> bool:
+    """Schaltet einen Feiertag um. Rückgabe: True = ist jetzt Feiertag."""
+    if is_holiday(cur, day):
+        cur.execute("DELETE FROM year_holidays WHERE day=?", (day,))
+        return False
+    cur.execute("INSERT INTO year_holidays(day,label) VALUES(?,?)", (day, label or None))
+    return True
+
+
+def upsert_holidays(cur, rows: list[tuple[str, str | None]]):
+    """rows: [(day, label), ...] – bestehende Feiertage behalten ihr Label, wenn keins mitkommt."""
+    cur.executemany("""
+        INSERT INTO year_holidays(day,label) VALUES(?,?)
+        ON CONFLICT(day) DO UPDATE SET label=COALESCE(excluded.label, year_holidays.label)
+    """, rows)
+
+
+def get_friday_override(cur, year: int, kw: int) -> int | None:
+    cur.execute("SELECT show_friday FROM year_week_overrides WHERE year=? AND kw=?", (year, kw))
+    r = cur.fetchone()
+    if not r:
+        return None
+    return int(r["show_friday"])
+
+
+def set_friday_override(cur, year: int, kw: int, show: int):
+    cur.execute("""
+        INSERT INTO year_week_overrides(year,kw,show_friday)
+        VALUES(?,?,?)
+        ON CONFLICT(year,kw) DO UPDATE SET show_friday=excluded.show_friday
+    """, (year, kw, show))
+
+
+def list_holidays(cur, date_from: str, date_to: str) -> list[str]:
+    cur.execute("SELECT day FROM year_holidays WHERE day BETWEEN ? AND ?", (date_from, date_to))
+    return [r["day"] for r in cur.fetchall()]
+
+
+def list_friday_overrides(cur, year_from: int, year_to: int) -> dict[tuple[int, int], int]:
+    cur.execute(
+        "SELECT year, kw, show_friday FROM year_week_overrides WHERE year BETWEEN ? AND ?",
+        (year_from, year_to)
+    )
+    return {(int(r["year"]), int(r["kw"])): int(r["show_friday"]) for r in cur.fetchall()}
+
+
+def copy_friday_overrides(cur, from_year: int, to_year: int, max_kw: int, overwrite: bool):
+    """Freitag-Overrides eines Jahres per INSERT ... SELECT ins Zieljahr (gleiche KW) übernehmen."""
+    conflict = "DO UPDATE SET show_friday=excluded.show_friday" if overwrite else "DO NOTHING"
+    cur.execute(f"""
+        INSERT INTO year_week_overrides(year,kw,show_friday)
+        SELECT ?, kw, show_friday FROM year_week_overrides WHERE year=? AND kw <= ?
+        ON CONFLICT(year,kw) {conflict}
+    """, (to_year, from_year, max_kw))
+
+
+# ---------------- Jahresplanung: Zeilen ----------------
+def get_row_counts(cur) -> dict[str, int]:
+    cur.execute("SELECT section, row_count FROM year_row_settings")
+    return {r["section"]: int(r["row_count"]) for r in cur.fetchall()}
+
+
+def set_row_count(cur, section: str, count: int):
+    cur.execute("""
+        INSERT INTO year_row_settings(section,row_count)
+        VALUES(?,?)
+        ON CONFLICT(section) DO UPDATE SET row_count=excluded.row_count
+    """, (section, count))
+
+
+def count_year_rows(cur, section: str) -> int:
+    cur.execute("SELECT COUNT(*) AS n FROM year_rows WHERE section=?", (section,))
+    return int(cur.fetchone()["n"] or 0)
+
+
+def ensure_year_rows(cur, section: str, want: int, prefix: str):
+    """year_rows bis row_count auffüllen (INSERT OR IGNORE)."""
+    have = count_year_rows(cur, section)
+    cur.executemany(
+        "INSERT OR IGNORE INTO year_rows(section,row_index,name) VALUES(?,?,?)",
+        [(section, idx, f"{prefix} {idx+1}") for idx in range(have, int(want))]
+    )
+
+
+def list_year_rows(cur) -> list[dict]:
+    cur.execute("SELECT id, section, row_index, name FROM year_rows ORDER BY section, row_index")
+    return [dict(r) for r in cur.fetchall()]
+
+
+def get_year_row(cur, row_id: int) -> sqlite3.Row | None:
+    cur.execute("SELECT id, section, row_index, name FROM year_rows WHERE id=?", (row_id,))
+    return cur.fetchone()
+
+
+def get_or_create_year_row(cur, section: str, row_index: int, name: str) -> sqlite3.Row:
+    cur.execute("INSERT OR IGNORE INTO year_rows(section,row_index,name) VALUES(?,?,?)", (section, row_index, name))
+    cur.execute("SELECT id, section, row_index, name FROM year_rows WHERE section=? AND row_index=?",
+                (section, row_index))
+    return cur.fetchone()
+
+
+def rename_year_row(cur, row_id: int, name: str):
+    cur.execute("UPDATE year_rows SET name=? WHERE id=?", (name, row_id))
+
+
+# ---------------- Jahresplanung: Jobs ----------------
+def list_year_jobs(cur) -> list[dict]:
+    cur.execute("SELECT * FROM year_jobs ORDER BY start_date")
+    return [dict(r) for r in cur.fetchall()]
+
+
+def max_year_job_duration(cur) -> int:
+    cur.execute("SELECT MAX(duration_days) AS n FROM year_jobs")
+    return int(cur.fetchone()["n"] or 0)
+
+
+def list_year_jobs_starting_between(cur, section: str, date_from: str, date_to: str) -> list[dict]:
+    """Range-Scan über idx_year_jobs_section_start."""
+    cur.execute("""
+        SELECT id, title, start_date, duration_days, height_rows, section, row_index, color
+        FROM year_jobs
+        WHERE section=? AND start_date BETWEEN ? AND ?
+        ORDER BY start_date
+    """, (section, date_from, date_to))
+    return [dict(r) for r in cur.fetchall()]
+
+
+def iter_year_jobs_between(cur, date_from: str, date_to: str, batch: int = 500):
+    """Generator (fetchmany) – für Exporte ohne die ganze Tabelle im Speicher."""
+    cur.execute("""
+        SELECT id, title, start_date, duration_days, height_rows, section, row_index, color, note
+        FROM year_jobs WHERE start_date BETWEEN ? AND ? ORDER BY start_date, section, row_index
+    """, (date_from, date_to))
+    while rows := cur.fetchmany(batch):
+        for r in rows:
+            yield dict(r)
+
+
+def get_year_job(cur, job_id: int) -> sqlite3.Row | None:
+    cur.execute("SELECT * FROM year_jobs WHERE id=?", (job_id,))
+    return cur.fetchone()
+
+
+def year_job_exists(cur, job_id: int) -> bool:
+    cur.execute("SELECT id FROM year_jobs WHERE id=?", (job_id,))
+    return cur.fetchone() is not None
+
+
+def insert_year_job(cur, title: str, start_date: str, duration_days: int, height_rows: int,
+                    section: str, row_index: int, color: str, note: str | None) -> int:
+    cur.execute("""
+        INSERT INTO year_jobs(title,start_date,duration_days,height_rows,section,row_index,color,note)
+        VALUES(?,?,?,?,?,?,?,?)
+    """, (title, start_date, duration_days, height_rows, section, row_index, color, note))
+    return int(cur.lastrowid)
+
+
+def set_year_job_starts(cur, starts: list[tuple[str, int]]):
+    """[(start_date, id), ...] in einem executemany."""
+    cur.executemany("UPDATE year_jobs SET start_date=?, version=version+1 WHERE id=?", starts)
+
+
+def insert_year_jobs(cur, rows: list[tuple]) -> list[int]:
+    """
+    rows: [(title, start_date, duration_days, height_rows, section, row_index, color, note), ...]
+    Rückgabe: neue ids in Reihenfolge von rows (Aufrufer hält die Schreibsperre, BEGIN IMMEDIATE).
+    """
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM year_jobs")
+    last_id = int(cur.fetchone()[0])
+    cur.executemany("""
+        INSERT INTO year_jobs(title,start_date,duration_days,height_rows,section,row_index,color,note)
+        VALUES(?,?,?,?,?,?,?,?)
+    """, rows)
+    cur.execute("SELECT id FROM year_jobs WHERE id > ? ORDER BY id", (last_id,))
+    return [int(r["id"]) for r in cur.fetchall()]
+
+
+# expected_version: nur schreiben, wenn die Zeile noch diese Version hat (None = ohne Prüfung).
+# Rückgabe False = Version passt nicht (oder Job existiert nicht).
+def update_year_job(cur, job_id: int, title: str, start_date: str, duration_days: int, height_rows: int,
+                    section: str, row_index: int, color: str, note: str | None,
+                    expected_version: int | None = None) -> bool:
+    cur.execute("""
+        UPDATE year_jobs
+        SET title=?, start_date=?, duration_days=?, height_rows=?, section=?, row_index=?, color=?, note=?,
+            version=version+1
+        WHERE id=? AND (? IS NULL OR version=?)
+    """, (title, start_date, duration_days, height_rows, section, row_index, color, note,
+          job_id, expected_version, expected_version))
+    return cur.rowcount > 0
+
+
+def set_year_job_color(cur, job_id: int, color: str, expected_version: int | None = None) -> bool:
+    cur.execute(
+        "UPDATE year_jobs SET color=?, version=version+1 WHERE id=? AND (? IS NULL OR version=?)",
+        (color, job_id, expected_version, expected_version)
+    )
+    return cur.rowcount > 0
+
+
+def delete_year_job(cur, job_id: int, expected_version: int | None = None) -> bool:
+    cur.execute(
+        "DELETE FROM year_jobs WHERE id=? AND (? IS NULL OR version=?)",
+        (job_id, expected_version, expected_version)
+    )
+    return cur.rowcount > 0
+
+
+def list_year_titles(cur, date_from: str, date_to: str) -> list[str]:
+    cur.execute("""
+        SELECT DISTINCT title
+        FROM year_jobs
+        WHERE start_date BETWEEN ? AND ?
+        AND title IS NOT NULL
+        AND TRIM(title) != ''
+        ORDER BY title COLLATE NOCASE
+    """, (date_from, date_to))
+    return [r["title"] for r in cur.fetchall()]
+
+
+def list_title_scores(cur, today: str) -> list[tuple[str, float]]:
+    """Alle Titel (NOCASE zusammengefasst), Score = Summe der Jobs, gewichtet nach Abstand zu today."""
+    cur.execute("""
+        SELECT title,
+               SUM(1.0 / (1.0 + ABS(julianday(?) - julianday(start_date)) / 180.0)) AS score
+        FROM year_jobs
+        WHERE TRIM(title) != ''
+        GROUP BY title COLLATE NOCASE
+    """, (today,))
+    return [(r["title"], r["score"]) for r in cur.fetchall()]
+
+
+# ---------------- Wochenplanung ----------------
+def get_week_plan(cur, year: int, kw: int, standort: str) -> sqlite3.Row | None:
+    cur.execute(
+        "SELECT id,row_count,four_day_week FROM week_plans WHERE year=? AND kw=? AND standort=?",
+        (year, kw, standort)
+    )
+    return cur.fetchone()
+
+
+def get_week_plan_by_id(cur, plan_id: int) -> sqlite3.Row | None:
+    cur.execute("SELECT id,year,kw,standort FROM week_plans WHERE id=?", (plan_id,))
+    return cur.fetchone()
+
+
+def create_week_plan(cur, year: int, kw: int, standort: str, row_count: int = 5, four_day_week: int = 1) -> int:
+    cur.execute(
+        "INSERT INTO week_plans(year,kw,standort,row_count,four_day_week) VALUES(?,?,?,?,?)",
+        (year, kw, standort, row_count, four_day_week)
+    )
+    return int(cur.lastrowid)
+
+
+def create_week_plan_if_missing(cur, year: int, kw: int, standort: str):
+    """Idempotent (INSERT OR IGNORE) – sicher bei mehreren Workern gleichzeitig."""
+    cur.execute(
+        "INSERT OR IGNORE INTO week_plans(year,kw,standort,row_count,four_day_week) VALUES(?,?,?,5,1)",
+        (year, kw, standort)
+    )
+
+
+def set_four_day_week(cur, year: int, kw: int, standort: str, value: int):
+    cur.execute(
+        "UPDATE week_plans SET four_day_week=? WHERE year=? AND kw=? AND standort=?",
+        (value, year, kw, standort)
+    )
+
+
+def list_week_cells(cur, plan_id: int) -> list[dict]:
+    cur.execute(
+        "SELECT row_index,day_index,text,version FROM week_cells WHERE week_plan_id=? ORDER BY row_index,day_index",
+        (plan_id,)
+    )
+    return [dict(r) for r in cur.fetchall()]
+
+
+def get_week_cell_states(cur, plan_id: int) -> dict[tuple[int, int], dict]:
+    """{(row_index, day_index): {"text", "version"}} – nur vorhandene Zellen."""
+    cur.execute("SELECT row_index, day_index, text, version FROM week_cells WHERE week_plan_id=?", (plan_id,))
+    return {(r["row_index"], r["day_index"]): {"text": r["text"], "version": r["version"]} for r in cur.fetchall()}
+
+
+def get_week_cell(cur, plan_id: int, row_index: int, day_index: int) -> dict | None:
+    cur.execute(
+        "SELECT text, version FROM week_cells WHERE week_plan_id=? AND row_index=? AND day_index=?",
+        (plan_id, row_index, day_index)
+    )
+    r = cur.fetchone()
+    return dict(r) if r else None
+
+
+def set_week_cell(cur, plan_id: int, row_index: int, day_index: int, text: str, expected_version: int) -> bool:
+    """
+    Bedingter Einzel-Write. expected_version 0 = Zelle darf noch nicht existieren.
+    Rückgabe False = jemand anderes war schneller.
+    """
+    if expected_version == 0:
+        cur.execute("""
+            INSERT INTO week_cells(week_plan_id,row_index,day_index,text) VALUES(?,?,?,?)
+            ON CONFLICT(week_plan_id,row_index,day_index) DO NOTHING
+        """, (plan_id, row_index, day_index, text))
+    else:
+        cur.execute("""
+            UPDATE week_cells SET text=?, version=version+1
+            WHERE week_plan_id=? AND row_index=? AND day_index=? AND version=?
+        """, (text, plan_id, row_index, day_index, expected_version))
+    return cur.rowcount > 0
+
+
+def upsert_week_cells(cur, plan_id: int, cells: list[tuple[int, int, str]]):
+    """cells: [(row_index, day_index, text), ...] – ein executemany statt N Einzel-Upserts."""
+    cur.executemany("""
+        INSERT INTO week_cells(week_plan_id,row_index,day_index,text)
+        VALUES(?,?,?,?)
+        ON CONFLICT(week_plan_id,row_index,day_index) DO UPDATE SET text=excluded.text, version=week_cells.version+1
+    """, [(plan_id, int(r), int(d), t) for r, d, t in cells])
+
+
+def week_has_cells(cur, plan_id: int) -> bool:
+    cur.execute("SELECT 1 FROM week_cells WHERE week_plan_id=? AND TRIM(COALESCE(text,'')) != '' LIMIT 1", (plan_id,))
+    return cur.fetchone() is not None
+
+
+def put_week_plan(cur, year: int, kw: int, standort: str, row_count: int, four_day_week: int,
+                  overwrite: bool) -> int:
+    """Kopfzeile anlegen; overwrite=True übernimmt row_count/four_day_week auch bei bestehender Woche."""
+    if overwrite:
+        cur.execute("""
+            INSERT INTO week_plans(year,kw,standort,row_count,four_day_week) VALUES(?,?,?,?,?)
+            ON CONFLICT(year,kw,standort) DO UPDATE
+            SET row_count=excluded.row_count, four_day_week=excluded.four_day_week
+        """, (year, kw, standort, row_count, four_day_week))
+    else:
+        cur.execute(
+            "INSERT OR IGNORE INTO week_plans(year,kw,standort,row_count,four_day_week) VALUES(?,?,?,?,?)",
+            (year, kw, standort, row_count, four_day_week)
+        )
+    return int(get_week_plan(cur, year, kw, standort)["id"])
+
+
+_COPY_CELLS_SOURCE = {
+    # source: (Tabelle, Schlüsselspalte)
+    "week": ("week_cells", "week_plan_id"),
+    "template": ("week_template_cells", "template_id"),
+}
+
+
+def copy_week_cells(cur, source: str, source_id: int, plan_id: int, overwrite: bool):
+    """
+    Zellen per INSERT ... SELECT aus einer Woche oder Vorlage übernehmen.
+    overwrite=True: Zielzellen ersetzen, Zellen ohne Gegenstück in der Quelle löschen.
+    Sonst nur leere Zellen füllen. Geänderte Zellen bekommen immer version+1 (kein
+    Zurücksetzen auf 1, sonst passt eine alte Client-Version wieder).
+    """
+    table, key = _COPY_CELLS_SOURCE[source]
+    select = f"""
+        SELECT ?, row_index, day_index, text FROM {table}
+        WHERE {key}=? AND TRIM(COALESCE(text,'')) != ''
+    """
+    if overwrite:
+        cur.execute(f"""
+            INSERT INTO week_cells(week_plan_id,row_index,day_index,text) {select}
+            ON CONFLICT(week_plan_id,row_index,day_index) DO UPDATE SET text=excluded.text, version=week_cells.version+1
+            WHERE week_cells.text IS NOT excluded.text
+        """, (plan_id, source_id))
+        cur.execute(f"""
+            DELETE FROM week_cells WHERE week_plan_id=? AND NOT EXISTS (
+              SELECT 1 FROM {table} s
+              WHERE s.{key}=? AND s.row_index=week_cells.row_index AND s.day_index=week_cells.day_index
+                AND TRIM(COALESCE(s.text,'')) != ''
+            )
+        """, (plan_id, source_id))
+    else:
+        cur.execute(f"""
+            INSERT INTO week_cells(week_plan_id,row_index,day_index,text) {select}
+            ON CONFLICT(week_plan_id,row_index,day_index) DO UPDATE SET text=excluded.text, version=week_cells.version+1
+            WHERE TRIM(COALESCE(week_cells.text,'')) = ''
+        """, (plan_id, source_id))
+
+
+# ---------------- Wochenvorlagen ----------------
+def list_week_templates(cur) -> list[dict]:
+    cur.execute("""
+        SELECT t.id, t.name, t.standort, t.row_count, t.four_day_week, t.created_at,
+               (SELECT COUNT(*) FROM week_template_cells c WHERE c.template_id=t.id) AS cells
+        FROM week_templates t ORDER BY t.name COLLATE NOCASE
+    """)
+    return [dict(r) for r in cur.fetchall()]
+
+
+def get_week_template(cur, name: str) -> sqlite3.Row | None:
+    cur.execute("SELECT id, name, standort, row_count, four_day_week FROM week_templates WHERE name=?", (name,))
+    return cur.fetchone()
+
+
+def save_week_template(cur, name: str, standort: str, plan_id: int, row_count: int, four_day_week: int) -> int:
+    """Vorlage aus einer Woche anlegen bzw. gleichnamige ersetzen."""
+    cur.execute("DELETE FROM week_template_cells WHERE template_id IN (SELECT id FROM week_templates WHERE name=?)", (name,))
+    cur.execute("DELETE FROM week_templates WHERE name=?", (name,))
+    cur.execute(
+        "INSERT INTO week_templates(name,standort,row_count,four_day_week) VALUES(?,?,?,?)",
+        (name, standort, row_count, four_day_week)
+    )
+    template_id = int(cur.lastrowid)
+    cur.execute("""
+        INSERT INTO week_template_cells(template_id,row_index,day_index,text)
+        SELECT ?, row_index, day_index, text FROM week_cells
+        WHERE week_plan_id=? AND TRIM(COALESCE(text,'')) != ''
+    """, (template_id, plan_id))
+    return template_id
+
+
+def delete_week_template(cur, name: str) -> bool:
+    cur.execute("DELETE FROM week_template_cells WHERE template_id IN (SELECT id FROM week_templates WHERE name=?)", (name,))
+    cur.execute("DELETE FROM week_templates WHERE name=?", (name,))
+    return cur.rowcount > 0
+
+
+def iter_week_cells(cur, standort: str, yearkw_from: int, yearkw_to: int, batch: int = 500):
+    """Zellen aller Wochen (year*100+kw) im Bereich, sortiert nach Woche/Zeile/Tag."""
+    cur.execute("""
+        SELECT p.year, p.kw, c.row_index, c.day_index, c.text
+        FROM week_plans p JOIN week_cells c ON c.week_plan_id = p.id
+        WHERE p.standort=? AND p.year * 100 + p.kw BETWEEN ? AND ?
+        ORDER BY p.year, p.kw, c.row_index, c.day_index
+    """, (standort, yearkw_from, yearkw_to))
+    while rows := cur.fetchmany(batch):
+        for r in rows:
+            yield dict(r)
+
+
+# ---------------- Cache-Invalidierung (cache_changes) ----------------
+def max_cache_change_seq(cur) -> int:
+    cur.execute("SELECT COALESCE(MAX(seq), 0) AS n FROM cache_changes")
+    return int(cur.fetchone()["n"])
+
+
+def list_cache_changes(cur, since: int, limit: int) -> list[dict]:
+    cur.execute(
+        "SELECT seq, scope, standort, year, kw FROM cache_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+        (since, limit)
+    )
+    return [dict(r) for r in cur.fetchall()]
+
+
+# ---------------- Delta-Sync (change_log) ----------------
+def min_change_seq(cur) -> int:
+    cur.execute("SELECT COALESCE(MIN(seq), 0) AS n FROM change_log")
+    return int(cur.fetchone()["n"])
+
+
+def max_change_seq(cur) -> int:
+    cur.execute("SELECT COALESCE(MAX(seq), 0) AS n FROM change_log")
+    return int(cur.fetchone()["n"])
+
+
+def last_year_change(cur, section: str) -> str | None:
+    """
+    Zeitpunkt (UTC, 'YYYY-MM-DD HH:MM:SS') der letzten Änderung, die Jobs einer Section
+    betrifft: deren Jobs selbst (auch hinaus verschobene) oder der Kalender ('*').
+    """
+    cur.execute(
+        "SELECT MAX(changed_at) AS t FROM year_section_changes WHERE section IN (?, '*')",
+        (section,)
+    )
+    return cur.fetchone()["t"]
+
+
+def list_changes(cur, since: int, limit: int) -> list[dict]:
+    cur.execute(
+        "SELECT seq, tbl, op, row_id, data FROM change_log WHERE seq > ? ORDER BY seq LIMIT ?",
+        (since, limit)
+    )
+    return [dict(r) for r in cur.fetchall()]
+
+
+# ---------------- Audit-Journal / Undo ----------------
+def get_row_state(cur, table: str, key_cols: tuple, key: tuple, fields: tuple) -> dict | None:
+    """Aktuelle Werte einer Zeile (None = existiert nicht)."""
+    where = " AND ".join(f"{c}=?" for c in key_cols)
+    cur.execute(f"SELECT {', '.join(fields)} FROM {table} WHERE {where}", tuple(key))
+    r = cur.fetchone()
+    return dict(r) if r else None
+
+
+def last_logged_version(cur, table: str, key: tuple) -> int:
+    """Höchste version einer (evtl. gelöschten) Zeile laut change_log, 0 = unbekannt."""
+    if table == "year_jobs":
+        cur.execute(
+            "SELECT MAX(json_extract(data, '$.version')) AS v FROM change_log WHERE tbl='year_jobs' AND row_id=?",
+            (key[0],)
+        )
+    else:  # week_cells: Log kennt Woche/Standort statt plan_id
+        cur.execute("""
+            SELECT MAX(json_extract(c.data, '$.version')) AS v
+            FROM change_log c JOIN week_plans p ON p.id=?
+            WHERE c.tbl='week_cells'
+              AND json_extract(c.data, '$.standort')=p.standort AND json_extract(c.data, '$.year')=p.year
+              AND json_extract(c.data, '$.kw')=p.kw
+              AND json_extract(c.data, '$.row_index')=? AND json_extract(c.data, '$.day_index')=?
+        """, tuple(key))
+    return int(cur.fetchone()["v"] or 0)
+
+
+def put_row_state(cur, table: str, key_cols: tuple, key: tuple, state: dict | None, exists: bool,
+                  versioned: bool = False):
+    """
+    Zeile auf state setzen: None = löschen, sonst UPDATE (existiert) bzw. INSERT (volle Zeile).
+    versioned: Tabelle hat eine version-Spalte – beim UPDATE hochgezählt, beim Wiederherstellen
+    über jede frühere Version der Zeile gesetzt (eine alte Client-Version darf nicht wieder passen).
+    """
+    where = " AND ".join(f"{c}=?" for c in key_cols)
+    if state is None:
+        cur.execute(f"DELETE FROM {table} WHERE {where}", tuple(key))
+    elif exists:
+        cols = list(state)
+        bump = ", version=version+1" if versioned else ""
+        cur.execute(
+            f"UPDATE {table} SET {', '.join(f'{c}=?' for c in cols)}{bump} WHERE {where}",
+            tuple(state[c] for c in cols) + tuple(key)
+        )
+    else:
+        extra = {"version": last_logged_version(cur, table, key) + 1} if versioned else {}
+        cols = list(key_cols) + list(state) + list(extra)
+        cur.execute(
+            f"INSERT INTO {table}({','.join(cols)}) VALUES({','.join('?' * len(cols))})",
+            tuple(key) + tuple(state.values()) + tuple(extra.values())
+        )
+
+
+def insert_audit_entries(cur, rows: list[tuple]):
+    """
+    rows: [(session, username, grp, tbl, row_key, old_data, new_data)].
+    Neue Änderungen einer Sitzung verwerfen deren Redo-Zweig (state 1 -> 2).
+    """
+    cur.executemany(
+        "UPDATE audit_log SET state=2 WHERE session=? AND state=1",
+        [(s,) for s in {r[0] for r in rows}]
+    )
+    cur.executemany("""
+        INSERT INTO audit_log(session,username,grp,tbl,row_key,old_data,new_data)
+        VALUES(?,?,?,?,?,?,?)
+    """, rows)
+
+
+def get_audit_group(cur, session: str, redo: bool) -> list[dict]:
+    """Undo: jüngste aktive Gruppe der Sitzung. Redo: zuletzt rückgängig gemachte (= älteste mit state 1)."""
+    if redo:
+        cur.execute("SELECT grp FROM audit_log WHERE session=? AND state=1 ORDER BY seq LIMIT 1", (session,))
+    else:
+        cur.execute("SELECT grp FROM audit_log WHERE session=? AND state=0 ORDER BY seq DESC LIMIT 1", (session,))
+    r = cur.fetchone()
+    if not r:
+        return []
+    cur.execute(
+        "SELECT seq,grp,tbl,row_key,old_data,new_data,created_at FROM audit_log WHERE grp=? ORDER BY seq",
+        (r["grp"],)
+    )
+    return [dict(x) for x in cur.fetchall()]
+
+
+def set_audit_group_state(cur, grp: str, state: int):
+    cur.execute("UPDATE audit_log SET state=? WHERE grp=?", (state, grp))
+
+
+def list_audit(cur, tbl: str | None, row_key: str | None, session: str | None,
+               before_seq: int | None, limit: int) -> list[dict]:
+    where, args = ["1=1"], []
+    if tbl:
+        where.append("tbl=?"); args.append(tbl)
+    if row_key:
+        where.append("row_key=?"); args.append(row_key)
+    if session:
+        where.append("session=?"); args.append(session)
+    if before_seq:
+        where.append("seq<?"); args.append(before_seq)
+    cur.execute(f"""
+        SELECT seq,username,grp,tbl,row_key,old_data,new_data,state,created_at
+        FROM audit_log WHERE {' AND '.join(where)} ORDER BY seq DESC LIMIT ?
+    """, (*args, limit))
+    return [dict(r) for r in cur.fetchall()]
+
+
+def list_audit_for_compaction(cur, older_than: str) -> list[dict]:
+    cur.execute("""
+        SELECT seq,session,tbl,row_key,old_data,new_data FROM audit_log
+        WHERE state=0 AND created_at < ? ORDER BY tbl,row_key,seq
+    """, (older_than,))
+    return [dict(r) for r in cur.fetchall()]
+
+
+def apply_audit_compaction(cur, updates: list[tuple], deletes: list[int]):
+    cur.executemany("UPDATE audit_log SET old_data=?, new_data=? WHERE seq=?", updates)
+    cur.executemany("DELETE FROM audit_log WHERE seq=?", [(s,) for s in deletes])
+
+
+def purge_audit(cur, undo_before: str, keep_before: str):
+    """Rückgängig gemachte/verworfene Einträge nach dem Undo-Fenster, alles nach der Aufbewahrung löschen."""
+    cur.execute("DELETE FROM audit_log WHERE state IN (1,2) AND created_at < ?", (undo_before,))
+    cur.execute("DELETE FROM audit_log WHERE created_at < ?", (keep_before,))
+
+
+# ---------------- Volltextsuche (search_fts) ----------------
+def search_fts(cur, match: str, limit: int) -> list[dict]:
+    """Treffer nach bm25 sortiert; rowid = id * 4 + Art (siehe db.SEARCH_KIND_*)."""
+    cur.execute("""
+        SELECT rowid, bm25(search_fts) AS rank,
+               snippet(search_fts, 0, '[', ']', '…', 10) AS snippet
+        FROM search_fts
+        WHERE search_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+    """, (match, limit))
+    return [dict(r) for r in cur.fetchall()]
+
+
+def _id_list(ids: list[int]) -> str:
+    return ",".join(str(int(i)) for i in ids)
+
+
+def get_year_jobs_by_ids(cur, ids: list[int]) -> dict[int, dict]:
+    if not ids:
+        return {}
+    cur.execute(f"""
+        SELECT id, title, start_date, duration_days, section, row_index, color
+        FROM year_jobs WHERE id IN ({_id_list(ids)})
+    """)
+    return {r["id"]: dict(r) for r in cur.fetchall()}
+
+
+def get_week_cells_by_ids(cur, ids: list[int]) -> dict[int, dict]:
+    if not ids:
+        return {}
+    cur.execute(f"""
+        SELECT c.id, c.row_index, c.day_index, c.text, p.year, p.kw, p.standort
+        FROM week_cells c JOIN week_plans p ON p.id = c.week_plan_id
+        WHERE c.id IN ({_id_list(ids)})
+    """)
+    return {r["id"]: dict(r) for r in cur.fetchall()}
+
+
+def get_small_jobs_by_ids(cur, ids: list[int]) -> dict[int, dict]:
+    if not ids:
+        return {}
+    cur.execute(f"SELECT id, standort, row_index, text FROM global_small_jobs WHERE id IN ({_id_list(ids)})")
+    return {r["id"]: dict(r) for r in cur.fetchall()}
+
+
+# ---------------- Kleinbaustellen ----------------
+def list_small_jobs(cur, standort: str) -> list[dict]:
+    cur.execute("SELECT row_index,text FROM global_small_jobs WHERE standort=? ORDER BY row_index", (standort,))
+    return [dict(r) for r in cur.fetchall()]
+
+
+def upsert_small_job(cur, standort: str, row_index: int, text: str):
+    cur.execute("""
+        INSERT INTO global_small_jobs(standort,row_index,text)
+        VALUES(?,?,?)
+        ON CONFLICT(standort,row_index) DO UPDATE SET text=excluded.text
+    """, (standort, row_index, text))
+
+
+# ---------------- Mitarbeiter ----------------
+def list_employees(cur, standort: str) -> list[dict]:
+    cur.execute("SELECT id,name FROM employees WHERE standort=? ORDER BY id", (standort,))
+    return [{"id": e["id"], "name": e["name"]} for e in cur.fetchall()]
+
+
+def list_all_employees(cur) -> list[dict]:
+    cur.execute("SELECT id, name, standort FROM employees ORDER BY standort, name")
+    return [dict(r) for r in cur.fetchall()]
+
+
+def insert_employees(cur, standort: str, names: list[str]):
+    cur.executemany(
+        "INSERT INTO employees(name, standort) VALUES(?, ?)",
+        [(n, standort) for n in names]
+    )
+
+
+def insert_employee_rows(cur, rows: list[tuple[str, str]]):
+    """rows: [(name, standort), ...]"""
+    cur.executemany("INSERT INTO employees(name, standort) VALUES(?, ?)", rows)
+
+
+def delete_employee(cur, emp_id: int):
+    cur.execute("DELETE FROM employees WHERE id=?", (emp_id,))
+
+
+# ---------------- Users ----------------
+def get_user_by_username(cur, username: str) -> sqlite3.Row | None:
+    cur.execute("SELECT * FROM users WHERE username=?", (username,))
+    return cur.fetchone()
+
+
+def user_exists(cur, user_id: int) -> bool:
+    cur.execute("SELECT id FROM users WHERE id=?", (user_id,))
+    return cur.fetchone() is not None
+
+
+def list_users(cur, order_by_username: bool = False) -> list[dict]:
+    if order_by_username:
+        cur.execute("SELECT id, username, is_write, can_view_eb, can_view_gg FROM users ORDER BY username")
+    else:
+        cur.execute("SELECT id, username, is_write, can_view_eb, can_view_gg FROM users ORDER BY id")
+    return [dict(r) for r in cur.fetchall()]
+
+
+def create_user(cur, username: str, password_hash: str, is_write: int, can_view_eb: int, can_view_gg: int) -> int:
+    cur.execute(
+        "INSERT INTO users(username, password_hash, is_write, can_view_eb, can_view_gg) VALUES(?,?,?,?,?)",
+        (username, password_hash, is_write, can_view_eb, can_view_gg)
+    )
+    return int(cur.lastrowid)
+
+
+def update_user(cur, user_id: int, is_write: int, can_view_eb: int, can_view_gg: int,
+                password_hash: str | None = None):
+    if password_hash:
+        cur.execute(
+            "UPDATE users SET is_write=?, can_view_eb=?, can_view_gg=?, password_hash=? WHERE id=?",
+            (is_write, can_view_eb, can_view_gg, password_hash, user_id)
+        )
+    else:
+        cur.execute(
+            "UPDATE users SET is_write=?, can_view_eb=?, can_view_gg=? WHERE id=?",
+            (is_write, can_view_eb, can_view_gg, user_id)
+        )
+
+
+def reset_admin(cur, password_hash: str):
+    cur.execute(
+        "UPDATE users SET password_hash=?, is_write=1, can_view_eb=1, can_view_gg=1 WHERE username=?",
+        (password_hash, "admin")
+    )
+
+
+def delete_user(cur, user_id: int):
+    cur.execute("DELETE FROM users WHERE id=?", (user_id,))
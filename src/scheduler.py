@@ -0,0 +1,68 @@
+# src/scheduler.py
+"""
+Kleiner In-Process-Scheduler (asyncio, keine externen Dienste).
+
+Jobs laufen per asyncio.to_thread im Threadpool, damit SQLite-Arbeit den
+Event-Loop nicht blockiert. Bei mehreren uvicorn-Workern läuft der Scheduler
+in jedem Prozess – die Jobs müssen daher idempotent sein.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+def next_weekly(now: datetime, weekday: int, hour: int, minute: int) -> datetime:
+    """Nächster Zeitpunkt weekday (0=Mo … 6=So) hh:mm nach now."""
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    target += timedelta(days=(weekday - now.weekday()) % 7)
+    if target <= now:
+        target += timedelta(days=7)
+    return target
+
+
+def next_daily(now: datetime, hour: int, minute: int) -> datetime:
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return target
+
+
+class Scheduler:
+    def __init__(self):
+        self._jobs: list[tuple[str, Callable[[datetime], datetime], Callable[[], None]]] = []
+        self._tasks: list[asyncio.Task] = []
+
+    def weekly(self, name: str, weekday: int, hour: int, minute: int, fn: Callable[[], None]):
+        self._jobs.append((name, lambda now: next_weekly(now, weekday, hour, minute), fn))
+
+    def daily(self, name: str, hour: int, minute: int, fn: Callable[[], None]):
+        self._jobs.append((name, lambda now: next_daily(now, hour, minute), fn))
+
+    async def _run(self, name: str, fn: Callable[[], None]):
+        try:
+            await asyncio.to_thread(fn)
+        except Exception:
+            logger.exception("Scheduler-Job %s fehlgeschlagen", name)
+
+    async def _loop(self, name: str, next_run: Callable[[datetime], datetime], fn: Callable[[], None]):
+        while True:
+            now = datetime.now()
+            await asyncio.sleep((next_run(now) - now).total_seconds())
+            await self._run(name, fn)
+
+    def start(self):
+        for name, next_run, fn in self._jobs:
+            self._tasks.append(asyncio.create_task(self._loop(name, next_run, fn)))
+
+    def run_soon(self, name: str, fn: Callable[[], None]):
+        """Einmalig im Hintergrund ausführen (z.B. Cache-Warmup beim Start)."""
+        self._tasks.append(asyncio.create_task(self._run(name, fn)))
+
+    async def stop(self):
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
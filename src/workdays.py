@@ -0,0 +1,63 @@
+# src/workdays.py
+"""
+Vorberechneter Arbeitstage-Kalender.
+
+main.is_workday() fragt pro Tag die DB (Feiertag? Freitag-Override?).
+Für Auswertungen über ganze Jahre lädt WorkdayCalendar Feiertage und
+Overrides eines Bereichs einmal und legt alle Arbeitstage als sortiertes
+NumPy-Array (Tages-Ordinalzahlen) ab. Arbeitstag-Index = Spalte im Jahresplan.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+
+from . import repo
+
+
+def default_show_friday(kw: int) -> bool:
+    """Sommer (KW 14..42): Fr AUS (4-Tage), Winter (KW 43..13): Fr AN."""
+    return not (14 <= int(kw) <= 42)
+
+
+class WorkdayCalendar:
+    def __init__(self, start: date, end: date, holidays: set[str], friday_overrides: dict[tuple[int, int], int]):
+        self.start = start
+        self.end = end
+        days = []
+        d = start
+        while d <= end:
+            wd = d.isoweekday()
+            if wd <= 5 and d.isoformat() not in holidays:
+                if wd != 5:
+                    days.append(d)
+                else:
+                    y, w, _ = d.isocalendar()
+                    ov = friday_overrides.get((int(y), int(w)))
+                    if (bool(ov) if ov is not None else default_show_friday(w)):
+                        days.append(d)
+            d += timedelta(days=1)
+        self.days: list[date] = days
+        self.ordinals = np.array([d.toordinal() for d in days], dtype=np.int64)
+
+    @classmethod
+    def load(cls, cur, start: date, end: date) -> "WorkdayCalendar":
+        holidays = set(repo.list_holidays(cur, start.isoformat(), end.isoformat()))
+        overrides = repo.list_friday_overrides(cur, start.isocalendar()[0], end.isocalendar()[0])
+        return cls(start, end, holidays, overrides)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def index_on_or_after(self, d) -> np.ndarray | int:
+        """Index des ersten Arbeitstags >= d (date oder Array von Ordinalzahlen)."""
+        if isinstance(d, date):
+            return int(np.searchsorted(self.ordinals, d.toordinal(), side="left"))
+        return np.searchsorted(self.ordinals, d, side="left")
+
+    def index_after(self, d: date) -> int:
+        """Index des ersten Arbeitstags > d."""
+        return int(np.searchsorted(self.ordinals, d.toordinal(), side="right"))
+
+    def is_workday(self, d: date) -> bool:
+        i = self.index_on_or_after(d)
+        return i < len(self.days) and self.days[i] == d
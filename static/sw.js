@@ -0,0 +1,108 @@
+/* Zankl Plan – static/sw.js (Service Worker für die Viewer-Ansicht)
+ * Wird über /sw.js ausgeliefert (Scope "/").
+ * Ziel: /view/week lädt sofort aus dem Cache – auch ohne Empfang auf der Baustelle –
+ *       und wird im Hintergrund per ETag (If-None-Match) revalidiert.
+ */
+
+const VIEW_CACHE = 'zankl-view-v1';
+const STATIC_CACHE = 'zankl-static-v1';
+const STATIC_ASSETS = ['/static/manifest.webmanifest'];
+const MAX_VIEW_ENTRIES = 12;
+
+self.addEventListener('install', (event) => {
+  event.waitUntil(
+    caches.open(STATIC_CACHE).then(c => c.addAll(STATIC_ASSETS)).then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', (event) => {
+  const keep = new Set([VIEW_CACHE, STATIC_CACHE]);
+  event.waitUntil(
+    caches.keys()
+      .then(keys => Promise.all(keys.filter(k => !keep.has(k)).map(k => caches.delete(k))))
+      .then(() => self.clients.claim())
+  );
+});
+
+function isViewUrl(url) {
+  return url.origin === self.location.origin && url.pathname === '/view/week';
+}
+
+// Nur echte Wochen-Seiten cachen (kein Redirect auf /login, keine Fehlerseiten)
+function cacheable(res) {
+  return res && res.ok && !res.redirected && res.type === 'basic';
+}
+
+async function trimViewCache() {
+  const cache = await caches.open(VIEW_CACHE);
+  const keys = await cache.keys();
+  for (let i = 0; i < keys.length - MAX_VIEW_ENTRIES; i++) await cache.delete(keys[i]);
+}
+
+// Revalidieren mit dem ETag der gecachten Antwort; 304 -> Cache bleibt gültig
+async function revalidate(url) {
+  const cache = await caches.open(VIEW_CACHE);
+  const cached = await cache.match(url);
+  const headers = {};
+  const etag = cached && cached.headers.get('ETag');
+  if (etag) headers['If-None-Match'] = etag;
+
+  const res = await fetch(url, { headers, credentials: 'same-origin', cache: 'no-store' });
+  if (res.status === 304 && cached) return cached;
+  if (cacheable(res)) {
+    await cache.put(url, res.clone());
+    await trimViewCache();
+  }
+  return res;
+}
+
+self.addEventListener('fetch', (event) => {
+  const req = event.request;
+  if (req.method !== 'GET') return;
+  const url = new URL(req.url);
+
+  // Abmelden: gecachte Pläne vom Gerät entfernen
+  if (url.origin === self.location.origin && url.pathname === '/logout') {
+    event.waitUntil(caches.delete(VIEW_CACHE));
+    return;
+  }
+
+  if (isViewUrl(url)) {
+    // stale-while-revalidate
+    event.respondWith((async () => {
+      const cache = await caches.open(VIEW_CACHE);
+      const cached = await cache.match(url.href);
+      const fresh = revalidate(url.href);
+      if (cached) {
+        event.waitUntil(fresh.catch(() => {}));
+        return cached;
+      }
+      try {
+        return await fresh;
+      } catch (e) {
+        return new Response(
+          '<!doctype html><meta charset="utf-8"><title>Offline</title>' +
+          '<p style="font-family:system-ui;padding:24px">Offline – diese Woche wurde noch nicht geladen.</p>',
+          { status: 503, headers: { 'Content-Type': 'text/html; charset=utf-8' } }
+        );
+      }
+    })());
+    return;
+  }
+
+  if (url.origin === self.location.origin && STATIC_ASSETS.includes(url.pathname)) {
+    event.respondWith(caches.match(req).then(c => c || fetch(req)));
+  }
+});
+
+// Seite meldet die Wochen, die offline verfügbar sein sollen (aktuelle + nächste KW)
+self.addEventListener('message', (event) => {
+  const data = event.data || {};
+  if (data.type !== 'precache' || !Array.isArray(data.urls)) return;
+  event.waitUntil(Promise.all(
+    data.urls
+      .map(u => new URL(u, self.location.origin))
+      .filter(isViewUrl)
+      .map(u => revalidate(u.href).catch(() => {}))
+  ));
+});
@@ -0,0 +1,35 @@
+import pytest
+
+from src import db as db_module
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Frische SQLite-Datei pro Test (beide Pools zeigen darauf)."""
+    path = tmp_path / "test.db"
+    monkeypatch.setattr(db_module, "_pool", db_module.ConnectionPool(path))
+    monkeypatch.setattr(db_module, "_ro_pool",
+                        db_module.ConnectionPool(path, db_module.READ_POOL_SIZE, read_only=True))
+    db_module.init_db()
+    yield
+    db_module.close_pool()
+
+
+@pytest.fixture
+def cur(db):
+    conn = db_module.get_conn()
+    try:
+        yield conn.cursor()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def client(db):
+    """Angemeldeter TestClient auf der Test-Datenbank."""
+    from fastapi.testclient import TestClient
+    from src.main import app
+
+    with TestClient(app) as c:
+        c.post("/login", data={"username": "admin", "password": "admin"})
+        yield c
@@ -0,0 +1,74 @@
+import json
+
+from src.audit import Group, Journal, compact, merge
+
+
+def test_merge_create_update_delete_is_no_change():
+    created = merge((None, None), (None, {"text": "a"}))
+    assert created == (None, {"text": "a"})
+    updated = merge(created, ({"text": "a"}, {"text": "b"}))
+    assert updated == (None, {"text": "b"})
+    assert merge(updated, ({"text": "b"}, None)) is None
+
+
+def test_merge_keeps_only_changed_fields():
+    c = merge(({"color": "red", "title": "A"}, {"color": "blue", "title": "A"}), ({"title": "A"}, {"title": "B"}))
+    assert c == ({"color": "red", "title": "A"}, {"color": "blue", "title": "B"})
+    assert merge(({"color": "red"}, {"color": "blue"}), ({"color": "blue"}, {"color": "red"})) is None
+
+
+def test_group_merges_same_row():
+    g = Group("s1", "admin")
+    g.add("week_cells", (1, 0, 0), None, {"text": "a"})
+    g.add("week_cells", (1, 0, 0), {"text": "a"}, None)
+    g.add("week_cells", (1, 0, 1), {"text": "x"}, {"text": "y"})
+    assert [(r[3], r[4], r[5], r[6]) for r in g.rows()] == [
+        ("week_cells", "[1,0,1]", '{"text":"x"}', '{"text":"y"}'),
+    ]
+
+
+def _row(seq, session, old, new, key="[1]"):
+    return {"seq": seq, "session": session, "tbl": "year_jobs", "row_key": key,
+            "old_data": json.dumps(old) if old is not None else None,
+            "new_data": json.dumps(new) if new is not None else None}
+
+
+def test_compact_respects_interleaved_sessions():
+    rows = [
+        _row(1, "a", {"color": "red"}, {"color": "blue"}),
+        _row(2, "a", {"color": "blue"}, {"color": "green"}),
+        _row(3, "b", {"color": "green"}, {"color": "white"}),
+        _row(4, "a", {"color": "white"}, {"color": "red"}),
+        _row(5, "a", {"color": "red"}, {"color": "white"}),
+        _row(6, "b", None, {"color": "red"}, key="[2]"),
+        _row(7, "b", {"color": "red"}, None, key="[2]"),
+    ]
+    updates, deletes = compact(rows)
+    # a: 1+2 zusammengefasst, 3 (b) bleibt, 4+5 heben sich auf, 6+7 (anlegen + löschen) entfallen
+    assert updates == [('{"color":"red"}', '{"color":"green"}', 2)]
+    assert sorted(deletes) == [1, 4, 5, 6, 7]
+
+
+def test_flush_requeues_rows_when_write_fails():
+    written, fail = [], [True]
+
+    def write(rows):
+        if fail[0]:
+            raise RuntimeError("database is locked")
+        written.extend(rows)
+
+    j = Journal(write)
+    g1 = Group("s1", "admin")
+    g1.add("year_holidays", ("2026-12-24",), None, {"label": "Heiligabend"})
+    j.submit(g1)
+    j.flush()
+    assert written == []
+
+    g2 = Group("s1", "admin")
+    g2.add("year_holidays", ("2026-12-31",), None, {"label": None})
+    j.submit(g2)
+    fail[0] = False
+    j.flush()
+    assert [r[4] for r in written] == ['["2026-12-24"]', '["2026-12-31"]']
+    j.flush()
+    assert len(written) == 2
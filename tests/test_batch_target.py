@@ -0,0 +1,28 @@
+from datetime import date
+
+import pytest
+
+from src.planner import batch_target
+from src.workdays import WorkdayCalendar
+
+CAL = WorkdayCalendar(date(2026, 1, 5), date(2026, 1, 30), set(), {})
+ROWS = {"eb": 4, "res": 2, "gg": 3}
+JOB = {"start_date": "2026-01-05", "section": "eb", "row_index": 1, "height_rows": 2}
+
+
+def test_relative_move():
+    assert batch_target(JOB, {"shift_workdays": 5, "row_delta": 1}, CAL, ROWS) == ("2026-01-12", "eb", 2)
+
+
+def test_section_change_must_fit_row_count():
+    assert batch_target(JOB, {"section": "gg", "row_index": 1}, CAL, ROWS) == ("2026-01-05", "gg", 1)
+    with pytest.raises(ValueError):
+        batch_target(JOB, {"section": "res", "row_index": 1}, CAL, ROWS)
+    with pytest.raises(ValueError):
+        batch_target(JOB, {"row_delta": 2}, CAL, ROWS)
+
+
+@pytest.mark.parametrize("section", [5, ["eb"], "xx"])
+def test_invalid_section_is_value_error(section):
+    with pytest.raises(ValueError):
+        batch_target(JOB, {"section": section}, CAL, ROWS)
@@ -0,0 +1,66 @@
+from datetime import date
+
+from src.planner import calendar_replan
+
+DAY = date(2026, 1, 7)  # Mi, KW 2 (Winter: Freitag ist Arbeitstag)
+
+
+def job(id, section, row, start, duration, height=1):
+    return {"id": id, "title": f"job{id}", "section": section, "row_index": row, "height_rows": height,
+            "start_date": start, "duration_days": duration}
+
+
+JOBS = [
+    job(1, "eb", 0, "2026-01-05", 5, height=2),   # überspannt DAY, Zeilen 0-1
+    job(2, "eb", 1, "2026-01-12", 2, height=2),   # Folgejob auf Zeile 1 (zieht Zeile 2 mit)
+    job(3, "eb", 2, "2026-01-14", 1),             # nur transitiv über Job 2 betroffen
+    job(4, "gg", 0, "2026-01-12", 1),             # andere Section
+    job(5, "eb", 3, "2026-01-12", 1),             # andere Zeile
+]
+
+
+def shifts(result):
+    return {s["id"]: (s["start_date_before"], s["start_date_after"]) for s in result["shifts"]}
+
+
+def test_new_holiday_extends_spanning_job_and_reports_conflict():
+    r = calendar_replan(DAY, set(), {}, {DAY.isoformat()}, {}, JOBS, shift_following=False)
+    assert (r["workday_before"], r["workday_after"], r["delta"]) == (True, False, 1)
+    assert [(a["id"], a["end_date_before"], a["end_date_after"]) for a in r["affected"]] == \
+        [(1, "2026-01-09", "2026-01-12")]
+    # Job 1 reicht jetzt auf Mo 12.01. und trifft Job 2 auf Zeile 1
+    assert r["conflicts"] == [{"id": 1, "with_id": 2}]
+    assert r["shifts"] == []
+
+
+def test_shift_propagates_through_multi_row_jobs():
+    r = calendar_replan(DAY, set(), {}, {DAY.isoformat()}, {}, JOBS, shift_following=True)
+    assert shifts(r) == {
+        2: ("2026-01-12", "2026-01-13"),
+        3: ("2026-01-14", "2026-01-15"),
+    }
+
+
+def test_removed_holiday_shortens_and_pulls_following_jobs_forward():
+    holidays = {DAY.isoformat()}
+    r = calendar_replan(DAY, holidays, {}, set(), {}, JOBS, shift_following=True)
+    assert r["delta"] == -1
+    assert [(a["id"], a["end_date_before"], a["end_date_after"]) for a in r["affected"]] == \
+        [(1, "2026-01-12", "2026-01-09")]
+    assert r["conflicts"] == []  # kürzere Jobs erzeugen keine Überlappung
+    assert shifts(r) == {
+        2: ("2026-01-12", "2026-01-09"),
+        3: ("2026-01-14", "2026-01-13"),
+    }
+
+
+def test_friday_override_uses_same_logic():
+    friday = date(2026, 1, 9)
+    r = calendar_replan(friday, set(), {}, set(), {(2026, 2): 0}, JOBS, shift_following=False)
+    assert r["delta"] == 1
+    assert [a["id"] for a in r["affected"]] == [1]
+
+
+def test_no_change_on_weekend():
+    r = calendar_replan(date(2026, 1, 10), set(), {}, {"2026-01-10"}, {}, JOBS, shift_following=True)
+    assert (r["delta"], r["affected"], r["shifts"], r["conflicts"]) == (0, [], [], [])
@@ -0,0 +1,31 @@
+from datetime import date
+
+import pytest
+
+from src.holidays import austrian_holidays, easter_sunday
+
+
+@pytest.mark.parametrize("year, expected", [
+    (2024, date(2024, 3, 31)),
+    (2025, date(2025, 4, 20)),
+    (2026, date(2026, 4, 5)),
+])
+def test_easter_sunday(year, expected):
+    assert easter_sunday(year) == expected
+
+
+def test_movable_feasts_2026():
+    days = dict((label, d) for d, label in austrian_holidays(2026))
+    assert days["Ostermontag"] == date(2026, 4, 6)
+    assert days["Christi Himmelfahrt"] == date(2026, 5, 14)
+    assert days["Pfingstmontag"] == date(2026, 5, 25)
+    assert days["Fronleichnam"] == date(2026, 6, 4)
+
+
+def test_fixed_days_sorted_and_extras():
+    days = austrian_holidays(2025, ["leopold", "silvester"])
+    assert days == sorted(days)
+    assert len(days) == 15
+    assert (date(2025, 11, 15), "Hl. Leopold (Landespatron NÖ)") in days
+    assert days[-1] == (date(2025, 12, 31), "Silvester")
+    assert (date(2025, 12, 24), "Heiliger Abend") not in days
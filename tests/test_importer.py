@@ -0,0 +1,63 @@
+import csv
+import io
+
+import pytest
+
+from src.importer import read_csv
+
+CTX = {"standort": "engelbrechts", "standorte": ["engelbrechts", "gross-gerungs"],
+       "canon_standort": lambda s: (s or "").strip().lower()}
+
+
+def read(kind, text, encoding="utf-8"):
+    return read_csv(kind, io.BytesIO(text.encode(encoding)), CTX)
+
+
+def test_jobs_valid_and_invalid_lines_are_reported_with_line_numbers():
+    rows, errors, total = read("jobs", (
+        "﻿Titel;Start;Dauer;Bereich;Farbe\n"
+        "Müller, Zwettl;2026-03-02;5;eb;red\n"
+        ";2026-03-02;5;eb;red\n"
+        "Huber;02.03.2026;5;eb;red\n"
+        "\n"
+        "Maier;2026-03-02;0;eb;red\n"
+        "Bauer;2026-03-02;2;xx;red\n"
+        "Wolf;2026-03-02;2;gg;lila\n"
+    ))
+    assert total == 6
+    assert rows == [("Müller, Zwettl", "2026-03-02", 5, 1, "eb", 0, "red", None)]
+    assert [(e["line"], e["errors"][0]) for e in errors] == [
+        (3, "Titel fehlt"),
+        (4, "ungültiges Startdatum (YYYY-MM-DD)"),
+        (6, "Arbeitstage/Zeilen müssen >= 1 sein"),
+        (7, "Bereich muss eb/res/gg sein"),
+        (8, "ungültige Farbe"),
+    ]
+
+
+def test_missing_required_column():
+    rows, errors, total = read("jobs", "title;dauer\nA;3\n")
+    assert (rows, total) == ([], 0)
+    assert errors == [{"line": 1, "errors": ["Spalte fehlt: start_date"]}]
+
+
+def test_comma_delimiter_and_german_dates_for_holidays():
+    rows, errors, _ = read("holidays", "datum,bezeichnung\n26.10.2026,Nationalfeiertag\n2026-12-25,\nxx,\n")
+    assert rows == [("2026-10-26", "Nationalfeiertag"), ("2026-12-25", None)]
+    assert [e["line"] for e in errors] == [4]
+
+
+def test_employees_default_and_unknown_standort():
+    rows, errors, _ = read("employees", "name;standort\nAnna;\nBen;gross-gerungs\nCarl;wien\n")
+    assert rows == [("Anna", "engelbrechts"), ("Ben", "gross-gerungs")]
+    assert errors == [{"line": 4, "errors": ["unbekannter Standort"]}]
+
+
+def test_broken_quote_raises_csv_error():
+    with pytest.raises(csv.Error):
+        read("jobs", 'title;start\n"Offen;2026-03-02\nB;2026-03-03\n')
+
+
+def test_non_utf8_raises_decode_error():
+    with pytest.raises(UnicodeDecodeError):
+        read("jobs", "title;start\nMüller;2026-03-02\n", encoding="latin-1")
@@ -0,0 +1,112 @@
+from datetime import date
+
+from src.occupancy import Occupancy
+from src.planner import schedule
+from src.workdays import WorkdayCalendar
+
+# KW 2 + 3 / 2026, Winter -> Freitag ist Arbeitstag: 10 Arbeitstage, Spalte 0 = Mo 05.01.
+CAL = WorkdayCalendar(date(2026, 1, 5), date(2026, 1, 16), set(), {})
+ROWS = {"eb": 4, "res": 2, "gg": 3}
+
+
+def occ(jobs=()):
+    return Occupancy(CAL, 0, len(CAL), ROWS, list(jobs))
+
+
+def job(section, row, start, duration, height=1):
+    return {"section": section, "row_index": row, "start_date": start,
+            "duration_days": duration, "height_rows": height}
+
+
+def test_calendar_has_ten_workdays():
+    assert len(CAL) == 10
+    assert CAL.days[0] == date(2026, 1, 5) and CAL.days[-1] == date(2026, 1, 16)
+
+
+def test_slot_spanning_whole_range_and_beyond():
+    o = occ()
+    assert o.find_slots("eb", 1, 10, limit=1) == [(0, 0)]
+    assert o.find_slots("eb", 1, 11) == []
+
+
+def test_slot_at_last_possible_column():
+    # alle Zeilen an den ersten 5 Tagen belegt -> einziger Start für 5 Tage ist Spalte 5
+    o = occ([job("eb", 0, "2026-01-05", 5, height=4)])
+    assert o.find_slots("eb", 1, 5, limit=10) == [(0, 5), (1, 5), (2, 5), (3, 5)]
+    assert o.find_slots("eb", 1, 6) == []
+
+
+def test_multi_row_height_skips_busy_row():
+    o = occ([job("eb", 1, "2026-01-05", 10)])
+    assert o.find_slots("eb", 2, 3, limit=10)[:1] == [(2, 0)]
+    assert all(r == 2 for r, _ in o.find_slots("eb", 2, 3, limit=50))
+    assert o.find_slots("eb", 4, 1) == []
+    assert o.find_slots("eb", 5, 1) == []  # höher als der Bereich
+
+
+def test_booked_cells_are_not_offered():
+    o = occ()
+    o.book("eb", 0, 0, 1, 3)
+    slots = o.find_slots("eb", 1, 3, limit=100)
+    assert slots[:3] == [(1, 0), (2, 0), (3, 0)]
+    assert not {(0, 0), (0, 1), (0, 2)} & set(slots)
+    assert (0, 3) in slots
+    assert o.grid[0, 0, :3].tolist() == [1, 1, 1]
+
+
+def test_overlapping_jobs_count_as_conflict():
+    o = occ([job("gg", 0, "2026-01-05", 3), job("gg", 0, "2026-01-06", 3)])
+    assert o.grid[2, 0, :5].tolist() == [1, 2, 2, 1, 0]
+
+
+def test_start_col_at_end_of_range():
+    o = occ()
+    n = len(CAL)
+    assert o.find_slots("res", 1, 1, start_col=n) == []
+    assert o.find_slots("res", 1, 1, start_col=n - 1, limit=5) == [(0, n - 1), (1, n - 1)]
+    assert o.find_slots("res", 1, 2, start_col=n - 1) == []
+
+
+def test_col_on_or_after_skips_weekend():
+    o = occ()
+    assert o.col_on_or_after(date(2026, 1, 10)) == 5  # Sa -> Mo 12.01.
+    assert o.col_on_or_after(date(2026, 1, 20)) == len(CAL)
+
+
+def pending(index, title, duration, height=1, sections=("eb",), earliest="2026-01-05", priority=0):
+    return {"index": index, "title": title, "duration_days": duration, "height_rows": height,
+            "sections": list(sections), "earliest": date.fromisoformat(earliest),
+            "priority": priority, "color": "yellow", "note": None}
+
+
+def test_schedule_places_without_overlap_and_by_priority():
+    o = occ([job("res", 0, "2026-01-05", 10)])
+    placed, unplaced = schedule(o, [
+        pending(0, "klein", 2, sections=("res",)),
+        pending(1, "wichtig", 10, height=2, sections=("res",), priority=5),
+    ])
+    # "wichtig" braucht beide Zeilen, Zeile 0 ist voll -> nicht platzierbar
+    assert [u["index"] for u in unplaced] == [1]
+    assert placed == [{**{k: v for k, v in pending(0, "klein", 2).items() if k not in ("sections", "earliest")},
+                       "section": "res", "row_index": 1, "start_date": "2026-01-05", "end_date": "2026-01-06"}]
+
+
+def test_schedule_respects_earliest_and_previous_bookings():
+    o = occ()
+    placed, unplaced = schedule(o, [
+        pending(0, "a", 3, height=4, earliest="2026-01-07"),
+        pending(1, "b", 2, height=4, priority=1),
+    ])
+    assert unplaced == []
+    by_title = {p["title"]: p for p in placed}
+    assert by_title["b"]["start_date"] == "2026-01-05"
+    # a darf erst ab Mi, b belegt Mo/Di komplett -> Mi
+    assert by_title["a"]["start_date"] == "2026-01-07"
+    assert by_title["a"]["end_date"] == "2026-01-09"
+    assert [p["index"] for p in placed] == [0, 1]
+
+
+def test_schedule_prefers_earliest_section():
+    o = occ([job("eb", 0, "2026-01-05", 5, height=4)])
+    placed, _ = schedule(o, [pending(0, "x", 2, sections=("eb", "gg"))])
+    assert (placed[0]["section"], placed[0]["start_date"]) == ("gg", "2026-01-05")
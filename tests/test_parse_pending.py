@@ -0,0 +1,27 @@
+from datetime import date
+
+from src.planner import parse_pending
+
+TODAY = date(2026, 3, 2)
+
+
+def test_non_object_items_are_reported_not_raised():
+    jobs, errors = parse_pending(["x", None, 5, {"title": "Müller", "section": "eb"}], TODAY)
+    assert [j["index"] for j in jobs] == [3]
+    assert errors == [{"index": i, "title": None, "reason": "not an object"} for i in range(3)]
+
+
+def test_invalid_fields_are_reported_with_index():
+    jobs, errors = parse_pending([
+        {"title": 7},
+        {"title": "A", "section": "xx"},
+        {"title": "B", "earliest": "02.03.2026"},
+        {"title": "C", "duration_days": -1},
+        {"title": "D", "earliest": "2026-01-01", "sections": ["res", "gg"], "priority": "2"},
+    ], TODAY)
+    assert [e["index"] for e in errors] == [0, 1, 2, 3]
+    assert errors[1]["reason"] == "invalid section"
+    assert jobs == [{
+        "index": 4, "title": "D", "duration_days": 1, "height_rows": 1, "sections": ["res", "gg"],
+        "earliest": TODAY, "priority": 2, "color": "yellow", "note": None,
+    }]
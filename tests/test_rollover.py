@@ -0,0 +1,52 @@
+from datetime import date
+
+from src.planner import rollover_jobs, rollover_start
+
+
+def job(id, start, title="Müller, Zwettl", section="eb", row=0):
+    return {"id": id, "title": title, "start_date": start, "duration_days": 3, "height_rows": 1,
+            "section": section, "row_index": row, "color": "red", "note": None}
+
+
+def test_rollover_start_iso_week_1_and_53():
+    # 2025-12-29 = KW 1/2026 (Mo) -> KW 1/2027
+    assert rollover_start(date(2025, 12, 29), 2027) == date(2027, 1, 4)
+    # 2027-01-01 = KW 53/2026 (Fr) -> 2027 hat keine KW 53 -> KW 52
+    assert rollover_start(date(2027, 1, 1), 2027) == date(2027, 12, 31)
+    assert rollover_start(date(2026, 12, 31), 2027) == date(2027, 12, 30)
+
+
+def test_selects_by_iso_year_and_lands_in_target_iso_year():
+    jobs = [
+        job(1, "2025-12-29"),   # ISO 2026, KW 1
+        job(2, "2026-06-10"),
+        job(3, "2027-01-01"),   # ISO 2026, KW 53
+        job(4, "2025-12-26"),   # ISO 2025 -> nicht dabei
+    ]
+    new, skipped = rollover_jobs(jobs, 2026, 2027)
+    assert skipped == []
+    assert [(j["source_id"], j["start_date"]) for j in new] == [
+        (1, "2027-01-04"), (2, "2027-06-16"), (3, "2027-12-31"),
+    ]
+    assert all(date.fromisoformat(j["start_date"]).isocalendar()[0] == 2027 for j in new)
+    assert [j["id"] for j in new] == [-1, -2, -3]
+
+
+def test_rerun_skips_existing_copies():
+    jobs = [job(1, "2026-03-02"), job(2, "2026-03-09", row=1)]
+    new, _ = rollover_jobs(jobs, 2026, 2027)
+    committed = jobs + [{**j, "id": 10 + i} for i, j in enumerate(new)]
+    again, skipped = rollover_jobs(committed, 2026, 2027)
+    assert (again, skipped) == ([], [1, 2])
+
+
+def test_week_53_and_52_collapsing_onto_same_day_copied_once():
+    jobs = [job(1, "2026-12-25"), job(2, "2027-01-01")]  # Fr KW 52 und Fr KW 53
+    new, skipped = rollover_jobs(jobs, 2026, 2027)
+    assert [j["start_date"] for j in new] == ["2027-12-31"]
+    assert skipped == [2]
+
+
+def test_job_ids_filter():
+    new, _ = rollover_jobs([job(1, "2026-03-02"), job(2, "2026-03-09")], 2026, 2027, {2})
+    assert [j["source_id"] for j in new] == [2]
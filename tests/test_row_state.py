@@ -0,0 +1,29 @@
+from src import repo
+from src.audit import TABLES
+
+
+def test_restored_job_gets_version_above_deleted_one(cur):
+    job_id = repo.insert_year_job(cur, "Müller, Zwettl", "2026-03-02", 5, 1, "eb", 0, "red", None)
+    assert repo.set_year_job_color(cur, job_id, "blue")
+    state = repo.get_row_state(cur, "year_jobs", ("id",), (job_id,), TABLES["year_jobs"][1])
+    assert repo.delete_year_job(cur, job_id)
+    repo.put_row_state(cur, "year_jobs", ("id",), (job_id,), state, exists=False, versioned=True)
+    assert repo.get_year_job(cur, job_id)["version"] == 3
+    assert repo.get_year_job(cur, job_id)["color"] == "blue"
+
+
+def test_restored_week_cell_gets_version_above_deleted_one(cur):
+    plan_id = repo.create_week_plan(cur, 2026, 10, "engelbrechts")
+    repo.upsert_week_cells(cur, plan_id, [(0, 0, "A")])
+    repo.upsert_week_cells(cur, plan_id, [(0, 0, "B")])
+    cur.execute("DELETE FROM week_cells WHERE week_plan_id=?", (plan_id,))
+    repo.put_row_state(cur, "week_cells", TABLES["week_cells"][0], (plan_id, 0, 0), {"text": "B"},
+                       exists=False, versioned=True)
+    assert repo.get_week_cell(cur, plan_id, 0, 0) == {"text": "B", "version": 3}
+
+
+def test_new_row_starts_at_version_1(cur):
+    plan_id = repo.create_week_plan(cur, 2026, 10, "engelbrechts")
+    repo.put_row_state(cur, "week_cells", TABLES["week_cells"][0], (plan_id, 1, 2), {"text": "C"},
+                       exists=False, versioned=True)
+    assert repo.get_week_cell(cur, plan_id, 1, 2) == {"text": "C", "version": 1}
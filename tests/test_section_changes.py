@@ -0,0 +1,36 @@
+from src import repo
+
+OLD = "2020-01-01 00:00:00"
+
+
+def _age_markers(cur):
+    cur.execute("UPDATE year_section_changes SET changed_at=?", (OLD,))
+
+
+def test_fresh_db_has_stable_fallback(cur):
+    first = repo.last_year_change(cur, "eb")
+    assert first is not None
+    # Log-Bereinigung ändert den Zeitpunkt nicht
+    cur.execute("DELETE FROM change_log")
+    assert repo.last_year_change(cur, "eb") == first
+
+
+def test_moving_job_marks_old_and_new_section(cur):
+    job_id = repo.insert_year_job(cur, "Müller, Zwettl", "2026-03-02", 5, 1, "eb", 0, "red", None)
+    _age_markers(cur)
+    assert repo.update_year_job(cur, job_id, "Müller, Zwettl", "2026-03-02", 5, 1, "gg", 0, "red", None)
+    assert repo.last_year_change(cur, "eb") > OLD
+    assert repo.last_year_change(cur, "gg") > OLD
+    assert repo.last_year_change(cur, "res") == OLD
+
+
+def test_delete_and_calendar_changes(cur):
+    job_id = repo.insert_year_job(cur, "Huber", "2026-03-02", 2, 1, "res", 1, "blue", None)
+    _age_markers(cur)
+    cur.execute("DELETE FROM year_jobs WHERE id=?", (job_id,))
+    assert repo.last_year_change(cur, "res") > OLD
+    assert repo.last_year_change(cur, "eb") == OLD
+
+    _age_markers(cur)
+    repo.upsert_holidays(cur, [("2026-12-24", "Heiligabend")])
+    assert all(repo.last_year_change(cur, s) > OLD for s in ("eb", "res", "gg"))
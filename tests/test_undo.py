@@ -0,0 +1,35 @@
+from src import db as db_module
+from src import repo
+
+WEEK = {"year": 2026, "kw": 10, "standort": "engelbrechts"}
+
+
+def set_cell(client, value, version):
+    return client.post("/api/week/set-cell", json={**WEEK, "row": 0, "day": 0, "value": value, "version": version})
+
+
+def test_undo_bumps_version_so_stale_clients_conflict(client):
+    conn = db_module.get_conn()
+    repo.create_week_plan_if_missing(conn.cursor(), 2026, 10, "engelbrechts")
+    conn.commit(); conn.close()
+
+    assert set_cell(client, "A", 0).json()["version"] == 1
+    assert set_cell(client, "B", 1).json()["version"] == 2
+
+    r = client.post("/api/undo").json()
+    assert r["ok"] and r["changes"][0]["data"] == {"text": "A", "version": 3}
+
+    # Client mit dem Stand vor dem Undo (version 2, Text "B") darf nicht blind überschreiben
+    r = set_cell(client, "C", 2)
+    assert r.status_code == 409
+    assert r.json()["current"] == {"text": "A", "version": 3}
+
+
+def test_undo_of_delete_restores_job_above_old_version(client):
+    job = client.post("/api/year/create-job", json={"title": "X, Y", "start_date": "2026-03-02"}).json()
+    job_id = job["id"]
+    assert client.post("/api/year/delete-job", json={"id": job_id, "version": 1}).json()["ok"]
+    r = client.post("/api/undo").json()
+    assert r["changes"][0]["data"]["version"] == 2
+    r = client.post("/api/year/delete-job", json={"id": job_id, "version": 1})
+    assert r.status_code == 409
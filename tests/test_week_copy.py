@@ -0,0 +1,39 @@
+from src import repo
+
+
+def cells(cur, plan_id):
+    return {k: (v["text"], v["version"]) for k, v in repo.get_week_cell_states(cur, plan_id).items()}
+
+
+def setup(cur):
+    src = repo.create_week_plan(cur, 2026, 10, "engelbrechts")
+    dst = repo.create_week_plan(cur, 2026, 11, "engelbrechts")
+    repo.upsert_week_cells(cur, src, [(0, 0, "A"), (0, 1, "B"), (1, 0, " ")])
+    repo.upsert_week_cells(cur, dst, [(0, 0, "old"), (0, 1, "B"), (2, 2, "weg"), (1, 0, "x")])
+    return src, dst
+
+
+def test_overwrite_bumps_versions_and_removes_extra_cells(cur):
+    src, dst = setup(cur)
+    before = cells(cur, dst)
+    repo.copy_week_cells(cur, "week", src, dst, overwrite=True)
+    after = cells(cur, dst)
+    assert after == {(0, 0): ("A", before[(0, 0)][1] + 1), (0, 1): ("B", before[(0, 1)][1])}
+
+
+def test_overwrite_from_template(cur):
+    src, dst = setup(cur)
+    template_id = repo.save_week_template(cur, "T", "engelbrechts", src, 5, 1)
+    v = cells(cur, dst)[(0, 0)][1]
+    repo.copy_week_cells(cur, "template", template_id, dst, overwrite=True)
+    assert cells(cur, dst) == {(0, 0): ("A", v + 1), (0, 1): ("B", 1)}
+
+
+def test_fill_only_touches_empty_cells(cur):
+    src, dst = setup(cur)
+    repo.upsert_week_cells(cur, dst, [(0, 1, "")])
+    v = cells(cur, dst)[(0, 1)][1]
+    repo.copy_week_cells(cur, "week", src, dst, overwrite=False)
+    after = cells(cur, dst)
+    assert after[(0, 0)][0] == "old" and after[(2, 2)][0] == "weg"
+    assert after[(0, 1)] == ("B", v + 1)